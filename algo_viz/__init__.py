@@ -1,3 +1,15 @@
-from .decorators import visualize
+# Exports are resolved lazily so that importing algo_viz (e.g. for the CLI)
+# does not pull in the tracer, analyzers and renderers up front
+__all__ = ["visualize", "TraceScope"]
 
-__all__ = ["visualize"]
+
+def __getattr__(name):
+    if name == "visualize":
+        from .decorators import visualize
+
+        return visualize
+    if name == "TraceScope":
+        from .tracer.scope import TraceScope
+
+        return TraceScope
+    raise AttributeError(f"module 'algo_viz' has no attribute {name!r}")
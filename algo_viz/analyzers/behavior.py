@@ -4,83 +4,203 @@ Behavioral analyzers for understanding function execution patterns.
 """
 
 from typing import List, Dict, Set, Any
-from collections import defaultdict
-
-
-class BehaviorAnalyzer:
+from collections import Counter, defaultdict
+
+from .pipeline import EventConsumer, feed
+
+# Most-changed variables of a frame considered as loop variables
+MAX_LOOP_VARS = 6
+
+_SIZED_TYPES = (list, tuple, dict, set, frozenset, str)
+
+
+def _changes_inside(changes, outer, candidates):
+    """Changes of each candidate grouped by the change of ``outer`` they follow"""
+    windows = {var: [] for var in candidates}
+    current = None
+    for name, old, new in changes:
+        if name == outer:
+            current = {var: [] for var in candidates}
+            for var in candidates:
+                windows[var].append(current[var])
+        elif current is not None and name in current:
+            current[name].append((old, new))
+    return windows
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _restarts_per_window(windows):
+    """
+    Whether a variable runs through a sequence anew after every change of the outer one.
+
+    That is what an inner loop variable does: it changes several times
+    between two outer changes, and its first change after each outer change
+    goes back to the start: against the direction of a counter (``range``),
+    or to the previous window's first value when iterating over values.
+    """
+    windows = [window for window in windows if window]
+    if not any(len(window) >= 2 for window in windows):
+        return False
+
+    numeric = all(_is_number(old) and _is_number(new) for window in windows for old, new in window)
+    direction = 0
+    if numeric:
+        # A counter: one direction within every window
+        for window in windows:
+            for old, new in window[1:]:
+                sign = (new > old) - (new < old)
+                if sign == 0 or direction not in (0, sign):
+                    direction = None
+                    break
+                direction = sign
+            if direction is None:
+                break
+
+    restarts = 0
+    for previous, window in zip(windows, windows[1:]):
+        old, new = window[0]
+        if direction:
+            restarts += (new - old) * direction < 0
+        else:
+            # Iterating over the same values again
+            restarts += new == previous[0][1]
+    return restarts >= 1 and 2 * restarts >= len(windows) - 1
+
+
+def _loop_depth(changes):
+    """
+    Estimated loop nesting behind one frame's ``(variable, old, new)`` changes.
+
+    Variables changing at least twice are loop candidates; one is nested in
+    another when it changes more often and restarts after every change of
+    the other (see _restarts_per_window). The depth is the longest chain.
+    """
+    counts = Counter(name for name, _, _ in changes)
+    # Element changes (dp[i], a[j]) are the loop's work, not its variables
+    names = Counter({name: count for name, count in counts.items() if "[" not in name})
+    loop_vars = [name for name, count in names.most_common(MAX_LOOP_VARS) if count >= 2]
+    if not loop_vars:
+        return 0
+
+    depth = {}
+    # Inner variables change more often, so their depth is known first
+    for outer in sorted(loop_vars, key=counts.get, reverse=True):
+        candidates = [name for name in loop_vars if counts[name] > counts[outer]]
+        nested = 0
+        if candidates:
+            windows = _changes_inside(changes, outer, candidates)
+            for name in candidates:
+                if _restarts_per_window(windows[name]):
+                    nested = max(nested, depth[name])
+        depth[outer] = 1 + nested
+    return max(depth.values())
+
+
+def _data_size(value):
+    try:
+        return len(value) if isinstance(value, _SIZED_TYPES) else 0
+    except TypeError:
+        return 0
+
+
+class BehaviorAnalyzer(EventConsumer):
     """Analyzes execution behavior to understand what the function does."""
 
-    def __init__(self, events):
+    def __init__(self, events=None):
         self.events = events
-        self.function_calls = self._extract_calls()
-        self.variable_states = self._extract_variable_states()
-        self.control_flow = self._analyze_control_flow()
-
-    def _extract_calls(self) -> List[Dict[str, Any]]:
-        """Extract function call information."""
-        calls = []
-        call_stack = []
-
-        for e in self.events:
-            if e.event_type == "call":
-                call_info = {
-                    "name": e.func_name,
-                    "args": e.new_value,
-                    "depth": e.depth,
-                    "line": e.line_no,
-                    "start_event_idx": len(self.events),
-                }
-                call_stack.append(call_info)
-
-            elif e.event_type == "return":
-                if call_stack:
-                    call = call_stack.pop()
-                    call["return_value"] = e.new_value
-                    call["end_event_idx"] = len(self.events)
-                    calls.append(call)
-
-        return calls
-
-    def _extract_variable_states(self) -> Dict[str, List[Any]]:
-        """Extract state changes for each variable."""
-        states = defaultdict(list)
-
-        for e in self.events:
-            if e.event_type == "var_change":
-                states[e.var_name].append(
-                    {
-                        "old": e.old_value,
-                        "new": e.new_value,
-                        "line": e.line_no,
-                        "depth": e.depth,
-                    }
-                )
-
-        return dict(states)
-
-    def _analyze_control_flow(self) -> Dict[str, Any]:
-        """Analyze control flow structure."""
-        flow = {
+        self.event_count = 0
+        self.function_calls = []
+        self.variable_states = {}
+        self.control_flow = {
             "max_call_depth": 0,
             "call_count": 0,
             "return_count": 0,
             "branching_points": 0,
         }
 
-        for e in self.events:
-            if e.event_type == "call":
-                flow["call_count"] += 1
-                flow["max_call_depth"] = max(flow["max_call_depth"], e.depth or 0)
-            elif e.event_type == "return":
-                flow["return_count"] += 1
-
-        # Detect branching by looking at divergent execution paths
-        lines_executed = defaultdict(set)
-        for e in self.events:
-            if e.event_type == "var_change":
-                lines_executed[e.line_no].add(e.var_name)
+        self._call_stack = []
+        self._states = defaultdict(list)
+        # Per open frame: its (variable, old, new) changes and subcall count;
+        # the first entry collects changes made outside any traced call
+        self._frame_changes = [[]]
+        self._frame_calls = [0]
+        self._loop_depth = 0
+        self._parent_calls = 0
+        self._subcalls = 0
+        self._data_size = 0
+
+        if events is not None:
+            feed(self, events)
+
+    def on_event(self, e) -> None:
+        """Record one event into calls, variable states and control flow."""
+        index = self.event_count
+        self.event_count += 1
+        event_type = e.event_type
+
+        if event_type == "var_change":
+            var_name, old, new = e.var_name, e.old_value, e.new_value
+            self._states[var_name].append(
+                {
+                    "old": old,
+                    "new": new,
+                    "line": e.line_no,
+                    "depth": e.depth,
+                }
+            )
+            self._frame_changes[-1].append((var_name, old, new))
+            if isinstance(new, _SIZED_TYPES):
+                self._data_size = max(self._data_size, _data_size(new))
 
-        return flow
+        elif event_type == "call":
+            self._call_stack.append(
+                {
+                    "name": e.func_name,
+                    "args": e.new_value,
+                    "depth": e.depth,
+                    "line": e.line_no,
+                    "start_event_idx": index,
+                }
+            )
+            self.control_flow["call_count"] += 1
+            self.control_flow["max_call_depth"] = max(
+                self.control_flow["max_call_depth"], e.depth or 0
+            )
+            self._frame_calls[-1] += 1
+            self._frame_changes.append([])
+            self._frame_calls.append(0)
+            if isinstance(e.new_value, dict):
+                for value in e.new_value.values():
+                    self._data_size = max(self._data_size, _data_size(value))
+
+        elif event_type == "return":
+            self.control_flow["return_count"] += 1
+            if self._call_stack:
+                call = self._call_stack.pop()
+                call["return_value"] = e.new_value
+                call["end_event_idx"] = index
+                self.function_calls.append(call)
+            if len(self._frame_changes) > 1:
+                self._close_frame()
+
+    def _close_frame(self) -> None:
+        self._loop_depth = max(self._loop_depth, _loop_depth(self._frame_changes.pop()))
+        subcalls = self._frame_calls.pop()
+        if subcalls:
+            self._parent_calls += 1
+            self._subcalls += subcalls
+
+    def finalize(self) -> "BehaviorAnalyzer":
+        self.variable_states = dict(self._states)
+        # Frames still open when the trace ended, then the top level
+        while len(self._frame_changes) > 1:
+            self._close_frame()
+        self._loop_depth = max(self._loop_depth, _loop_depth(self._frame_changes[0]))
+        self._frame_changes[0] = []
+        return self
 
     def get_input_output(self) -> Dict[str, Any]:
         """Analyze input and output patterns."""
@@ -133,24 +253,23 @@ class BehaviorAnalyzer:
         return flow_info
 
     def get_complexity_indicators(self) -> Dict[str, Any]:
-        """Analyze indicators of algorithmic complexity."""
-        complexity = {
-            "loop_depth": 0,
+        """
+        Analyze indicators of algorithmic complexity.
+
+        ``loop_depth`` is the deepest loop nesting estimated from the loop
+        variables of each frame, ``branching_factor`` the mean number of
+        subcalls made by calls that make any (2 for fib), and ``data_size``
+        the largest list, tuple, dict, set or string seen in a variable or
+        argument. For measured growth see ``algo_viz.complexity``.
+        """
+        branching = self._subcalls / self._parent_calls if self._parent_calls else 0
+        return {
+            "loop_depth": self._loop_depth,
             "recursion_depth": self.control_flow["max_call_depth"],
-            "branching_factor": 0,
-            "data_size": 0,
+            "branching_factor": round(branching, 2),
+            "data_size": self._data_size,
         }
 
-        # Estimate data size from list operations
-        for var, states in self.variable_states.items():
-            for state in states:
-                if isinstance(state["new"], list):
-                    complexity["data_size"] = max(
-                        complexity["data_size"], len(state["new"])
-                    )
-
-        return complexity
-
     def get_summary(self) -> str:
         """Generate a human-readable summary of function behavior."""
         summary_parts = []
@@ -168,6 +287,8 @@ class BehaviorAnalyzer:
         complexity = self.get_complexity_indicators()
         if complexity["recursion_depth"] > 1:
             summary_parts.append(f"Recursion depth: {complexity['recursion_depth']}")
+        if complexity["loop_depth"] > 0:
+            summary_parts.append(f"Loop depth: {complexity['loop_depth']}")
         if complexity["data_size"] > 0:
             summary_parts.append(f"Max data size: {complexity['data_size']}")
 
@@ -0,0 +1,166 @@
+# algo_viz/analyzers/complexity.py
+"""
+Empirical complexity: fitting operation counts to growth models.
+
+Each model is ``count ≈ a·f(n) + b`` with ``a ≥ 0``, fitted by weighted
+least squares with weights ``1/count²`` so that small and large inputs
+weigh the same (relative error). The model with the smallest residual wins,
+ties going to the slower-growing one; counts that no model makes grow by
+more than ``FLAT`` over the measured range are O(1). Confidence is how well
+the best model fits (one minus its RMS relative error) scaled by how clearly
+it beats the runner-up, so two models that explain the data equally well
+(too few or too narrow sizes) give a low confidence.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+# Growth models, slowest first; ties between fits go to the earlier one
+MODELS = (
+    ("O(1)", lambda n: 0.0),
+    ("O(log n)", lambda n: math.log2(n) if n > 1 else 0.0),
+    ("O(n)", lambda n: float(n)),
+    ("O(n log n)", lambda n: n * math.log2(n) if n > 1 else 0.0),
+    ("O(n²)", lambda n: float(n) * n),
+    ("O(2^n)", lambda n: 2.0 ** n),
+)
+
+# Sizes above this overflow 2^n as a float; the exponential model is skipped
+MAX_EXPONENT = 1000
+
+# Fewest distinct sizes a fit is attempted on
+MIN_SIZES = 3
+
+# Growth over the measured sizes, relative to the mean count, below which
+# the counts are considered flat
+FLAT = 0.1
+
+# Relative residual difference under which two fits count as equal
+_TIE = 1e-9
+
+
+@dataclass
+class ComplexityFit:
+    model: str                  # "O(n log n)", or "unknown" when nothing fits
+    confidence: float           # 0..1
+    coefficient: float = 0.0    # a in a·f(n) + b
+    intercept: float = 0.0      # b
+    r_squared: float = 0.0
+    runner_up: Optional[str] = None
+
+    def __str__(self):
+        return f"{self.model} (confidence {self.confidence:.2f})"
+
+
+def _least_squares(xs, ys, weights):
+    """(a, b, weighted residual) of ys ≈ a·xs + b"""
+    scale = max(abs(x) for x in xs) or 1.0
+    xs = [x / scale for x in xs]
+    total = sum(weights)
+    sx = sum(w * x for w, x in zip(weights, xs))
+    sy = sum(w * y for w, y in zip(weights, ys))
+    sxx = sum(w * x * x for w, x in zip(weights, xs))
+    sxy = sum(w * x * y for w, x, y in zip(weights, xs, ys))
+    det = total * sxx - sx * sx
+    if det <= 0:
+        return None
+    a = (total * sxy - sx * sy) / det
+    b = (sy - a * sx) / total
+    rss = sum(w * (a * x + b - y) ** 2 for w, x, y in zip(weights, xs, ys))
+    return a / scale, b, rss
+
+
+def _exponential(ns, ys):
+    """(base, scale) of ys ≈ scale·base^n, fitted on log(ys); None if not growing"""
+    if min(ys) <= 0:
+        return None
+    logs = [math.log(y) for y in ys]
+    fitted = _least_squares([float(n) for n in ns], logs, [1.0] * len(ns))
+    if fitted is None or fitted[0] <= 0:
+        return None
+    slope, offset, _ = fitted
+    return math.exp(slope), math.exp(offset)
+
+
+def _residual(predicted, ys, weights):
+    return sum(w * (p - y) ** 2 for w, p, y in zip(weights, predicted, ys))
+
+
+def fit_complexity(sizes, counts) -> ComplexityFit:
+    """
+    Best growth model for ``counts`` measured at input ``sizes``.
+
+    Sizes are positive ints and may repeat; at least MIN_SIZES distinct
+    sizes are needed for a meaningful fit, otherwise the model is "unknown".
+    The exponential model accepts any base (fib grows like 1.6^n); its
+    ``coefficient`` is that base.
+    """
+    points = sorted(zip(sizes, counts))
+    if len({n for n, _ in points}) < MIN_SIZES:
+        return ComplexityFit("unknown", 0.0)
+    ns = [n for n, _ in points]
+    ys = [float(y) for _, y in points]
+    weights = [1.0 / max(y, 1.0) ** 2 for y in ys]
+
+    total = sum(weights)
+    mean = sum(w * y for w, y in zip(weights, ys)) / total
+    constant_rss = _residual([mean] * len(ys), ys, weights)
+    constant = ("O(1)", 0.0, mean, constant_rss)
+
+    fits = []
+    for name, f in MODELS[1:]:
+        if name == "O(2^n)":
+            if ns[-1] > MAX_EXPONENT:
+                continue
+            fitted = _exponential(ns, ys)
+            if fitted is None:
+                continue
+            base, scale = fitted
+            predicted = [scale * base ** n for n in ns]
+            fits.append((name, base, 0.0, _residual(predicted, ys, weights), predicted))
+            continue
+        xs = [f(n) for n in ns]
+        fitted = _least_squares(xs, ys, weights)
+        if fitted is None or fitted[0] <= 0:
+            # Flat or shrinking along this model: it does not describe the growth
+            continue
+        a, b, rss = fitted
+        fits.append((name, a, b, rss, [a * x + b for x in xs]))
+
+    # Stable sort keeps slower-growing models first among (near) ties
+    fits.sort(key=lambda fit: fit[3])
+    if fits:
+        best = fits[0]
+        for fit in fits[1:]:
+            if fit[3] - best[3] > _TIE * max(best[3], 1.0):
+                break
+            if _model_rank(fit[0]) < _model_rank(best[0]):
+                best = fit
+    if not fits or best[4][-1] - best[4][0] < FLAT * mean:
+        # No model predicts a real change over the measured sizes
+        goodness = 1.0 - math.sqrt(constant_rss / len(ys))
+        runner_up = fits[0][0] if fits else None
+        return ComplexityFit("O(1)", max(0.0, goodness), 0.0, mean, 1.0, runner_up)
+
+    name, a, b, rss, _ = best
+    r_squared = max(0.0, 1.0 - rss / constant_rss) if constant_rss > 0 else 1.0
+    goodness = max(0.0, 1.0 - math.sqrt(rss / len(ys)))
+    others = [fit for fit in fits if fit is not best] + [constant]
+    others.sort(key=lambda fit: fit[3])
+    runner_up = others[0]
+    separation = 1.0 - rss / runner_up[3] if runner_up[3] > 0 else 0.0
+    confidence = max(0.0, min(1.0, goodness * separation))
+    return ComplexityFit(name, confidence, a, b, r_squared, runner_up[0])
+
+
+def _model_rank(name):
+    for rank, (model, _) in enumerate(MODELS):
+        if model == name:
+            return rank
+    return len(MODELS)
+
+
+def fit_counts(sizes, counts_by_metric) -> Dict[str, ComplexityFit]:
+    """fit_complexity() for every metric in ``{metric: [count per size]}``"""
+    return {metric: fit_complexity(sizes, counts) for metric, counts in counts_by_metric.items()}
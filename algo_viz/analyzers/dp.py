@@ -1,92 +1,241 @@
 
-from .events import DPUpdateEvent
+# algo_viz/analyzers/dp.py
+
+import ast
 import re
+import sys
+
+from .events import DPUpdateEvent
+from .pipeline import EventConsumer, feed
+from ..tracer.diff import array_type
+
 
 def is_list_assignment(e):
     return (
         e.event_type == "var_change"
         and (isinstance(e.new_value, int) or isinstance(e.new_value, list))
         and "[" in (e.var_name or "")
+        and getattr(e, "op", None) is None
     )
 
+_VAR_NAME_RE = re.compile(r'(\w+)\[(.+)\]')
+
+# Builtins index expressions may use; all are pure for the built-in types
+_SAFE_BUILTINS = {"len": len, "abs": abs, "min": min, "max": max}
+
+# (filename, line_no) -> CompiledFormula (None when the line is not an assignment)
+_FORMULA_CACHE = {}
+
+
 def parse_var_name(var_name):
     """Extract table name and index from var_name like 'dp[i]' or 'memo[0][1]'"""
-    match = re.match(r'(\w+)\[(.+)\]', var_name)
+    match = _VAR_NAME_RE.match(var_name)
     if match:
         return match.group(1), match.group(2)
     return None, None
 
+
+class CompiledRead:
+    """One subscript read on the right-hand side, e.g. ``dp[i-1][j]``."""
+
+    __slots__ = ("table", "label", "index_codes")
+
+    def __init__(self, table, label, index_codes):
+        self.table = table              # name of the table being read
+        self.label = label              # index source text, "i-1" or "i-1][j"
+        self.index_codes = index_codes  # one compiled expression per dimension
+
+    def evaluate(self, locals_snapshot):
+        """Return (indices, value) for this read, or None if it cannot be resolved"""
+        value = locals_snapshot.get(self.table)
+        ndarray = array_type()
+        sequence_types = (list, tuple) if ndarray is None else (list, tuple, ndarray)
+        indices = []
+        for code in self.index_codes:
+            idx = eval(code, {"__builtins__": _SAFE_BUILTINS}, locals_snapshot)
+            if isinstance(value, sequence_types):
+                if not isinstance(idx, int) or not 0 <= idx < len(value):
+                    return None
+            elif not isinstance(value, dict) or idx not in value:
+                return None
+            value = value[idx]
+            indices.append(idx)
+        if ndarray is not None and isinstance(value, sys.modules["numpy"].generic):
+            # Array elements come out as numpy scalars
+            value = value.item()
+        return tuple(indices), value
+
+
+class CompiledFormula:
+    """All table reads of one assignment statement, parsed once."""
+
+    __slots__ = ("reads",)
+
+    def __init__(self, reads):
+        self.reads = reads
+
+    def evaluate(self, table_name, locals_snapshot):
+        """
+        Evaluate the reads against ``locals_snapshot``.
+
+        Returns ``(inputs, reads)``: ``inputs`` maps index expressions on
+        ``table_name`` to their values, ``reads`` lists every resolved read
+        as (table, indices, label, value), other tables included.
+        """
+        inputs = {}
+        reads = []
+        for read in self.reads:
+            try:
+                resolved = read.evaluate(locals_snapshot)
+            except Exception:
+                continue
+            if resolved is None:
+                continue
+            indices, value = resolved
+            reads.append((read.table, indices, read.label, value))
+            if read.table == table_name:
+                # Use the expression as key to preserve readability (e.g., "i-1")
+                inputs[read.label] = value
+        return inputs, reads
+
+
+def _is_safe_index(node):
+    """Index expressions may only call whitelisted builtins"""
+    for child in ast.walk(node):
+        if isinstance(child, ast.Call):
+            if not (isinstance(child.func, ast.Name) and child.func.id in _SAFE_BUILTINS):
+                return False
+        elif isinstance(child, (ast.NamedExpr, ast.Lambda, ast.Await, ast.Yield, ast.YieldFrom)):
+            return False
+    return True
+
+
+def _subscript_chain(node):
+    """Split ``dp[i][j]`` into ("dp", [i_node, j_node]); None if the base is not a name"""
+    indices = []
+    while isinstance(node, ast.Subscript):
+        indices.append(node.slice)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    indices.reverse()
+    return node.id, indices
+
+
+def compile_formula(source_line):
+    """
+    Parse an assignment statement once and compile the index expressions of
+    every subscript read on its right-hand side.
+
+    Returns a CompiledFormula, or None when ``source_line`` is not an assignment.
+    """
+    try:
+        tree = ast.parse(source_line.strip())
+    except SyntaxError:
+        return None
+    if len(tree.body) != 1:
+        return None
+
+    stmt = tree.body[0]
+    if not isinstance(stmt, (ast.Assign, ast.AugAssign, ast.AnnAssign)) or stmt.value is None:
+        return None
+
+    source = source_line.strip()
+    reads = []
+    inner = set()
+    for node in ast.walk(stmt.value):
+        if not isinstance(node, ast.Subscript) or id(node) in inner:
+            continue
+        # Inner links of a chain (the dp[i-1] in dp[i-1][j]) are not reads of their own
+        base = node.value
+        while isinstance(base, ast.Subscript):
+            inner.add(id(base))
+            base = base.value
+
+        chain = _subscript_chain(node)
+        if chain is None:
+            continue
+        table, index_nodes = chain
+        if any(isinstance(idx, ast.Slice) or not _is_safe_index(idx) for idx in index_nodes):
+            continue
+
+        labels = [ast.get_source_segment(source, idx) or ast.unparse(idx) for idx in index_nodes]
+        codes = tuple(
+            compile(ast.Expression(body=idx), "<dp-index>", "eval") for idx in index_nodes
+        )
+        reads.append((node.lineno, node.col_offset, CompiledRead(table, "][".join(labels), codes)))
+
+    # ast.walk is breadth-first; report reads in source order instead
+    reads.sort(key=lambda item: item[:2])
+    return CompiledFormula([read for _, _, read in reads])
+
+
+def get_formula(source_line, filename=None, line_no=None):
+    """compile_formula() memoized by (filename, line_no, source text)"""
+    key = (filename, line_no, source_line)
+    try:
+        return _FORMULA_CACHE[key]
+    except KeyError:
+        formula = _FORMULA_CACHE[key] = compile_formula(source_line)
+        return formula
+
+
 def extract_formula_from_source(source_line, locals_snapshot, table_name, result_value):
     """
     Extract formula from source line like 'dp[i] = dp[i-1] + dp[i-2]'
     Returns dict of {index_expr: value} pairs used in the computation
     """
-    inputs = {}
-    
-    try:
-        if not source_line or "=" not in source_line:
-            return inputs
-        
-        # Get the RHS (right-hand side) of the assignment
-        rhs = source_line.split("=", 1)[-1].strip()
-        
-        # Match all patterns like table[expr] in the RHS
-        pattern = re.compile(rf'{re.escape(table_name)}\[([^\]]+)\]')
-        matches = list(pattern.finditer(rhs))
-        
-        for match in matches:
-            idx_expr = match.group(1)
-            try:
-                # Safely evaluate the index expression
-                idx_value = eval(idx_expr, {"__builtins__": {}}, locals_snapshot)
-                if isinstance(idx_value, int):
-                    # Get the actual table value
-                    table = locals_snapshot.get(table_name)
-                    if isinstance(table, list) and 0 <= idx_value < len(table):
-                        # Use the expression as key to preserve readability (e.g., "i-1")
-                        inputs[idx_expr] = table[idx_value]
-            except Exception:
-                pass
-        
-        return inputs
-    except Exception:
+    if not source_line:
         return {}
+    formula = get_formula(source_line)
+    if formula is None:
+        return {}
+    return formula.evaluate(table_name, locals_snapshot)[0]
 
-def analyze_dp(events):
-    dp_events = []
-
-    for e in events:
-        if is_list_assignment(e):
-            table_name, index_expr = parse_var_name(e.var_name)
-            if table_name and index_expr:
-                inputs = {}
-                
-                # Try to extract formula from source code
-                try:
-                    locals_snapshot = getattr(e, 'locals_snapshot', {})
-                    source_line = getattr(e, 'source_line', '')
-                    
-                    # Debug output
-                    # print(f"DEBUG: source_line='{source_line}', table='{table_name}', has locals: {bool(locals_snapshot)}")
-                    
-                    if source_line and locals_snapshot:
-                        inputs = extract_formula_from_source(
-                            source_line,
-                            locals_snapshot,
-                            table_name,
-                            e.new_value
-                        )
-                except Exception as ex:
-                    # print(f"DEBUG: Exception in analyze_dp: {ex}")
-                    pass
-                
-                dp_events.append(
-                    DPUpdateEvent(
-                        table=table_name,
-                        index=index_expr,
-                        inputs=inputs,
-                        result=e.new_value,
-                        line_no=e.line_no,
-                    )
+class DPAnalyzer(EventConsumer):
+    """Collects DP table updates (with their formulas) from list writes."""
+
+    event_types = ("var_change",)
+
+    def __init__(self):
+        self.dp_events = []
+
+    def on_event(self, e):
+        if not is_list_assignment(e):
+            return
+
+        table_name, index_expr = parse_var_name(e.var_name)
+        if table_name and index_expr:
+            inputs = {}
+            reads = []
+
+            # Exact reads recorded by the tracer (track_reads) beat the formula
+            exact_reads = getattr(e, 'reads', None)
+            locals_snapshot = getattr(e, 'locals_snapshot', {})
+            source_line = getattr(e, 'source_line', '')
+            if exact_reads is not None:
+                reads = list(exact_reads)
+                inputs = {label: value for table, _, label, value in reads if table == table_name}
+            elif source_line and locals_snapshot:
+                # Evaluate the statement's formula, compiled once per source line
+                formula = get_formula(source_line, getattr(e, 'filename', None), e.line_no)
+                if formula is not None:
+                    inputs, reads = formula.evaluate(table_name, locals_snapshot)
+
+            self.dp_events.append(
+                DPUpdateEvent(
+                    table=table_name,
+                    index=index_expr,
+                    inputs=inputs,
+                    result=e.new_value,
+                    line_no=e.line_no,
+                    reads=reads,
                 )
-    return dp_events
+            )
+
+    def finalize(self):
+        return self.dp_events
+
+
+def analyze_dp(events):
+    return feed(DPAnalyzer(), events)
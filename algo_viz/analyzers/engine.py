@@ -0,0 +1,120 @@
+# algo_viz/analyzers/engine.py
+"""
+Fused analysis of a whole trace.
+
+Runs every detector and analyzer that ``visualize()`` needs over a single
+traversal of the events, and memoizes the result on the trace so that all
+renderers share it.
+"""
+
+from typing import Any, Dict
+
+from .behavior import BehaviorAnalyzer
+from .dp import DPAnalyzer
+from .pipeline import AnalysisPipeline
+from .recursion_tree import RecursionTreeBuilder
+from ..detectors.coroutines import CoroutineDetector
+from ..detectors.dp import DPDetector
+from ..detectors.generic import GenericPatternDetector
+from ..detectors.operations import (
+    AccumulationDetector,
+    ForLoopDetector,
+    IfElseDetector,
+    ListOperationsDetector,
+    WhileLoopDetector,
+)
+from ..detectors.pointers import TwoPointersDetector
+from ..detectors.recursion import RecursionDetector
+from ..detectors.sliding_window import SlidingWindowDetector
+
+
+class TraceAnalysis:
+    """Results of one fused pass over a trace."""
+
+    def __init__(self, results: Dict[str, Any], operation_counts=None):
+        self.operation_counts = operation_counts  # exact OperationCounts, when the run counted them
+        self.recursion = results["recursion"]
+        self.recursion_tree = results["recursion_tree"]
+        self.coroutines = results["coroutines"]
+        self.sliding_window = results["sliding_window"]
+        self.two_pointers = results["two_pointers"]
+        self.dp = results["dp"]
+        self.dp_updates = results["dp_updates"]
+        self.generic_patterns = results["generic"]
+        self.behavior = results["behavior"]
+        self.operations = {
+            "loops": {
+                "for": results["for_loops"],
+                "while": results["while_loops"],
+            },
+            "conditionals": results["conditionals"],
+            "list_operations": results["list_operations"],
+            "accumulation": results["accumulation"],
+        }
+
+    @property
+    def detected_patterns(self):
+        """Names of the specialized algorithm patterns found, in display order"""
+        patterns = []
+        if self.recursion:
+            patterns.append("Recursion")
+        if self.sliding_window:
+            patterns.append("Sliding Window")
+        if self.two_pointers:
+            patterns.append("Two Pointers")
+        if self.dp:
+            patterns.append("Dynamic Programming")
+        if self.coroutines:
+            patterns.append("Coroutines")
+        return patterns
+
+
+def build_pipeline(operation_counts=None) -> AnalysisPipeline:
+    """
+    Pipeline with every consumer used by visualize(); ``operation_counts``
+    (an OperationCounts) gives the detectors exact counts to report.
+    """
+    return (
+        AnalysisPipeline()
+        .add("recursion", RecursionDetector())
+        .add("recursion_tree", RecursionTreeBuilder())
+        .add("coroutines", CoroutineDetector())
+        .add("sliding_window", SlidingWindowDetector())
+        .add("two_pointers", TwoPointersDetector())
+        .add("dp", DPDetector())
+        .add("dp_updates", DPAnalyzer())
+        .add("generic", GenericPatternDetector())
+        .add("behavior", BehaviorAnalyzer())
+        .add("for_loops", ForLoopDetector())
+        .add("while_loops", WhileLoopDetector())
+        .add("conditionals", IfElseDetector())
+        .add("list_operations", ListOperationsDetector(operation_counts))
+        .add("accumulation", AccumulationDetector())
+    )
+
+
+def analyze_trace(events, operation_counts=None) -> TraceAnalysis:
+    """
+    Analyze ``events`` in one pass, memoized per trace.
+
+    Traces that carry a ``cache`` dict (EventStore) keep the result there, so
+    repeated calls for the same trace are free. ``operation_counts`` is the
+    OperationCounts of the run, if it was traced with count_operations; a
+    later call without it reuses the analysis made with it.
+    """
+    cache = getattr(events, "cache", None)
+    if cache is not None:
+        cached = cache.get("analysis")
+        # A trace that grew since it was analyzed needs a fresh pass
+        if (
+            cached is not None
+            and cached[0] == len(events)
+            and (operation_counts is None or cached[1].operation_counts is operation_counts)
+        ):
+            return cached[1]
+
+    analysis = TraceAnalysis(build_pipeline(operation_counts).run(events), operation_counts)
+
+    if cache is not None:
+        cache["analysis"] = (len(events), analysis)
+    return analysis
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any
 
 @dataclass
@@ -8,3 +8,5 @@ class DPUpdateEvent:
     inputs: dict
     result: Any  # Can be int, float, or other numeric types
     line_no: int
+    # Every resolved read as (table, indices, index_expr, value), other tables included
+    reads: list = field(default_factory=list)
@@ -0,0 +1,74 @@
+# algo_viz/analyzers/pipeline.py
+"""
+Single-pass analysis pipeline.
+
+Detectors and analyzers are written as incremental consumers with an
+``on_event`` hook and a ``finalize`` hook. A pipeline feeds one traversal of
+the event stream to every registered consumer, dispatching each event only to
+the consumers that declared interest in its type.
+"""
+
+from collections import defaultdict
+from typing import Any, Dict
+
+
+class EventConsumer:
+    """Base class for incremental event consumers."""
+
+    # Event types this consumer wants; None means every event
+    event_types = None
+
+    def on_event(self, event) -> None:
+        pass
+
+    def finalize(self) -> Any:
+        return None
+
+
+def feed(consumer, events):
+    """Run a single consumer over ``events`` and return its finalized result."""
+    types = consumer.event_types
+    on_event = consumer.on_event
+
+    if types is None:
+        for e in events:
+            on_event(e)
+    else:
+        for e in events:
+            if e.event_type in types:
+                on_event(e)
+
+    return consumer.finalize()
+
+
+class AnalysisPipeline:
+    """Feeds one traversal of an event stream to many consumers."""
+
+    def __init__(self):
+        self.consumers = {}
+
+    def add(self, name: str, consumer) -> "AnalysisPipeline":
+        self.consumers[name] = consumer
+        return self
+
+    def run(self, events) -> Dict[str, Any]:
+        catch_all = []
+        by_type = defaultdict(list)
+
+        for consumer in self.consumers.values():
+            if consumer.event_types is None:
+                catch_all.append(consumer.on_event)
+            else:
+                for event_type in consumer.event_types:
+                    by_type[event_type].append(consumer.on_event)
+
+        by_type = dict(by_type)
+        for e in events:
+            for on_event in catch_all:
+                on_event(e)
+            handlers = by_type.get(e.event_type)
+            if handlers:
+                for on_event in handlers:
+                    on_event(e)
+
+        return {name: consumer.finalize() for name, consumer in self.consumers.items()}
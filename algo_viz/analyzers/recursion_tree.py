@@ -0,0 +1,238 @@
+# algo_viz/analyzers/recursion_tree.py
+"""
+Hash-consed recursion trees.
+
+Every finished call is interned by (function, arguments, result, interned
+children), so identical subtrees - ``fib(3)`` computed the same way eight
+times - are stored once with a count. Building is linear in the number of
+events and the tree's size grows with the number of distinct subtrees, not
+with the number of calls. Calls are also grouped by (function, arguments)
+to measure repeated subproblems and how many calls memoization would save.
+"""
+
+import reprlib
+from collections import defaultdict
+
+from .pipeline import EventConsumer, feed
+
+# Longest argument list shown in a node label
+MAX_LABEL = 120
+
+# Bounded reprs for labels, so showing a call costs the same whatever the
+# size of the lists passed to it
+_repr = reprlib.Repr()
+_repr.maxlevel = 3
+_repr.maxlist = _repr.maxtuple = _repr.maxset = _repr.maxfrozenset = _repr.maxdict = 32
+_repr.maxstring = _repr.maxother = MAX_LABEL
+
+
+class Subtree:
+    """One distinct subtree: a call, its result and its (interned) subcalls"""
+
+    __slots__ = ("key", "label", "result", "children", "calls", "count")
+
+    def __init__(self, key, label, result, children, calls):
+        self.key = key            # (function, arguments) of the call
+        self.label = label        # "fib(n=3)"
+        self.result = result      # returned value (None if the call never returned)
+        self.children = children  # tuple of Subtree ids, in call order
+        self.calls = calls        # calls in the subtree, this one included
+        self.count = 0            # how many times the trace ran this exact subtree
+
+
+class RecursionTree:
+    """Interned subtrees of a trace plus its repeated-subproblem statistics."""
+
+    def __init__(self, subtrees, roots, key_counts, calls, memoized_calls):
+        self.subtrees = subtrees            # list of Subtree, indexed by id
+        self.roots = roots                  # Subtree ids of the top-level calls
+        self.key_counts = key_counts        # (function, arguments) -> calls
+        self.calls = calls                  # calls in the trace
+        self.memoized_calls = memoized_calls  # calls left if repeated subproblems were cached
+
+    @property
+    def distinct_subproblems(self):
+        return len(self.key_counts)
+
+    @property
+    def repeated_calls(self):
+        """Calls whose (function, arguments) had been seen before"""
+        return self.calls - len(self.key_counts)
+
+    @property
+    def removable_calls(self):
+        """Calls memoization would not make: everything below a repeated subproblem"""
+        return self.calls - self.memoized_calls
+
+
+def _freeze(value, _active=None):
+    """
+    ``value`` if hashable, else a fingerprint of its contents: type, length
+    and structural hash for containers (lists, dicts, ...), identity for
+    other objects.
+    """
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        pass
+    kind = type(value).__name__
+    if not isinstance(value, (list, tuple, dict, set)):
+        return (kind, id(value))
+    if _active is None:
+        _active = set()
+    if id(value) in _active:
+        # Cycle back into a container being fingerprinted
+        return (kind, id(value))
+    _active.add(id(value))
+    try:
+        if isinstance(value, dict):
+            items = tuple((k, _freeze(v, _active)) for k, v in value.items())
+        elif isinstance(value, set):
+            items = frozenset(value)
+        else:
+            items = tuple(value)
+            try:
+                hash(items)
+            except TypeError:
+                items = tuple(_freeze(v, _active) for v in value)
+    finally:
+        _active.discard(id(value))
+    return (kind, len(value), hash(items))
+
+
+def show_value(value):
+    """Text of ``value`` for a node, bounded by MAX_LABEL whatever its size"""
+    if type(value) is str:
+        return value if len(value) <= MAX_LABEL else value[:MAX_LABEL] + "..."
+    return _repr.repr(value)
+
+
+def _label(func_name, args):
+    if not isinstance(args, dict):
+        return f"{func_name}()"
+    # Stop formatting once the label is long enough to be cut anyway
+    parts = []
+    size = 0
+    for k, v in args.items():
+        if size > MAX_LABEL:
+            break
+        part = f"{k}={show_value(v)}"
+        parts.append(part)
+        size += len(part) + 2
+    text = ", ".join(parts)
+    if len(text) > MAX_LABEL or len(parts) < len(args):
+        text = text[:MAX_LABEL] + "..."
+    return f"{func_name}({text})"
+
+
+class _OpenCall:
+    __slots__ = ("key", "depth", "frame_id", "children", "pruned")
+
+    def __init__(self, key, depth, frame_id, pruned):
+        self.key = key
+        self.depth = depth
+        self.frame_id = frame_id
+        self.children = []
+        # Inside (or at) a call memoization would have answered from its cache
+        self.pruned = pruned
+
+
+class RecursionTreeBuilder(EventConsumer):
+    """Builds a RecursionTree from call and return events in one pass"""
+
+    event_types = ("call", "return")
+
+    def __init__(self):
+        self.subtrees = []
+        self.roots = []
+        self.key_counts = defaultdict(int)
+        self.calls = 0
+        self.memoized_calls = 0
+        self._interned = {}
+        self._labels = {}
+        self._finished_keys = set()
+        # Open calls per thread, innermost last
+        self._stacks = defaultdict(list)
+
+    def on_event(self, e):
+        stack = self._stacks[getattr(e, "thread", 0)]
+        if e.event_type == "call":
+            self._on_call(e, stack)
+        else:
+            self._on_return(e, stack)
+
+    def _on_call(self, e, stack):
+        args = e.new_value
+        try:
+            key = (e.func_name, tuple(args.items()) if isinstance(args, dict) else args)
+            hash(key)
+        except TypeError:
+            if isinstance(args, dict):
+                key = (e.func_name, tuple((k, _freeze(v)) for k, v in args.items()))
+            else:
+                key = (e.func_name, _freeze(args))
+        if key not in self._labels:
+            self._labels[key] = _label(e.func_name, args)
+
+        depth = e.depth or 0
+        parent = None
+        for frame in reversed(stack):
+            if frame.depth < depth:
+                parent = frame
+                break
+        pruned_above = parent is not None and parent.pruned
+        self.calls += 1
+        self.key_counts[key] += 1
+        if not pruned_above:
+            self.memoized_calls += 1
+        stack.append(
+            _OpenCall(key, depth, getattr(e, "frame_id", None), pruned_above or key in self._finished_keys)
+        )
+
+    def _on_return(self, e, stack):
+        frame_id = getattr(e, "frame_id", None)
+        depth = e.depth or 0
+        for position in range(len(stack) - 1, -1, -1):
+            frame = stack[position]
+            if frame.frame_id == frame_id if frame_id is not None else frame.depth == depth:
+                break
+        else:
+            return
+        del stack[position]
+        self._finish(frame, e.new_value, stack)
+
+    def _finish(self, frame, result, stack):
+        children = tuple(frame.children)
+        signature = (frame.key, _freeze(result), children)
+        subtree_id = self._interned.get(signature)
+        if subtree_id is None:
+            subtree_id = len(self.subtrees)
+            calls = 1 + sum(self.subtrees[child].calls for child in children)
+            self.subtrees.append(Subtree(frame.key, self._labels[frame.key], result, children, calls))
+            self._interned[signature] = subtree_id
+        self.subtrees[subtree_id].count += 1
+        self._finished_keys.add(frame.key)
+
+        parent = None
+        for open_frame in reversed(stack):
+            if open_frame.depth < frame.depth:
+                parent = open_frame
+                break
+        if parent is None:
+            self.roots.append(subtree_id)
+        else:
+            parent.children.append(subtree_id)
+
+    def finalize(self):
+        # Calls still open when the trace ended are closed without a result
+        for stack in self._stacks.values():
+            while stack:
+                self._finish(stack.pop(), None, stack)
+        return RecursionTree(
+            self.subtrees, self.roots, dict(self.key_counts), self.calls, self.memoized_calls
+        )
+
+
+def build_recursion_tree(events):
+    return feed(RecursionTreeBuilder(), events)
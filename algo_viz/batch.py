@@ -0,0 +1,249 @@
+# algo_viz/batch.py
+"""
+Trace one algorithm over many inputs in parallel.
+
+Each (function, input) job runs in a worker process with its own
+ExecutionTracer and sends back only a compact InputResult (patterns,
+exact operation counts, result repr), or writes its full trace to a file when a
+record directory is given. The parent merges the results into a
+BatchReport.
+"""
+
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .targets import call_arguments, resolve_target, short_repr
+
+
+@dataclass
+class BatchJob:
+    target: Any                 # "module:function", "file.py:function" or a top-level function
+    args: list = field(default_factory=list)
+    kwargs: dict = field(default_factory=dict)
+    label: str = ""
+
+
+@dataclass
+class InputResult:
+    label: str
+    patterns: List[str] = field(default_factory=list)
+    generic_patterns: List[str] = field(default_factory=list)
+    loops: List[str] = field(default_factory=list)   # loop kinds the input ran: "for", "while"
+    operations: Dict[str, int] = field(default_factory=dict)
+    event_count: int = 0
+    dp_updates: int = 0
+    result: str = ""
+    error: Optional[str] = None
+    seconds: float = 0.0
+    trace_path: Optional[str] = None
+
+
+def _operation_counts(analysis):
+    """Flatten TraceAnalysis.operations and its exact operation counts into plain counters"""
+    operations = analysis.operations
+    behavior = analysis.behavior
+    exact = analysis.operation_counts.total() if analysis.operation_counts is not None else None
+    return {
+        "branches": operations["conditionals"].get("branches", 0),
+        "list_reads": operations["list_operations"].get("read_count", 0),
+        "list_writes": operations["list_operations"].get("write_count", 0),
+        "comparisons": exact.comparisons if exact is not None else 0,
+        "swaps": exact.swaps if exact is not None else 0,
+        "accumulations": operations["accumulation"].get("operations_count", 0),
+        "calls": len(behavior.function_calls),
+        "variable_changes": sum(len(states) for states in behavior.variable_states.values()),
+    }
+
+
+def run_job(job, backend="auto", record_dir=None, index=0):
+    """Trace and analyze one job in the current process"""
+    from .analyzers.engine import analyze_trace
+    from .decorators import tracing
+    from .tracer.scope import TraceScope
+    from .tracer.tracer import ExecutionTracer
+
+    label = job.label or short_repr(job.args if not job.kwargs else (job.args, job.kwargs))
+    trace_path = None
+    if record_dir is not None:
+        trace_path = os.path.join(record_dir, f"input_{index:05d}.avt")
+
+    start = time.perf_counter()
+    try:
+        func = resolve_target(job.target)
+        tracer = ExecutionTracer(
+            backend=backend,
+            scope=TraceScope.for_function(func),
+            record=trace_path,
+            count_operations=True,
+        )
+        # A decorated recursive target calls its wrapper; keep it from tracing
+        with tracing():
+            result, events = tracer.run(func, *job.args, **job.kwargs)
+        analysis = analyze_trace(events, tracer.operation_counts)
+    except Exception as exc:
+        return InputResult(
+            label=label,
+            error=f"{type(exc).__name__}: {exc}",
+            seconds=time.perf_counter() - start,
+        )
+
+    return InputResult(
+        label=label,
+        patterns=analysis.detected_patterns,
+        generic_patterns=sorted(analysis.generic_patterns),
+        loops=[kind for kind in ("for", "while") if analysis.operations["loops"][kind]],
+        operations=_operation_counts(analysis),
+        event_count=len(events),
+        dp_updates=len(analysis.dp_updates),
+        result=short_repr(result),
+        seconds=time.perf_counter() - start,
+        trace_path=trace_path,
+    )
+
+
+def _run_indexed(item):
+    index, job, backend, record_dir = item
+    return run_job(job, backend, record_dir, index)
+
+
+class BatchReport:
+    """Per-input results of a batch run plus their merged statistics."""
+
+    def __init__(self, results, seconds=0.0, workers=1):
+        self.results = results
+        self.seconds = seconds
+        self.workers = workers
+
+    @property
+    def failed(self):
+        return [r for r in self.results if r.error is not None]
+
+    @property
+    def pattern_counts(self):
+        """How many inputs showed each specialized pattern"""
+        return Counter(p for r in self.results for p in r.patterns)
+
+    @property
+    def generic_pattern_counts(self):
+        return Counter(p for r in self.results for p in r.generic_patterns)
+
+    @property
+    def loop_counts(self):
+        """How many inputs ran each kind of loop"""
+        return Counter(kind for r in self.results for kind in r.loops)
+
+    @property
+    def operation_totals(self):
+        totals = Counter()
+        for r in self.results:
+            totals.update(r.operations)
+        return totals
+
+    def to_dict(self):
+        return {
+            "inputs": len(self.results),
+            "failed": len(self.failed),
+            "seconds": self.seconds,
+            "workers": self.workers,
+            "pattern_counts": dict(self.pattern_counts),
+            "generic_pattern_counts": dict(self.generic_pattern_counts),
+            "loop_counts": dict(self.loop_counts),
+            "operation_totals": dict(self.operation_totals),
+            "results": [asdict(r) for r in self.results],
+        }
+
+    def render(self):
+        """Print the combined report"""
+        print("\n" + "=" * 60)
+        print("  BATCH REPORT")
+        print("=" * 60)
+        print(
+            f"   Inputs: {len(self.results)}  |  Failed: {len(self.failed)}  |  "
+            f"Workers: {self.workers}  |  Time: {self.seconds:.2f}s"
+        )
+
+        print("\n[*] Per-input results")
+        print("-" * 60)
+        for i, r in enumerate(self.results, 1):
+            if r.error is not None:
+                print(f"#{i:03d} | {r.label} | ERROR {r.error}")
+                continue
+            patterns = ", ".join(r.patterns) or "-"
+            print(
+                f"#{i:03d} | {r.label} | {r.event_count} events | {patterns} | -> {r.result}"
+            )
+
+        total = len(self.results) or 1
+        if self.pattern_counts:
+            print("\n[*] Pattern frequency")
+            print("-" * 60)
+            for pattern, count in self.pattern_counts.most_common():
+                print(f"   {pattern:<24} {count:>5} / {len(self.results)} ({100 * count / total:.0f}%)")
+
+        if self.generic_pattern_counts:
+            print("\n[*] Generic patterns")
+            print("-" * 60)
+            for pattern, count in self.generic_pattern_counts.most_common():
+                print(f"   {pattern:<24} {count:>5} / {len(self.results)}")
+
+        # Failed inputs contributed no loops or counts
+        traced = len(self.results) - len(self.failed) or 1
+        if self.loop_counts:
+            print("\n[*] Inputs with loops")
+            print("-" * 60)
+            for kind, count in self.loop_counts.most_common():
+                print(f"   {kind + ' loops':<24} {count:>5} / {traced} ({100 * count / traced:.0f}%)")
+
+        totals = self.operation_totals
+        if totals:
+            print("\n[*] Operations (total / mean per traced input)")
+            print("-" * 60)
+            for name, value in sorted(totals.items()):
+                print(f"   {name:<24} {value:>8}  {value / traced:>10.1f}")
+
+
+def run_batch(target, inputs, max_workers=None, backend="auto", record_dir=None, labels=None):
+    """
+    Trace ``target`` once per input, spread over a process pool.
+
+    Args:
+        target: "module:function", "file.py:function" or a module-level
+            function (it must be importable by the worker processes)
+        inputs: Iterable of argument sets; each is a list (positional),
+            a dict (keyword) or a single value, like the CLI's --args
+        max_workers: Worker processes (default: CPU count); 1 runs inline
+        backend: Tracer backend for every job
+        record_dir: If given, every trace is also written there as
+            input_NNNNN.avt for later replay
+        labels: Optional display label per input
+    """
+    # Fail fast on a bad target; forked workers also inherit the loaded module
+    resolve_target(target)
+
+    jobs = []
+    for i, value in enumerate(inputs):
+        args, kwargs = call_arguments(value)
+        label = labels[i] if labels is not None else ""
+        jobs.append(BatchJob(target, list(args), dict(kwargs), label))
+
+    if record_dir is not None:
+        os.makedirs(record_dir, exist_ok=True)
+
+    workers = max_workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(jobs)))
+    items = [(i, job, backend, record_dir) for i, job in enumerate(jobs)]
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = [_run_indexed(item) for item in items]
+    else:
+        # A few chunks per worker keeps IPC low while still balancing load
+        chunksize = max(1, len(items) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_indexed, items, chunksize=chunksize))
+
+    return BatchReport(results, time.perf_counter() - start, workers)
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+AlgoViz CLI - Command-line interface for algorithm visualization
+
+Subcommands import only what they need: ``record`` never loads the
+analyzers or renderers, and ``render`` never loads the tracer backends.
+"""
+
+import argparse
+import sys
+
+from .targets import load_arguments, load_target
+
+USAGE_EXAMPLE = """
+    from algo_viz import visualize
+
+    @visualize()
+    def my_algorithm(data):
+        # Your algorithm here
+        pass
+
+    my_algorithm([1, 2, 3])
+"""
+
+EPILOG = """
+Examples:
+  algoviz run examples/167_two_sum_ii.py:two_sum --args '[[1, 2, 5, 6], 11]'
+  algoviz run mypkg.sorting:merge_sort --args-file inputs.json --mode html
+  algoviz record mypkg.dp:climb_stairs --args '[30]' -o climb.avt
+  algoviz render climb.avt --mode json -o climb.ndjson
+  algoviz batch mypkg.search:two_sum --inputs-file cases.json --workers 8
+  algoviz complexity mypkg.sorting:merge_sort --args '[[5, 2, 9]]' --sizes 8,16,32,64,128
+  algoviz --version          Show version information
+"""
+
+
+class UsageError(Exception):
+    """A problem with the command line itself (bad target, arguments or trace file)"""
+
+
+def _trace(args, record=None, profile=False, count_operations=False):
+    from .decorators import tracing
+    from .tracer.scope import TraceScope
+    from .tracer.tracer import ExecutionTracer
+
+    try:
+        func = load_target(args.target)
+        positional, keywords = load_arguments(args.args, args.args_file)
+    except (ImportError, AttributeError, OSError, TypeError, ValueError) as exc:
+        raise UsageError(str(exc)) from exc
+    tracer = ExecutionTracer(
+        backend=args.backend,
+        scope=TraceScope.for_function(func),
+        track_reads=args.track_reads,
+        record=record,
+        profile=profile,
+        count_operations=count_operations,
+    )
+    # A decorated recursive target calls its wrapper; keep it from tracing
+    with tracing():
+        result, events = tracer.run(func, *positional, **keywords)
+    return result, events, tracer
+
+
+def cmd_run(args):
+    result, events, tracer = _trace(
+        args,
+        record=args.record,
+        profile=args.profile,
+        count_operations=args.count_operations,
+    )
+
+    from .report import render_report
+
+    render_report(
+        events,
+        args.mode,
+        not args.no_generic,
+        args.output,
+        tracer.profile,
+        tracer.operation_counts,
+        args.animate,
+    )
+    if args.mode == "ascii":
+        print(f"[*] Result: {result!r}")
+    return 0
+
+
+def cmd_record(args):
+    _, events, _ = _trace(args, record=args.output)
+    print(f"[*] Trace with {len(events)} events written to {args.output}")
+    return 0
+
+
+def cmd_render(args):
+    from .report import render_report
+    from .tracer.recording import open_trace
+
+    try:
+        events = open_trace(args.trace)
+    except (OSError, ValueError) as exc:
+        raise UsageError(str(exc)) from exc
+    with events:
+        render_report(events, args.mode, not args.no_generic, args.output, animate=args.animate)
+    return 0
+
+
+def cmd_batch(args):
+    import json
+
+    from .batch import run_batch
+
+    try:
+        with open(args.inputs_file, encoding="utf-8") as f:
+            inputs = json.load(f)
+        if not isinstance(inputs, list):
+            raise ValueError(f"{args.inputs_file} must hold a JSON array of inputs")
+        report = run_batch(
+            args.target,
+            inputs,
+            max_workers=args.workers,
+            backend=args.backend,
+            record_dir=args.record_dir,
+        )
+    except (ImportError, AttributeError, OSError, TypeError, ValueError) as exc:
+        raise UsageError(str(exc)) from exc
+
+    if args.json:
+        print(json.dumps(report.to_dict(), indent=2))
+    else:
+        report.render()
+    return 1 if report.failed else 0
+
+
+def cmd_complexity(args):
+    import json
+
+    from .complexity import DEFAULT_SIZES, run_complexity
+
+    try:
+        sizes = DEFAULT_SIZES
+        if args.sizes:
+            sizes = [int(size) for size in args.sizes.split(",")]
+            if any(size < 1 for size in sizes):
+                raise ValueError("--sizes must be positive integers")
+        report = run_complexity(
+            args.target,
+            sizes,
+            template=load_arguments(args.args, args.args_file),
+            max_workers=args.workers,
+            backend=args.backend,
+            max_steps=args.max_steps,
+        )
+    except (ImportError, AttributeError, OSError, TypeError, ValueError) as exc:
+        raise UsageError(str(exc)) from exc
+
+    if args.json:
+        print(json.dumps(report.to_dict(), indent=2))
+    else:
+        report.render()
+    return 1 if report.failed else 0
+
+
+def _add_target_arguments(parser):
+    parser.add_argument("target", help="module:function or path/to/file.py:function")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
+        "--args",
+        metavar="JSON",
+        help="arguments as JSON: an array (positional), an object (keyword) or a single value",
+    )
+    source.add_argument("--args-file", metavar="PATH", help="read the JSON arguments from a file")
+    parser.add_argument(
+        "--backend",
+        default="auto",
+        choices=["auto", "settrace", "monitoring"],
+        help="tracer backend (default: auto)",
+    )
+    parser.add_argument(
+        "--track-reads",
+        action="store_true",
+        help="record element reads (dp[i - 1], ...) with opcode-level tracing",
+    )
+
+
+def _add_render_arguments(parser):
+    parser.add_argument(
+        "--mode",
+        default="ascii",
+        choices=["ascii", "html", "json"],
+        help="output format (default: ascii)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        metavar="PATH",
+        help="output file for html (default algo_viz.html) or json (default stdout)",
+    )
+    parser.add_argument(
+        "--no-generic",
+        action="store_true",
+        help="skip the generic behavior analysis",
+    )
+    parser.add_argument(
+        "--animate",
+        action="store_true",
+        help="animate the DP table grid on the terminal (ascii mode)",
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="algoviz",
+        description="Visualize algorithm execution step-by-step",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=EPILOG,
+    )
+
+    parser.add_argument(
+        "--version",
+        action="version",
+        version="%(prog)s 0.1.0",
+        help="Show version and exit",
+    )
+
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    run = commands.add_parser("run", help="trace a function and render the result")
+    _add_target_arguments(run)
+    _add_render_arguments(run)
+    run.add_argument("--record", metavar="PATH", help="also save the trace to PATH")
+    run.add_argument(
+        "--profile",
+        action="store_true",
+        help="time every traced line and annotate the source with its heat",
+    )
+    run.add_argument(
+        "--count-operations",
+        action="store_true",
+        help="count comparisons, subscript reads/writes and swaps per function and line",
+    )
+    run.set_defaults(handler=cmd_run)
+
+    record = commands.add_parser("record", help="trace a function and save the trace without rendering")
+    _add_target_arguments(record)
+    record.add_argument("-o", "--output", required=True, metavar="PATH", help="trace file to write")
+    record.set_defaults(handler=cmd_record)
+
+    batch = commands.add_parser("batch", help="trace a function over many inputs in parallel")
+    batch.add_argument("target", help="module:function or path/to/file.py:function")
+    batch.add_argument(
+        "--inputs-file",
+        required=True,
+        metavar="PATH",
+        help="JSON array of inputs, each given like --args",
+    )
+    batch.add_argument("--workers", type=int, metavar="N", help="worker processes (default: CPU count)")
+    batch.add_argument("--record-dir", metavar="DIR", help="also save every trace in DIR")
+    batch.add_argument(
+        "--backend",
+        default="auto",
+        choices=["auto", "settrace", "monitoring"],
+        help="tracer backend (default: auto)",
+    )
+    batch.add_argument("--json", action="store_true", help="print the report as JSON")
+    batch.set_defaults(handler=cmd_batch)
+
+    complexity = commands.add_parser(
+        "complexity", help="estimate a function's time complexity over growing inputs"
+    )
+    complexity.add_argument("target", help="module:function or path/to/file.py:function")
+    source = complexity.add_mutually_exclusive_group()
+    source.add_argument(
+        "--args",
+        metavar="JSON",
+        help="example arguments, given like run's --args; the first list, string "
+        "or int is scaled to each size",
+    )
+    source.add_argument("--args-file", metavar="PATH", help="read the example arguments from a file")
+    complexity.add_argument(
+        "--sizes", metavar="N,N,...", help="comma-separated input sizes (default: 4 to 128)"
+    )
+    complexity.add_argument("--workers", type=int, metavar="N", help="worker processes (default: CPU count)")
+    complexity.add_argument(
+        "--max-steps",
+        type=int,
+        default=200_000,
+        metavar="N",
+        help="stop a run after N executed lines; larger sizes are then skipped (default: 200000)",
+    )
+    complexity.add_argument(
+        "--backend",
+        default="auto",
+        choices=["auto", "settrace", "monitoring"],
+        help="tracer backend (default: auto)",
+    )
+    complexity.add_argument("--json", action="store_true", help="print the report as JSON")
+    complexity.set_defaults(handler=cmd_complexity)
+
+    render = commands.add_parser("render", help="render a saved trace")
+    render.add_argument("trace", help="trace file written by `algoviz record` or --record")
+    _add_render_arguments(render)
+    render.set_defaults(handler=cmd_render)
+
+    return parser
+
+
+def main(argv=None):
+    """Main CLI entry point"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.command is None:
+        print("AlgoViz - Algorithm Intuition Visualizer v0.1.0", file=sys.stderr)
+        print(
+            "\nUsage: Use the @visualize() decorator in your Python code, "
+            "or one of the run/record/render commands (see --help)",
+            file=sys.stderr,
+        )
+        print("\nExample:", file=sys.stderr)
+        print(USAGE_EXAMPLE, file=sys.stderr)
+        return 0
+
+    try:
+        return args.handler(args)
+    except UsageError as exc:
+        parser.error(str(exc))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
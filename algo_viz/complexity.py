@@ -0,0 +1,321 @@
+# algo_viz/complexity.py
+"""
+Empirical complexity of one algorithm over a series of input sizes.
+
+Inputs are generated in the parent (from ``make_input(n)`` or by scaling a
+template call's arguments), then each size runs in a worker process under an
+OperationCounter, which sends back only its counts: executed lines (steps),
+comparisons, list reads/writes, swaps and calls. The parent fits every metric to the
+growth models of ``analyzers.complexity`` and reports the best fit with its
+confidence. Runs that hit the step limit are reported but left out of the
+fit, and sizes above the first one that hits it are skipped, so an
+exponential algorithm only costs its small sizes.
+"""
+
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from .analyzers.complexity import fit_counts
+from .targets import resolve_target, short_repr
+from .tracer.counter import DEFAULT_MAX_STEPS
+
+# Input sizes measured when none are given
+DEFAULT_SIZES = (4, 8, 12, 16, 24, 32, 48, 64, 96, 128)
+
+# Metrics fitted, in report order, with their display names
+METRICS = (
+    ("steps", "steps"),
+    ("comparisons", "comparisons"),
+    ("list_accesses", "list accesses"),
+)
+
+
+@dataclass
+class SizeResult:
+    size: int
+    steps: int = 0
+    comparisons: int = 0
+    list_reads: int = 0
+    list_writes: int = 0
+    calls: int = 0
+    swaps: int = 0
+    result: str = ""
+    truncated: bool = False     # stopped at the step limit
+    skipped: bool = False       # not run, a smaller size already hit the limit
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+    @property
+    def list_accesses(self):
+        return self.list_reads + self.list_writes
+
+
+def _scaled_list(template, n):
+    if template and all(type(x) is int for x in template):
+        rng = random.Random(n)
+        values = rng.sample(range(4 * n), n)
+        if all(a <= b for a, b in zip(template, template[1:])):
+            # Sorted inputs (binary search, two pointers) stay sorted
+            values.sort()
+        return values
+    if not template:
+        raise ValueError("cannot scale an empty sequence argument")
+    return [template[i % len(template)] for i in range(n)]
+
+
+def _scaled(value, n):
+    if isinstance(value, str):
+        if not value:
+            raise ValueError("cannot scale an empty string argument")
+        return (value * (n // len(value) + 1))[:n]
+    if isinstance(value, (list, tuple)):
+        return type(value)(_scaled_list(list(value), n))
+    return n
+
+
+def _scalable(value):
+    if isinstance(value, (list, tuple, str)):
+        return True
+    return type(value) is int
+
+
+def scale_arguments(args, kwargs, n):
+    """
+    ``(args, kwargs)`` of a template call with its size argument set to ``n``.
+
+    The size argument is the first list, tuple or string (resized to ``n``
+    items; int lists become ``n`` distinct random ints, sorted if the
+    template was sorted) or, failing that, the first int (replaced by ``n``).
+    Positional arguments are searched before keyword ones.
+    """
+    args = list(args)
+    kwargs = dict(kwargs)
+    for kind in ("sequence", "int"):
+        for i, value in enumerate(args):
+            if _scalable(value) and (kind == "int") == (type(value) is int):
+                args[i] = _scaled(value, n)
+                return args, kwargs
+        for name, value in kwargs.items():
+            if _scalable(value) and (kind == "int") == (type(value) is int):
+                kwargs[name] = _scaled(value, n)
+                return args, kwargs
+    raise ValueError("no list, string or int argument to scale with the input size")
+
+
+def _input_arguments(value):
+    """make_input() result as (args, kwargs): a tuple is positional, anything else the only argument"""
+    if isinstance(value, tuple):
+        return list(value), {}
+    return [value], {}
+
+
+def measure(target, size, args, kwargs, backend="auto", max_steps=DEFAULT_MAX_STEPS):
+    """Count the operations of one call of ``target`` in the current process"""
+    from .decorators import tracing
+    from .tracer.counter import OperationCounter, StepLimitExceeded
+    from .tracer.scope import TraceScope
+
+    start = time.perf_counter()
+    # A decorated recursive function calls its wrapper; keep it from tracing
+    with tracing():
+        try:
+            func = resolve_target(target)
+            counter = OperationCounter(
+                backend=backend, scope=TraceScope.for_function(func), max_steps=max_steps
+            )
+            result = counter.run(func, *args, **kwargs)
+        except StepLimitExceeded:
+            return SizeResult(
+                size, **counter.counts, truncated=True, seconds=time.perf_counter() - start
+            )
+        except Exception as exc:
+            return SizeResult(
+                size, error=f"{type(exc).__name__}: {exc}", seconds=time.perf_counter() - start
+            )
+
+    return SizeResult(
+        size, **counter.counts, result=short_repr(result), seconds=time.perf_counter() - start
+    )
+
+
+def _measure_item(item):
+    return measure(*item)
+
+
+class ComplexityReport:
+    """Per-size counts of a complexity run and the growth model fitted to each metric."""
+
+    def __init__(self, results, seconds=0.0, workers=1):
+        self.results = results
+        self.seconds = seconds
+        self.workers = workers
+        measured = self.measured
+        sizes = [r.size for r in measured]
+        self.fits = fit_counts(
+            sizes, {metric: [getattr(r, metric) for r in measured] for metric, _ in METRICS}
+        )
+
+    @property
+    def measured(self):
+        """Results that ran to completion, the ones the fits use"""
+        return [r for r in self.results if r.error is None and not r.truncated and not r.skipped]
+
+    @property
+    def failed(self):
+        return [r for r in self.results if r.error is not None]
+
+    @property
+    def truncated(self):
+        """Results stopped at the step limit or skipped because of it"""
+        return [r for r in self.results if r.truncated or r.skipped]
+
+    @property
+    def complexity(self):
+        """Fit of the step counts, the overall verdict"""
+        return self.fits["steps"]
+
+    def to_dict(self):
+        return {
+            "sizes": [r.size for r in self.results],
+            "failed": len(self.failed),
+            "truncated": len(self.truncated),
+            "seconds": self.seconds,
+            "workers": self.workers,
+            "fits": {metric: asdict(fit) for metric, fit in self.fits.items()},
+            "results": [dict(asdict(r), list_accesses=r.list_accesses) for r in self.results],
+        }
+
+    def render(self):
+        """Print the measurements and the fitted complexities"""
+        print("\n" + "=" * 60)
+        print("  COMPLEXITY REPORT")
+        print("=" * 60)
+        print(
+            f"   Sizes: {len(self.results)}  |  Stopped: {len(self.truncated)}  |  "
+            f"Failed: {len(self.failed)}  |  Workers: {self.workers}  |  Time: {self.seconds:.2f}s"
+        )
+
+        print("\n[*] Measurements")
+        print("-" * 60)
+        print(f"   {'n':>6} {'steps':>11} {'comparisons':>12} {'list accesses':>14} {'calls':>9}")
+        for r in self.results:
+            if r.error is not None:
+                print(f"   {r.size:>6}  ERROR {r.error}")
+                continue
+            if r.skipped:
+                print(f"   {r.size:>6}  skipped, a smaller size hit the step limit")
+                continue
+            note = "  (stopped at the step limit)" if r.truncated else ""
+            print(
+                f"   {r.size:>6} {r.steps:>11} {r.comparisons:>12} "
+                f"{r.list_accesses:>14} {r.calls:>9}{note}"
+            )
+
+        print("\n[*] Estimated complexity")
+        print("-" * 60)
+        for metric, label in METRICS:
+            fit = self.fits[metric]
+            runner_up = f"  (next best {fit.runner_up})" if fit.runner_up else ""
+            print(f"   {label:<14} {fit.model:<11} confidence {fit.confidence:.2f}{runner_up}")
+
+
+def _target_spec(func):
+    """
+    "module:qualname" for a function the worker processes can import, else None.
+
+    Functions defined in a script (``__main__``) are only reachable by
+    forked workers.
+    """
+    qualname = getattr(func, "__qualname__", "")
+    module = getattr(func, "__module__", None)
+    if not module or not qualname or "<locals>" in qualname:
+        return None
+    if module == "__main__" and multiprocessing.get_start_method() != "fork":
+        return None
+    return f"{module}:{qualname}"
+
+
+def run_complexity(
+    target,
+    sizes=DEFAULT_SIZES,
+    make_input=None,
+    template=None,
+    max_workers=None,
+    backend="auto",
+    max_steps=DEFAULT_MAX_STEPS,
+):
+    """
+    Count the operations of ``target`` at every input size and fit their growth.
+
+    Args:
+        target: "module:function", "file.py:function" or a function; a
+            function the workers cannot import is measured inline
+        sizes: Input sizes to measure (positive ints)
+        make_input: Optional ``make_input(n)`` building the input of size
+            ``n``: a tuple of positional arguments, or the single argument
+        template: ``(args, kwargs)`` of an example call, scaled with
+            scale_arguments() when no make_input is given; with neither,
+            the size itself is the only argument
+        max_workers: Worker processes (default: CPU count); 1 runs inline
+        backend: Tracer backend used for counting
+        max_steps: Stop a run after this many executed lines; stopped runs
+            are left out of the fit
+    """
+    func = resolve_target(target)
+    spec = target if isinstance(target, str) else _target_spec(func)
+
+    items = []
+    for n in sizes:
+        if make_input is not None:
+            args, kwargs = _input_arguments(make_input(n))
+        elif template is not None:
+            args, kwargs = scale_arguments(*template, n)
+        else:
+            args, kwargs = [n], {}
+        items.append((spec if spec is not None else func, n, args, kwargs, backend, max_steps))
+
+    workers = max_workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(items)))
+    if spec is None:
+        workers = 1
+
+    # Smallest sizes first: once one hits the step limit, larger ones are skipped
+    order = sorted(range(len(items)), key=lambda i: items[i][1])
+    results = [None] * len(items)
+    limit = None
+    start = time.perf_counter()
+    if workers == 1:
+        for i in order:
+            size = items[i][1]
+            if limit is not None and size > limit:
+                results[i] = SizeResult(size, skipped=True)
+                continue
+            results[i] = _measure_item(items[i])
+            if results[i].truncated:
+                limit = size
+    else:
+        # At most one size per worker in flight, so sizes past the limit never start
+        pending = list(reversed(order))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            running = {}
+            while pending or running:
+                while pending and len(running) < workers:
+                    i = pending.pop()
+                    if limit is None or items[i][1] <= limit:
+                        running[pool.submit(_measure_item, items[i])] = i
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = running.pop(future)
+                    results[i] = future.result()
+                    if results[i].truncated and (limit is None or items[i][1] < limit):
+                        limit = items[i][1]
+        for i in order:
+            if results[i] is None:
+                results[i] = SizeResult(items[i][1], skipped=True)
+
+    return ComplexityReport(results, time.perf_counter() - start, workers)
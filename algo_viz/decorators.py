@@ -1,121 +1,127 @@
 # algo_viz/decorators.py
 
+import contextlib
+import functools
+import threading
+
+from .tracer.scope import TraceScope
 from .tracer.tracer import ExecutionTracer
-from .detectors.pointers import detect_two_pointers
-from .detectors.dp import detect_dp
-from .detectors.recursion import detect_recursion
-from .renderers.ascii import render
-from .renderers.recursion_tree import render_recursion_tree
-from .renderers.html import render_html
-from .detectors.sliding_window import detect_sliding_window
-from .analyzers.dp import analyze_dp
-from .renderers.dp_ascii import render_dp
-from .renderers.two_pointers import render_two_pointers
-from .renderers.sliding_window import render_sliding_window
-from .detectors.generic import GenericPatternDetector
-from .detectors.operations import (
-    detect_for_loops,
-    detect_while_loops,
-    detect_if_else,
-    detect_list_operations,
-    detect_accumulation,
-)
-from .renderers.generic import (
-    render_behavior_summary,
-    render_variable_tracking,
-    render_pattern_summary,
-    render_operation_summary,
-    render_execution_stats,
-    render_data_flow,
-)
-
-
-def visualize(mode="ascii", show_generic=True):
+from .renderers import REPORT_MODES
+
+# Tracks whether this thread is already inside a visualized call, so that a
+# recursive decorated function is traced once instead of once per call
+_active = threading.local()
+
+
+@contextlib.contextmanager
+def tracing():
+    """
+    Mark this thread as running a trace (or a measurement) for the duration
+    of the block, so that visualized functions called inside it run plainly
+    instead of starting a trace of their own.
+    """
+    was_tracing = getattr(_active, "tracing", False)
+    _active.tracing = True
+    try:
+        yield
+    finally:
+        _active.tracing = was_tracing
+
+
+def visualize(
+    mode="ascii",
+    show_generic=True,
+    backend="auto",
+    scope=None,
+    track_reads=False,
+    record=None,
+    sizes=None,
+    make_input=None,
+    profile=False,
+    count_operations=False,
+    animate=False,
+):
     """
     Visualize algorithm execution with support for both specialized patterns and generic analysis.
     
     Args:
-        mode: "ascii" (default), "html", or "json"
+        mode: "ascii" (default), "html", "json", or "complexity" to
+            measure the function over a series of input sizes and report
+            its estimated time complexity instead of tracing the call
         show_generic: If True, show generic behavior analysis in addition to specialized patterns
+        backend: Tracer backend - "auto" (default), "settrace" or "monitoring"
+        scope: TraceScope selecting which frames to trace. Defaults to the
+            decorated function plus the rest of its module.
+        track_reads: If True, record exact element reads with opcode-level
+            tracing so DP steps show the values they were computed from.
+        record: Optional path to save the trace to, for replay with
+            ``algo_viz.tracer.recording.open_trace``.
+        profile: If True, also time every traced line and show the source
+            annotated with each line's share of the run time.
+        count_operations: If True, also count every comparison, subscript
+            read and write, and swap exactly, per function and per line.
+        animate: If True, animate the DP table grid on the terminal
+            (ascii mode) instead of printing its final state once.
+        sizes: Input sizes measured in complexity mode (default
+            ``algo_viz.complexity.DEFAULT_SIZES``)
+        make_input: Optional ``make_input(n)`` for complexity mode returning
+            the input of size ``n`` (a tuple of positional arguments, or the
+            single argument); by default the arguments of the call are
+            scaled, see ``algo_viz.complexity.scale_arguments``
     """
+    if mode not in REPORT_MODES + ("complexity",):
+        raise ValueError(
+            f"Unknown mode {mode!r}; expected one of {REPORT_MODES + ('complexity',)}"
+        )
+
     def wrapper(func):
+        @functools.wraps(func)
         def inner(*args, **kwargs):
-            tracer = ExecutionTracer()
-            result, events = tracer.run(func, *args, **kwargs)
-
-            detected_patterns = []
-            
-            # Detect specialized algorithm patterns
-            if detect_recursion(events):
-                detected_patterns.append("Recursion")
-                
-            if detect_sliding_window(events):
-                detected_patterns.append("Sliding Window")
-
-            if detect_two_pointers(events):
-                detected_patterns.append("Two Pointers")
-
-            if detect_dp(events):
-                detected_patterns.append("Dynamic Programming")
-                try:
-                    dp_updates = analyze_dp(events)
-                    if dp_updates:
-                        render_dp(dp_updates)
-                except Exception as e:
-                    pass
-            
-            # Detect generic patterns
-            generic_detector = GenericPatternDetector(events)
-            generic_patterns = generic_detector.get_summary()
-            
-            # Detect specific operations
-            operations = {
-                "loops": {
-                    "for": detect_for_loops(events),
-                    "while": detect_while_loops(events),
-                },
-                "conditionals": detect_if_else(events),
-                "list_operations": detect_list_operations(events),
-                "accumulation": detect_accumulation(events),
-            }
-            
-            if detected_patterns:
-                print("[*] Detected Algorithm Patterns: " + ", ".join(detected_patterns))
-            
-            # Render generic analysis if enabled
-            if show_generic:
-                if mode == "ascii":
-                    # Render in logical order: Summary -> Stats -> Patterns -> Operations -> Variables -> Data Flow
-                    render_behavior_summary(events)
-                    render_execution_stats(events)
-                    
-                    # Show detected patterns
-                    if generic_patterns:
-                        render_pattern_summary(generic_patterns)
-                    
-                    # Show operations performed
-                    if any(operations.values()):
-                        render_operation_summary(operations)
-                    
-                    # Show variable tracking
-                    render_variable_tracking(events)
-                    
-                    # Show data flow
-                    render_data_flow(events)
-
-            if mode == "ascii":
-                # Render specialized visualizations for each pattern
-                if detect_sliding_window(events):
-                    render_sliding_window(events)
-                elif detect_two_pointers(events):
-                    render_two_pointers(events)
-                
-                render(events)
-                if detect_recursion(events):
-                    render_recursion_tree(events)
-            elif mode == "html":
-                render_html(events)
+            if getattr(_active, "tracing", False):
+                return func(*args, **kwargs)
+
+            if mode == "complexity":
+                with tracing():
+                    result = func(*args, **kwargs)
+
+                from .complexity import DEFAULT_SIZES, run_complexity
+
+                report = run_complexity(
+                    func,
+                    sizes if sizes is not None else DEFAULT_SIZES,
+                    make_input,
+                    (args, kwargs),
+                    backend=backend,
+                )
+                report.render()
+                return result
+
+            tracer = ExecutionTracer(
+                backend=backend,
+                scope=scope if scope is not None else TraceScope.for_function(func),
+                track_reads=track_reads,
+                record=record,
+                profile=profile,
+                count_operations=count_operations,
+            )
+            with tracing():
+                result, events = tracer.run(func, *args, **kwargs)
+
+            # Imported on first use so that merely decorating stays cheap
+            from .report import render_report
+
+            render_report(
+                events,
+                mode,
+                show_generic,
+                profile=tracer.profile,
+                operation_counts=tracer.operation_counts,
+                animate=animate,
+            )
 
             return result
+
+        # Lets tools such as the CLI find and trace the undecorated function
+        inner._algo_viz_visualize = True
         return inner
     return wrapper
@@ -0,0 +1,22 @@
+# algo_viz/detectors/coroutines.py
+
+from ..analyzers.pipeline import EventConsumer, feed
+
+
+class CoroutineDetector(EventConsumer):
+    """Generators or coroutines that suspended at least once"""
+
+    event_types = ("suspend",)
+
+    def __init__(self):
+        self.suspensions = 0
+
+    def on_event(self, e):
+        self.suspensions += 1
+
+    def finalize(self):
+        return self.suspensions > 0
+
+
+def detect_coroutines(events):
+    return feed(CoroutineDetector(), events)
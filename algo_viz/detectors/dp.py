@@ -1,32 +1,34 @@
 # algo_viz/detectors/dp.py
 
+from ..analyzers.pipeline import EventConsumer, feed
+
+
+class DPDetector(EventConsumer):
+    event_types = ("var_change",)
+
+    def __init__(self):
+        self.writes = {}
+        self.list_writes = {}
+
+    def on_event(self, e):
+        var_name = e.var_name or ""
+        if "[" in var_name:
+            if getattr(e, "op", None) is not None:
+                # Set membership and removed keys are not table updates
+                return
+            # List index changes are counted per table
+            if isinstance(e.new_value, (int, float)):
+                table = var_name.split("[")[0]
+                self.list_writes[table] = self.list_writes.get(table, 0) + 1
+        elif isinstance(e.old_value, (int, float)) and isinstance(e.new_value, (int, float)):
+            self.writes[var_name] = self.writes.get(var_name, 0) + 1
+
+    def finalize(self):
+        # heuristic: many numeric overwrites OR many list assignments → DP-like
+        return any(count >= 3 for count in self.writes.values()) or any(
+            count >= 3 for count in self.list_writes.values()
+        )
+
+
 def detect_dp(events):
-    writes = {}
-
-    for e in events:
-        if (
-            e.event_type == "var_change"
-            and isinstance(e.old_value, (int, float))
-            and isinstance(e.new_value, (int, float))
-        ):
-            # Skip list index changes - they should be detected separately
-            if "[" in (e.var_name or ""):
-                continue
-            name = e.var_name
-            writes.setdefault(name, 0)
-            writes[name] += 1
-
-    # Also detect if there are many list index assignments
-    list_writes = {}
-    for e in events:
-        if (
-            e.event_type == "var_change"
-            and "[" in (e.var_name or "")
-            and isinstance(e.new_value, (int, float))
-        ):
-            var_name = e.var_name.split("[")[0]
-            list_writes.setdefault(var_name, 0)
-            list_writes[var_name] += 1
-
-    # heuristic: many numeric overwrites OR many list assignments → DP-like
-    return any(count >= 3 for count in writes.values()) or any(count >= 3 for count in list_writes.values())
+    return feed(DPDetector(), events)
@@ -7,27 +7,158 @@ These detectors go beyond specific algorithms to identify general programming pa
 from typing import List, Dict, Set, Any
 from collections import defaultdict
 
+from ..analyzers.pipeline import EventConsumer, feed
+from ..tracer.values import hashable
 
-class GenericPatternDetector:
+
+class GenericPatternDetector(EventConsumer):
     """Detects generic programming patterns in function execution."""
 
-    def __init__(self, events):
+    def __init__(self, events=None):
         self.events = events
         self.patterns = {}
-        self._analyze()
 
-    def _analyze(self):
-        """Analyze events and detect patterns."""
+        # Running state for each pattern family
+        self._var_change_counts = defaultdict(int)
+        self._max_call_depth = 0
+        self._return_depths = defaultdict(int)
+        self._var_paths = defaultdict(set)
+        self._data_structures = {
+            "list_operations": 0,
+            "dict_operations": 0,
+            "set_operations": 0,
+            "string_operations": 0,
+            "detected_types": [],
+        }
+        self._arithmetic = {
+            "numeric_ops": 0,
+            "increment_ops": 0,
+            "decrement_ops": 0,
+            "detected": False,
+        }
+        self._comparison_chains = 0
+        self._values_compared = set()
+        self._mutation_frequency = {}
+        self._call_stack = []
+        self._calls = {
+            "total_calls": 0,
+            "recursive": False,
+            "max_depth": 0,
+            "call_stack": [],
+        }
+        self._transformations = {
+            "type_conversions": 0,
+            "value_transformations": 0,
+            "transformation_pairs": [],
+        }
+
+        if events is not None:
+            feed(self, events)
+
+    def on_event(self, e) -> None:
+        """Update every pattern family with one event."""
+        event_type = e.event_type
+
+        if event_type == "var_change":
+            self._on_var_change(e)
+        elif event_type == "call":
+            self._max_call_depth = max(self._max_call_depth, e.depth or 0)
+
+            call_stack = self._call_stack
+            call_stack.append(e.func_name)
+            self._calls["total_calls"] += 1
+            self._calls["max_depth"] = max(self._calls["max_depth"], len(call_stack))
+
+            # Check for recursion
+            if e.func_name in call_stack[:-1]:
+                self._calls["recursive"] = True
+        elif event_type == "return":
+            self._return_depths[e.depth or 0] += 1
+            if self._call_stack:
+                self._call_stack.pop()
+
+    def _on_var_change(self, e) -> None:
+        var_name = e.var_name
+        old_value = e.old_value
+        new_value = e.new_value
+
+        # Loops: variables that change repeatedly
+        self._var_change_counts[var_name] += 1
+
+        # Conditionals: a variable taking different paths (values may be
+        # lists, e.g. the value of a dict-of-lists key)
+        self._var_paths[var_name].add((hashable(new_value), e.line_no))
+
+        # Data structures
+        ds_patterns = self._data_structures
+        if "[" in (var_name or "") and "]" in (var_name or ""):
+            ds_patterns["list_operations"] += 1
+
+        if isinstance(new_value, list):
+            if "list" not in ds_patterns["detected_types"]:
+                ds_patterns["detected_types"].append("list")
+        elif isinstance(new_value, dict):
+            if "dict" not in ds_patterns["detected_types"]:
+                ds_patterns["detected_types"].append("dict")
+            ds_patterns["dict_operations"] += 1
+        elif isinstance(new_value, set):
+            if "set" not in ds_patterns["detected_types"]:
+                ds_patterns["detected_types"].append("set")
+            ds_patterns["set_operations"] += 1
+        elif isinstance(new_value, str):
+            if "string" not in ds_patterns["detected_types"]:
+                ds_patterns["detected_types"].append("string")
+            ds_patterns["string_operations"] += 1
+
+        # Arithmetic
+        if isinstance(old_value, (int, float)) and isinstance(new_value, (int, float)):
+            self._arithmetic["numeric_ops"] += 1
+
+            delta = new_value - old_value
+            if delta == 1:
+                self._arithmetic["increment_ops"] += 1
+            elif delta == -1:
+                self._arithmetic["decrement_ops"] += 1
+
+        # Comparisons
+        if isinstance(new_value, bool):
+            self._comparison_chains += 1
+        self._values_compared.add(hashable(new_value))
+
+        # Mutations
+        self._mutation_frequency[var_name] = self._mutation_frequency.get(var_name, 0) + 1
+
+        # Data transformations
+        old_type = type(old_value).__name__
+        new_type = type(new_value).__name__
+        if old_type != new_type:
+            self._transformations["type_conversions"] += 1
+            self._transformations["transformation_pairs"].append((old_type, new_type))
+
+        # Any significant value change
+        if old_value != new_value:
+            self._transformations["value_transformations"] += 1
+
+    def finalize(self) -> Dict[str, Any]:
+        """Turn the running state into the pattern dictionaries."""
         self.patterns = {
             "loops": self._detect_loops(),
             "conditionals": self._detect_conditionals(),
-            "data_structures": self._detect_data_structures(),
+            "data_structures": self._data_structures,
             "arithmetic": self._detect_arithmetic_operations(),
-            "comparisons": self._detect_comparisons(),
-            "variable_mutations": self._detect_mutations(),
-            "function_calls": self._detect_function_calls(),
-            "data_transformations": self._detect_data_transformations(),
+            "comparisons": {
+                "comparison_chains": self._comparison_chains,
+                "values_compared": len(self._values_compared),
+            },
+            "variable_mutations": {
+                "total_mutations": sum(self._mutation_frequency.values()),
+                "mutated_vars": list(self._mutation_frequency),
+                "mutation_frequency": self._mutation_frequency,
+            },
+            "function_calls": self._calls,
+            "data_transformations": self._transformations,
         }
+        return self.get_summary()
 
     def _detect_loops(self) -> Dict[str, Any]:
         """Detect loop-like behavior: repeated variable changes at same depth."""
@@ -37,24 +168,16 @@ class GenericPatternDetector:
             "iteration_count": 0,
         }
 
-        # Track when variables change repeatedly
-        var_change_sequences = defaultdict(list)
-
-        for e in self.events:
-            if e.event_type == "var_change":
-                var_change_sequences[e.var_name].append(e)
-
         # Variables that change multiple times suggest loops
         loop_vars = [
-            var for var, changes in var_change_sequences.items() if len(changes) > 2
+            var for var, count in self._var_change_counts.items() if count > 2
         ]
 
         if loop_vars:
             loop_patterns["detected"] = True
             loop_patterns["loop_vars"] = loop_vars
             # Count approximate iterations by looking at loop variable changes
-            if loop_vars:
-                loop_patterns["iteration_count"] = len(var_change_sequences[loop_vars[0]])
+            loop_patterns["iteration_count"] = self._var_change_counts[loop_vars[0]]
 
         return loop_patterns
 
@@ -68,14 +191,9 @@ class GenericPatternDetector:
         }
 
         # Count early returns (returns not at max depth)
-        max_depth = 0
-        for e in self.events:
-            if e.event_type == "call":
-                max_depth = max(max_depth, e.depth or 0)
-
         early_returns = sum(
-            1 for e in self.events
-            if e.event_type == "return" and (e.depth or 0) < max_depth
+            count for depth, count in self._return_depths.items()
+            if depth < self._max_call_depth
         )
 
         if early_returns > 0:
@@ -84,171 +202,20 @@ class GenericPatternDetector:
             conditional_patterns["has_branches"] = True
 
         # Also detect variable divergence - when a variable can take different paths
-        var_paths = defaultdict(set)
-        for e in self.events:
-            if e.event_type == "var_change":
-                var_paths[e.var_name].add((e.new_value, e.line_no))
-
-        branches = sum(1 for vars_set in var_paths.values() if len(vars_set) > 1)
+        branches = sum(1 for vars_set in self._var_paths.values() if len(vars_set) > 1)
         if branches > 0:
             conditional_patterns["detected"] = True
             conditional_patterns["branches"] = branches
 
         return conditional_patterns
 
-    def _detect_data_structures(self) -> Dict[str, Any]:
-        """Detect use of different data structures."""
-        ds_patterns = {
-            "list_operations": 0,
-            "dict_operations": 0,
-            "set_operations": 0,
-            "string_operations": 0,
-            "detected_types": [],
-        }
-
-        for e in self.events:
-            if e.event_type == "var_change":
-                # Check for list operations
-                if "[" in (e.var_name or "") and "]" in (e.var_name or ""):
-                    ds_patterns["list_operations"] += 1
-
-                # Check types in events
-                if isinstance(e.new_value, list):
-                    if "list" not in ds_patterns["detected_types"]:
-                        ds_patterns["detected_types"].append("list")
-                elif isinstance(e.new_value, dict):
-                    if "dict" not in ds_patterns["detected_types"]:
-                        ds_patterns["detected_types"].append("dict")
-                    ds_patterns["dict_operations"] += 1
-                elif isinstance(e.new_value, set):
-                    if "set" not in ds_patterns["detected_types"]:
-                        ds_patterns["detected_types"].append("set")
-                    ds_patterns["set_operations"] += 1
-                elif isinstance(e.new_value, str):
-                    if "string" not in ds_patterns["detected_types"]:
-                        ds_patterns["detected_types"].append("string")
-                    ds_patterns["string_operations"] += 1
-
-        return ds_patterns
-
     def _detect_arithmetic_operations(self) -> Dict[str, Any]:
         """Detect arithmetic and numeric operations."""
-        arith_patterns = {
-            "numeric_ops": 0,
-            "increment_ops": 0,
-            "decrement_ops": 0,
-            "detected": False,
-        }
-
-        for e in self.events:
-            if e.event_type == "var_change":
-                if isinstance(e.old_value, (int, float)) and isinstance(
-                    e.new_value, (int, float)
-                ):
-                    arith_patterns["numeric_ops"] += 1
-
-                    delta = e.new_value - e.old_value
-                    if delta == 1:
-                        arith_patterns["increment_ops"] += 1
-                    elif delta == -1:
-                        arith_patterns["decrement_ops"] += 1
-
+        arith_patterns = self._arithmetic
         if arith_patterns["numeric_ops"] > 0:
             arith_patterns["detected"] = True
-
         return arith_patterns
 
-    def _detect_comparisons(self) -> Dict[str, Any]:
-        """Detect comparison operations via variable changes."""
-        comp_patterns = {
-            "comparison_chains": 0,
-            "values_compared": set(),
-        }
-
-        # Track sequences of comparisons
-        for e in self.events:
-            if e.event_type == "var_change":
-                if isinstance(e.new_value, bool):
-                    comp_patterns["comparison_chains"] += 1
-                # Track all values involved in changes
-                comp_patterns["values_compared"].add(e.new_value)
-
-        comp_patterns["values_compared"] = len(comp_patterns["values_compared"])
-        return comp_patterns
-
-    def _detect_mutations(self) -> Dict[str, Any]:
-        """Detect variable mutations and state changes."""
-        mutation_patterns = {
-            "total_mutations": 0,
-            "mutated_vars": set(),
-            "mutation_frequency": {},
-        }
-
-        for e in self.events:
-            if e.event_type == "var_change":
-                mutation_patterns["total_mutations"] += 1
-                mutation_patterns["mutated_vars"].add(e.var_name)
-
-                mutation_patterns["mutation_frequency"][e.var_name] = (
-                    mutation_patterns["mutation_frequency"].get(e.var_name, 0) + 1
-                )
-
-        mutation_patterns["mutated_vars"] = list(mutation_patterns["mutated_vars"])
-        return mutation_patterns
-
-    def _detect_function_calls(self) -> Dict[str, Any]:
-        """Detect recursive and nested function calls."""
-        call_patterns = {
-            "total_calls": 0,
-            "recursive": False,
-            "max_depth": 0,
-            "call_stack": [],
-        }
-
-        call_stack = []
-        max_depth = 0
-
-        for e in self.events:
-            if e.event_type == "call":
-                call_stack.append(e.func_name)
-                call_patterns["total_calls"] += 1
-                max_depth = max(max_depth, len(call_stack))
-
-                # Check for recursion
-                if e.func_name in call_stack[:-1]:
-                    call_patterns["recursive"] = True
-
-            elif e.event_type == "return" and call_stack:
-                call_stack.pop()
-
-        call_patterns["max_depth"] = max_depth
-        return call_patterns
-
-    def _detect_data_transformations(self) -> Dict[str, Any]:
-        """Detect transformations of data types and values."""
-        transform_patterns = {
-            "type_conversions": 0,
-            "value_transformations": 0,
-            "transformation_pairs": [],
-        }
-
-        for e in self.events:
-            if e.event_type == "var_change":
-                old_type = type(e.old_value).__name__
-                new_type = type(e.new_value).__name__
-
-                if old_type != new_type:
-                    transform_patterns["type_conversions"] += 1
-                    transform_patterns["transformation_pairs"].append(
-                        (old_type, new_type)
-                    )
-
-                # Any significant value change
-                if e.old_value != e.new_value:
-                    transform_patterns["value_transformations"] += 1
-
-        return transform_patterns
-
     def get_summary(self) -> Dict[str, Any]:
         """Get a human-readable summary of detected patterns."""
         summary = {}
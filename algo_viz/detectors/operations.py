@@ -6,37 +6,53 @@ Detectors for specific operations like loops, conditionals, and data structure m
 from typing import List, Dict, Set, Any
 from collections import defaultdict
 
+from ..analyzers.pipeline import EventConsumer, feed
 
-def detect_for_loops(events) -> bool:
+
+class ForLoopDetector(EventConsumer):
     """Detect for loop patterns through repeated variable increments."""
-    increment_sequences = defaultdict(list)
 
-    for e in events:
-        if (
-            e.event_type == "var_change"
-            and isinstance(e.old_value, int)
-            and isinstance(e.new_value, int)
-        ):
+    event_types = ("var_change",)
+
+    def __init__(self):
+        self.increment_counts = defaultdict(int)
+
+    def on_event(self, e) -> None:
+        if isinstance(e.old_value, int) and isinstance(e.new_value, int):
             if e.new_value - e.old_value == 1:
-                increment_sequences[e.var_name].append(e)
+                self.increment_counts[e.var_name] += 1
 
-    # If any variable increments by 1 multiple times, it's likely a loop counter
-    return any(len(seq) >= 2 for seq in increment_sequences.values())
+    def finalize(self) -> bool:
+        # If any variable increments by 1 multiple times, it's likely a loop counter
+        return any(count >= 2 for count in self.increment_counts.values())
 
 
-def detect_while_loops(events) -> bool:
+def detect_for_loops(events) -> bool:
+    """Detect for loop patterns through repeated variable increments."""
+    return feed(ForLoopDetector(), events)
+
+
+class WhileLoopDetector(EventConsumer):
     """Detect while loop patterns through repeated conditional changes."""
-    # While loops typically have repeated condition evaluations
-    # This is detected through repeated variable changes without clear loop variable
-    var_change_counts = defaultdict(int)
 
-    for e in events:
-        if e.event_type == "var_change":
-            var_change_counts[e.var_name] += 1
+    event_types = ("var_change",)
 
-    # Multiple variables changing repeatedly suggests while loop
-    multi_var_changes = sum(1 for count in var_change_counts.values() if count > 2)
-    return multi_var_changes >= 2
+    def __init__(self):
+        self.var_change_counts = defaultdict(int)
+
+    def on_event(self, e) -> None:
+        self.var_change_counts[e.var_name] += 1
+
+    def finalize(self) -> bool:
+        # While loops typically have repeated condition evaluations
+        # This is detected through repeated variable changes without clear loop variable
+        multi_var_changes = sum(1 for count in self.var_change_counts.values() if count > 2)
+        return multi_var_changes >= 2
+
+
+def detect_while_loops(events) -> bool:
+    """Detect while loop patterns through repeated conditional changes."""
+    return feed(WhileLoopDetector(), events)
 
 
 def detect_nested_loops(events) -> Dict[str, Any]:
@@ -64,59 +80,85 @@ def detect_nested_loops(events) -> Dict[str, Any]:
     return nested_info
 
 
-def detect_if_else(events) -> Dict[str, Any]:
+class IfElseDetector(EventConsumer):
     """Detect if/else conditional patterns."""
-    if_else_info = {
-        "detected": False,
-        "branches": 0,
-        "has_else": False,
-    }
 
-    # Look for early returns or variable divergence
-    max_depth = 0
-    for e in events:
-        if e.event_type == "call":
-            max_depth = max(max_depth, e.depth or 0)
+    event_types = ("return",)
 
-    # Count returns at different depths
-    return_depths = defaultdict(int)
-    for e in events:
-        if e.event_type == "return":
-            return_depths[e.depth or 0] += 1
+    def __init__(self):
+        self.return_depths = defaultdict(int)
 
-    if len(return_depths) > 1:
-        if_else_info["detected"] = True
-        if_else_info["branches"] = len(return_depths)
-        if_else_info["has_else"] = True
+    def on_event(self, e) -> None:
+        # Count returns at different depths
+        self.return_depths[e.depth or 0] += 1
 
-    return if_else_info
+    def finalize(self) -> Dict[str, Any]:
+        if_else_info = {
+            "detected": False,
+            "branches": 0,
+            "has_else": False,
+        }
 
+        if len(self.return_depths) > 1:
+            if_else_info["detected"] = True
+            if_else_info["branches"] = len(self.return_depths)
+            if_else_info["has_else"] = True
 
-def detect_list_operations(events) -> Dict[str, Any]:
-    """Detect list manipulation operations."""
-    list_ops = {
-        "read_count": 0,
-        "write_count": 0,
-        "accessed_lists": set(),
-        "operations": [],
-    }
-
-    for e in events:
-        if e.event_type == "var_change":
-            if "[" in (e.var_name or "") and "]" in (e.var_name or ""):
-                list_name = e.var_name.split("[")[0]
-                list_ops["accessed_lists"].add(list_name)
+        return if_else_info
 
-                # Distinguish reads vs writes based on value changes
-                if e.old_value != e.new_value:
-                    list_ops["write_count"] += 1
-                    list_ops["operations"].append(("write", list_name))
-                else:
-                    list_ops["read_count"] += 1
-                    list_ops["operations"].append(("read", list_name))
 
-    list_ops["accessed_lists"] = list(list_ops["accessed_lists"])
-    return list_ops
+def detect_if_else(events) -> Dict[str, Any]:
+    """Detect if/else conditional patterns."""
+    return feed(IfElseDetector(), events)
+
+
+class ListOperationsDetector(EventConsumer):
+    """
+    Detect list manipulation operations.
+
+    Writes are the element changes of the trace and reads its "read" events
+    (traced with track_reads). With the run's OperationCounts the totals are
+    the exact counts instead, reads the tracer could not resolve included.
+    """
+
+    event_types = ("var_change", "read")
+
+    def __init__(self, operation_counts=None):
+        self.operation_counts = operation_counts
+        self.list_ops = {
+            "read_count": 0,
+            "write_count": 0,
+            "accessed_lists": set(),
+            "operations": [],
+        }
+
+    def on_event(self, e) -> None:
+        var_name = e.var_name or ""
+        if "[" in var_name and "]" in var_name:
+            list_ops = self.list_ops
+            list_name = var_name.split("[")[0]
+            list_ops["accessed_lists"].add(list_name)
+
+            if e.event_type == "read":
+                list_ops["read_count"] += 1
+                list_ops["operations"].append(("read", list_name))
+            else:
+                list_ops["write_count"] += 1
+                list_ops["operations"].append(("write", list_name))
+
+    def finalize(self) -> Dict[str, Any]:
+        list_ops = dict(self.list_ops)
+        list_ops["accessed_lists"] = list(list_ops["accessed_lists"])
+        if self.operation_counts is not None:
+            total = self.operation_counts.total()
+            list_ops["read_count"] = total.reads
+            list_ops["write_count"] = total.writes
+        return list_ops
+
+
+def detect_list_operations(events, operation_counts=None) -> Dict[str, Any]:
+    """Detect list manipulation operations."""
+    return feed(ListOperationsDetector(operation_counts), events)
 
 
 def detect_dict_operations(events) -> Dict[str, Any]:
@@ -169,40 +211,46 @@ def detect_string_operations(events) -> Dict[str, Any]:
     return string_ops
 
 
-def detect_accumulation(events) -> Dict[str, Any]:
+class AccumulationDetector(EventConsumer):
     """Detect accumulation patterns (sum, product, etc.)."""
-    accumulation = {
-        "detected": False,
-        "accumulator_vars": [],
-        "operations_count": 0,
-    }
 
-    var_operations = defaultdict(list)
+    event_types = ("var_change",)
 
-    for e in events:
-        if (
-            e.event_type == "var_change"
-            and isinstance(e.old_value, (int, float))
-            and isinstance(e.new_value, (int, float))
-        ):
-            var_operations[e.var_name].append((e.old_value, e.new_value))
-
-    # Look for variables that grow or shrink monotonically
-    for var, operations in var_operations.items():
-        if len(operations) > 1:
-            # Check if it's accumulating (always increasing or always decreasing)
-            is_accumulating = True
-            for i in range(1, len(operations)):
-                if operations[i][1] <= operations[i - 1][1]:
-                    is_accumulating = False
-                    break
-
-            if is_accumulating:
-                accumulation["detected"] = True
-                accumulation["accumulator_vars"].append(var)
-                accumulation["operations_count"] += len(operations)
-
-    return accumulation
+    def __init__(self):
+        self.var_operations = defaultdict(list)
+
+    def on_event(self, e) -> None:
+        if isinstance(e.old_value, (int, float)) and isinstance(e.new_value, (int, float)):
+            self.var_operations[e.var_name].append((e.old_value, e.new_value))
+
+    def finalize(self) -> Dict[str, Any]:
+        accumulation = {
+            "detected": False,
+            "accumulator_vars": [],
+            "operations_count": 0,
+        }
+
+        # Look for variables that grow or shrink monotonically
+        for var, operations in self.var_operations.items():
+            if len(operations) > 1:
+                # Check if it's accumulating (always increasing or always decreasing)
+                is_accumulating = True
+                for i in range(1, len(operations)):
+                    if operations[i][1] <= operations[i - 1][1]:
+                        is_accumulating = False
+                        break
+
+                if is_accumulating:
+                    accumulation["detected"] = True
+                    accumulation["accumulator_vars"].append(var)
+                    accumulation["operations_count"] += len(operations)
+
+        return accumulation
+
+
+def detect_accumulation(events) -> Dict[str, Any]:
+    """Detect accumulation patterns (sum, product, etc.)."""
+    return feed(AccumulationDetector(), events)
 
 
 def detect_search_pattern(events) -> Dict[str, Any]:
@@ -232,8 +280,13 @@ def detect_search_pattern(events) -> Dict[str, Any]:
     return search
 
 
-def detect_sorting_pattern(events) -> Dict[str, Any]:
-    """Detect sorting-like patterns through repeated swaps and comparisons."""
+def detect_sorting_pattern(events, operation_counts=None) -> Dict[str, Any]:
+    """
+    Detect sorting-like patterns through repeated swaps and comparisons.
+
+    Swaps are two element changes on one line that exchange their values;
+    with the run's OperationCounts, swaps and comparisons are the exact counts.
+    """
     sorting = {
         "detected": False,
         "swap_count": 0,
@@ -242,14 +295,33 @@ def detect_sorting_pattern(events) -> Dict[str, Any]:
 
     # Look for patterns of repeated element exchanges
     list_changes = defaultdict(int)
+    swaps = 0
+    previous = None
 
     for e in events:
         if e.event_type == "var_change" and "[" in (e.var_name or ""):
             list_changes[e.var_name] += 1
+            if (
+                previous is not None
+                and previous.line_no == e.line_no
+                and previous.old_value == e.new_value
+                and previous.new_value == e.old_value
+            ):
+                swaps += 1
+                previous = None
+            else:
+                previous = e
+        else:
+            previous = None
+
+    if operation_counts is not None:
+        total = operation_counts.total()
+        swaps = total.swaps
+        sorting["comparison_count"] = total.comparisons
+    sorting["swap_count"] = swaps
 
     # Many list index changes suggest sorting
     if any(count > 5 for count in list_changes.values()):
         sorting["detected"] = True
-        sorting["swap_count"] = sum(list_changes.values()) // 2
 
     return sorting
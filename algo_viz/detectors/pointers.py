@@ -1,17 +1,31 @@
 # algo_viz/detectors/pointers.py
 
-def detect_two_pointers(events):
-    pointer_moves = {}
+from ..analyzers.pipeline import EventConsumer, feed
+
+
+class TwoPointersDetector(EventConsumer):
+    event_types = ("var_change",)
+
+    def __init__(self):
+        self.pointer_moves = {}
 
-    for e in events:
-        if e.event_type == "var_change" and isinstance(e.old_value, int):
+    def on_event(self, e):
+        # Pointers are plain locals; element writes (dp[i], counts[k]) never are
+        if "[" in (e.var_name or ""):
+            return
+        if isinstance(e.old_value, int):
             delta = e.new_value - e.old_value
             if abs(delta) == 1:
-                pointer_moves.setdefault(e.var_name, []).append(delta)
+                self.pointer_moves.setdefault(e.var_name, []).append(delta)
 
-    pointers = [
-        var for var, moves in pointer_moves.items()
-        if all(d > 0 for d in moves) or all(d < 0 for d in moves)
-    ]
+    def finalize(self):
+        pointers = [
+            var for var, moves in self.pointer_moves.items()
+            if all(d > 0 for d in moves) or all(d < 0 for d in moves)
+        ]
 
-    return len(pointers) >= 2
+        return len(pointers) >= 2
+
+
+def detect_two_pointers(events):
+    return feed(TwoPointersDetector(), events)
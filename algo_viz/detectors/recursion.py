@@ -1,14 +1,25 @@
 # algo_viz/detectors/recursion.py
 
-def detect_recursion(events):
-    call_depth = 0
-    max_depth = 0
+from ..analyzers.pipeline import EventConsumer, feed
+
+
+class RecursionDetector(EventConsumer):
+    event_types = ("call", "return")
+
+    def __init__(self):
+        self.call_depth = 0
+        self.max_depth = 0
 
-    for e in events:
+    def on_event(self, e):
         if e.event_type == "call":
-            call_depth += 1
-            max_depth = max(max_depth, call_depth)
-        elif e.event_type == "return":
-            call_depth -= 1
+            self.call_depth += 1
+            self.max_depth = max(self.max_depth, self.call_depth)
+        else:
+            self.call_depth -= 1
 
-    return max_depth > 1
+    def finalize(self):
+        return self.max_depth > 1
+
+
+def detect_recursion(events):
+    return feed(RecursionDetector(), events)
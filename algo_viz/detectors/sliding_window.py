@@ -1,22 +1,33 @@
 # algo_viz/detectors/sliding_window.py
 
-def detect_sliding_window(events):
-    moves = {}
-
-    for e in events:
-        if (
-            e.event_type == "var_change"
-            and isinstance(e.old_value, int)
-            and isinstance(e.new_value, int)
-        ):
+from ..analyzers.pipeline import EventConsumer, feed
+
+
+class SlidingWindowDetector(EventConsumer):
+    event_types = ("var_change",)
+
+    def __init__(self):
+        self.moves = {}
+
+    def on_event(self, e):
+        # Window bounds are plain locals; element writes (counts[k]) never are
+        if "[" in (e.var_name or ""):
+            return
+        if isinstance(e.old_value, int) and isinstance(e.new_value, int):
             delta = e.new_value - e.old_value
             if abs(delta) == 1:
-                moves.setdefault(e.var_name, []).append(delta)
+                self.moves.setdefault(e.var_name, []).append(delta)
+
+    def finalize(self):
+        moves = self.moves
+        if len(moves) < 2:
+            return False
 
-    if len(moves) < 2:
-        return False
+        expanding = any(all(d > 0 for d in deltas) for deltas in moves.values())
+        shrinking = any(any(d < 0 for d in deltas) for deltas in moves.values())
 
-    expanding = any(all(d > 0 for d in deltas) for deltas in moves.values())
-    shrinking = any(any(d < 0 for d in deltas) for deltas in moves.values())
+        return expanding and shrinking
 
-    return expanding and shrinking
+
+def detect_sliding_window(events):
+    return feed(SlidingWindowDetector(), events)
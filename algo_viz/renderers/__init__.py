@@ -0,0 +1,4 @@
+# algo_viz/renderers/__init__.py
+
+# Output formats understood by visualize() and the CLI
+REPORT_MODES = ("ascii", "html", "json")
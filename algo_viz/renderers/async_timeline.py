@@ -0,0 +1,62 @@
+# algo_viz/renderers/async_timeline.py
+
+import reprlib
+
+LANE_WIDTH = 20
+
+_repr = reprlib.Repr()
+_repr.maxstring = 10
+_repr.maxother = 10
+
+_MARKERS = {
+    "call": "[+] start",
+    "resume": "[>] resume",
+    "suspend": "[=] yield",
+    "return": "[-] return",
+}
+
+
+def _lane_label(e):
+    task = getattr(e, "task", None)
+    label = f"{e.func_name}#{e.frame_id}"
+    return f"{task}:{label}" if task else label
+
+
+def render_async_timeline(events):
+    """One column per generator/coroutine frame, one row per start/resume/suspend/finish"""
+    lanes = {}
+    steps = []
+    for e in events:
+        if e.event_type not in _MARKERS or getattr(e, "frame_id", None) is None:
+            continue
+        if e.frame_id not in lanes:
+            lanes[e.frame_id] = _lane_label(e)
+        if e.event_type in ("suspend", "return"):
+            detail = _repr.repr(e.new_value)
+        else:
+            detail = f"L{e.line_no}"
+        steps.append((e.frame_id, e.event_type, f"{_MARKERS[e.event_type]} {detail}"))
+
+    if not steps:
+        return
+
+    print("\n[*] Coroutine Timeline")
+    print("-" * 60)
+    order = list(lanes)
+    header = "".join(lanes[lane][:LANE_WIDTH - 1].ljust(LANE_WIDTH) for lane in order)
+    print("        | " + header.rstrip())
+
+    alive = set()
+    for i, (frame_id, event_type, text) in enumerate(steps, 1):
+        if event_type == "call":
+            alive.add(frame_id)
+        cells = []
+        for lane in order:
+            if lane == frame_id:
+                cell = text[:LANE_WIDTH - 1]
+            else:
+                cell = "|" if lane in alive else ""
+            cells.append(cell.ljust(LANE_WIDTH))
+        print(f"Step {i:02d} | " + "".join(cells).rstrip())
+        if event_type == "return":
+            alive.discard(frame_id)
@@ -0,0 +1,481 @@
+# algo_viz/renderers/dp.py
+"""
+DP table grids.
+
+The table is rebuilt from the DP update stream (seeded with the value the
+table was first bound to, when the trace has it) and drawn as a grid with
+the written cell and the cells it read highlighted. Between two updates only
+the cells whose text or highlight changed are redrawn: with ANSI cursor
+moves on a terminal, and as diff frames replayed by a small inline viewer in
+HTML. Large tables are shown through a viewport that follows the writes, so
+the cost of a step is bounded by what changed, not by the table size.
+"""
+
+import json
+import shutil
+import sys
+import time
+
+# Widest cell text; longer values are elided
+CELL_WIDTH = 8
+
+# Viewport used when the output is not a terminal
+MAX_ROWS = 20
+MAX_COLS = 12
+
+# A terminal animation lasts about this long and shows at most MAX_FRAMES
+# frames, however many updates there are
+ANIMATION_SECONDS = 5.0
+FRAME_DELAY = 0.05
+MAX_FRAMES = 300
+
+_WRITE = "\x1b[1;7m"
+_READ = "\x1b[36;4m"
+_RESET = "\x1b[0m"
+
+
+def parse_cell(index):
+    """Grid coordinates of an update's index text ("3" -> (0, 3), "2][3" -> (2, 3)), or None"""
+    if not isinstance(index, str):
+        return None
+    row, nested, col = index.partition("][")
+    try:
+        cell = (int(row), int(col)) if nested else (0, int(row))
+    except ValueError:
+        # Keys that are not integers, or a third dimension
+        return None
+    return cell if cell[0] >= 0 and cell[1] >= 0 else None
+
+
+def _read_cell(indices):
+    if len(indices) == 1:
+        return (0, indices[0])
+    if len(indices) == 2:
+        return tuple(indices)
+    return None
+
+
+def _text(value):
+    text = "" if value is None else str(value)
+    return text if len(text) <= CELL_WIDTH else text[:CELL_WIDTH - 1] + "…"
+
+
+def initial_tables(events, names):
+    """
+    Contents of each table in ``names`` before its first element write.
+
+    Taken from the locals snapshot of that first write, with the written
+    cell put back to its old value; a plain ``name = [...]`` binding seen
+    earlier is used when the trace has no snapshots. Stops once all are found.
+    """
+    found = {}
+    for e in events:
+        if e.event_type != "var_change" or not e.var_name:
+            continue
+        name, _, index = e.var_name.partition("[")
+        if name not in names or name in found:
+            continue
+        if not index:
+            if isinstance(e.new_value, list):
+                found[name] = DPGrid(name, e.new_value)
+        else:
+            snapshot = getattr(e, "locals_snapshot", None) or {}
+            table = snapshot.get(name)
+            if not isinstance(table, list):
+                continue
+            grid = found[name] = DPGrid(name, table)
+            cell = parse_cell(index[:-1])
+            if cell is not None:
+                grid.set(cell, e.old_value)
+        if len(found) == len(names):
+            break
+    return found
+
+
+class DPGrid:
+    """Cell texts of one table, rebuilt update by update"""
+
+    def __init__(self, name, initial=None):
+        self.name = name
+        self.cells = {}
+        self.rows = 0
+        self.cols = 0
+        if isinstance(initial, list):
+            nested = any(isinstance(row, list) for row in initial)
+            for i, row in enumerate(initial):
+                if nested and isinstance(row, list):
+                    for j, value in enumerate(row):
+                        self.cells[(i, j)] = _text(value)
+                elif not nested:
+                    self.cells[(0, i)] = _text(row)
+            if self.cells:
+                self.rows = 1 + max(i for i, _ in self.cells)
+                self.cols = 1 + max(j for _, j in self.cells)
+
+    def get(self, cell):
+        return self.cells.get(cell, "")
+
+    def set(self, cell, value):
+        """Store ``value`` at ``cell``; returns the previous text"""
+        old = self.cells.get(cell, "")
+        self.cells[cell] = _text(value)
+        self.rows = max(self.rows, cell[0] + 1)
+        self.cols = max(self.cols, cell[1] + 1)
+        return old
+
+
+def dp_frames(dp_updates, table):
+    """
+    Yield one diff frame per update of ``table``:
+    (cell, value, cells read from ``table``), in update order.
+    """
+    for update in dp_updates:
+        if update.table != table:
+            continue
+        cell = parse_cell(update.index)
+        if cell is None:
+            continue
+        reads = []
+        for read_table, indices, _, _ in update.reads:
+            if read_table == table:
+                read = _read_cell(indices)
+                if read is not None:
+                    reads.append(read)
+        yield cell, update.result, reads
+
+
+def _main_table(dp_updates):
+    counts = {}
+    for update in dp_updates:
+        counts[update.table] = counts.get(update.table, 0) + 1
+    return max(counts, key=counts.get) if counts else None
+
+
+class _Viewport:
+    """The rows and columns of the grid on screen, moved to keep the written cell in view"""
+
+    def __init__(self, grid, rows, cols):
+        self.rows = min(rows, grid.rows)
+        self.cols = min(cols, grid.cols)
+        self.max_top = grid.rows - self.rows
+        self.max_left = grid.cols - self.cols
+        self.top = 0
+        self.left = 0
+
+    def follow(self, cell):
+        """Scroll so that ``cell`` is visible; returns True if the viewport moved"""
+        top, left = self.top, self.left
+        if not top <= cell[0] < top + self.rows:
+            self.top = min(self.max_top, max(0, cell[0] - self.rows // 2))
+        if not left <= cell[1] < left + self.cols:
+            self.left = min(self.max_left, max(0, cell[1] - self.cols // 2))
+        return (top, left) != (self.top, self.left)
+
+    def __contains__(self, cell):
+        return self.top <= cell[0] < self.top + self.rows and self.left <= cell[1] < self.left + self.cols
+
+
+class _GridPrinter:
+    """Text layout of a grid viewport: a header line, then one line per row"""
+
+    def __init__(self, grid, viewport, width, ansi):
+        self.grid = grid
+        self.viewport = viewport
+        self.width = width
+        self.ansi = ansi
+        # 1D tables are a single unlabeled row
+        self.label_width = len(str(grid.rows - 1)) + 1 if grid.rows > 1 else 0
+
+    def cell_text(self, cell, mark=None):
+        text = self.grid.get(cell).rjust(self.width)
+        if self.ansi:
+            if mark == "write":
+                return f" {_WRITE}{text}{_RESET} "
+            if mark == "read":
+                return f" {_READ}{text}{_RESET} "
+            return f" {text} "
+        if mark == "write":
+            return f"[{text}]"
+        if mark == "read":
+            return f"({text})"
+        return f" {text} "
+
+    def column(self, col):
+        """Screen column (1-based) where the cell text of ``col`` starts"""
+        return self.label_width + 1 + (col - self.viewport.left) * (self.width + 2)
+
+    def lines(self, marks):
+        view = self.viewport
+        cols = range(view.left, view.left + view.cols)
+        rows = range(view.top, view.top + view.rows)
+        yield " " * self.label_width + "".join(f" {str(col).rjust(self.width)} " for col in cols)
+        for row in rows:
+            label = f"{row} ".rjust(self.label_width) if self.label_width else ""
+            yield label + "".join(self.cell_text((row, col), marks.get((row, col))) for col in cols)
+
+    def height(self):
+        return 1 + self.viewport.rows
+
+
+def render_dp_grid(dp_updates, events=None, stream=None, animate=False):
+    """
+    Draw the most updated DP table as a grid.
+
+    With ``animate=True`` the grid is animated on ``stream`` (a terminal):
+    each update rewrites only the cells whose value or highlight changed,
+    using ANSI cursor moves, for up to ANIMATION_SECONDS. Otherwise the final
+    state is printed once, with the last written cell in [brackets] and the
+    cells it read in (parentheses).
+    ``events`` seeds the grid with the table's initial contents.
+    """
+    table = _main_table(dp_updates)
+    if table is None:
+        return
+    if stream is None:
+        stream = sys.stdout
+    frames = list(dp_frames(dp_updates, table))
+    if not frames:
+        return
+
+    grid = initial_tables(events, {table}).get(table) if events is not None else None
+    if grid is None:
+        grid = DPGrid(table)
+    for cell, _, _ in frames:
+        grid.rows = max(grid.rows, cell[0] + 1)
+        grid.cols = max(grid.cols, cell[1] + 1)
+    width = max(
+        [1]
+        + [len(text) for text in grid.cells.values()]
+        + [len(_text(value)) for _, value, _ in frames]
+        + [len(str(grid.rows - 1)), len(str(grid.cols - 1))]
+    )
+
+    shape = f" ({grid.rows}×{grid.cols})" if grid.rows > 1 else ""
+    stream.write(f"\n[*] DP Table: {table}{shape}\n")
+    stream.write("-" * 60 + "\n")
+
+    if animate:
+        size = shutil.get_terminal_size()
+        viewport = _Viewport(
+            grid,
+            max(1, size.lines - 6),
+            max(1, (size.columns - len(str(grid.rows)) - 2) // (width + 2)),
+        )
+        _animate(grid, frames, viewport, width, stream)
+        return
+
+    for cell, value, _ in frames:
+        grid.set(cell, value)
+    last_cell, _, last_reads = frames[-1]
+    viewport = _Viewport(grid, MAX_ROWS, MAX_COLS)
+    viewport.follow(last_cell)
+    marks = {read: "read" for read in last_reads}
+    marks[last_cell] = "write"
+    for line in _GridPrinter(grid, viewport, width, ansi=False).lines(marks):
+        stream.write(line.rstrip() + "\n")
+    if grid.rows > viewport.rows or grid.cols > viewport.cols:
+        stream.write(
+            f"(rows {viewport.top}-{viewport.top + viewport.rows - 1}, "
+            f"columns {viewport.left}-{viewport.left + viewport.cols - 1} shown)\n"
+        )
+
+
+def _animate(grid, frames, viewport, width, stream):
+    printer = _GridPrinter(grid, viewport, width, ansi=True)
+    write = stream.write
+    marks = {}
+
+    def draw():
+        for line in printer.lines(marks):
+            write("\x1b[2K" + line + "\n")
+
+    def redraw(cell):
+        # From the line below the grid: up to the cell's row, over to its column
+        up = printer.height() - 1 - (cell[0] - viewport.top)
+        write(f"\x1b[{up}A\x1b[{printer.column(cell[1])}G{printer.cell_text(cell, marks.get(cell))}\x1b[{up}B\r")
+
+    draw()
+    height = printer.height()
+    # Beyond MAX_FRAMES updates, only every stride-th one is shown; the
+    # cells written in between are flushed with it
+    stride = -(-len(frames) // MAX_FRAMES)
+    delay = min(FRAME_DELAY, ANIMATION_SECONDS * stride / len(frames))
+    dirty = set()
+    owed = 0.0
+    last = len(frames) - 1
+    for step, (cell, value, reads) in enumerate(frames):
+        grid.set(cell, value)
+        dirty.add(cell)
+        if step % stride and step != last:
+            continue
+        previous = marks
+        moved = viewport.follow(cell)
+        marks = {read: "read" for read in reads if read in viewport}
+        marks[cell] = "write"
+        if moved:
+            # The viewport scrolled: repaint it in place
+            write(f"\x1b[{height}A\r")
+            draw()
+        else:
+            # Cells written since the last frame, and those whose highlight changed
+            changed = {c for c in dirty if c in viewport}
+            changed.update(c for c in previous if marks.get(c) != previous[c])
+            changed.update(c for c in marks if previous.get(c) != marks[c])
+            for c in changed:
+                redraw(c)
+        dirty.clear()
+        owed += delay
+        if owed >= 0.01:
+            stream.flush()
+            time.sleep(owed)
+            owed = 0.0
+    write(_RESET)
+    stream.flush()
+
+
+_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>DP Table: %(title)s</title>
+<style>
+body { font-family: monospace; margin: 12px; }
+#grid { border-collapse: collapse; margin-top: 8px; }
+#grid td, #grid th { border: 1px solid #ddd; padding: 1px 6px; text-align: right; min-width: 2ch; }
+#grid th { color: #999; font-weight: normal; }
+td.write { background: #ffd54f; font-weight: bold; }
+td.read { background: #b3e5fc; }
+</style>
+</head>
+<body>
+<h2>DP Table: %(title)s</h2>
+<button id="back">&larr;</button>
+<button id="play">Play</button>
+<button id="step">&rarr;</button>
+<input id="slider" type="range" min="0" value="0" style="width: 40ch">
+<span id="status"></span>
+<table id="grid"></table>
+<script type="application/json" id="dp-data">%(data)s</script>
+<script>
+"use strict";
+(() => {
+const data = JSON.parse(document.getElementById("dp-data").textContent);
+const [rows, cols] = data.shape, frames = data.frames;
+const $ = (id) => document.getElementById(id);
+const grid = $("grid"), slider = $("slider"), status = $("status");
+const cells = [];
+const head = grid.insertRow();
+head.append(document.createElement("th"));
+for (let j = 0; j < cols; j++) {
+  const th = document.createElement("th");
+  th.textContent = j;
+  head.append(th);
+}
+for (let i = 0; i < rows; i++) {
+  const tr = grid.insertRow();
+  const th = document.createElement("th");
+  th.textContent = i;
+  tr.append(th);
+  for (let j = 0; j < cols; j++) {
+    const td = tr.insertCell();
+    td.textContent = data.initial[i * cols + j];
+    cells.push(td);
+  }
+}
+slider.max = frames.length;
+
+// Frames applied so far; each frame is [row, col, old text, new text, [[row, col], ...]]
+let position = 0, marked = [], timer = null;
+function mark(frame) {
+  for (const td of marked) td.className = "";
+  marked = [];
+  if (!frame) return;
+  for (const [i, j] of frame[4]) marked.push(cells[i * cols + j]);
+  for (const td of marked) td.className = "read";
+  const written = cells[frame[0] * cols + frame[1]];
+  written.className = "write";
+  marked.push(written);
+}
+function seek(target) {
+  target = Math.max(0, Math.min(frames.length, target));
+  // Only the cells touched between the two positions change
+  while (position < target) {
+    const frame = frames[position++];
+    cells[frame[0] * cols + frame[1]].textContent = frame[3];
+  }
+  while (position > target) {
+    const frame = frames[--position];
+    cells[frame[0] * cols + frame[1]].textContent = frame[2];
+  }
+  const frame = frames[position - 1];
+  mark(frame);
+  slider.value = position;
+  status.textContent = "step " + position + " of " + frames.length +
+    (frame ? " \\u00b7 " + data.table + (data.nested ? "[" + frame[0] + "]" : "") +
+        "[" + frame[1] + "] = " + frame[3] : "");
+}
+function play() {
+  if (timer) {
+    clearInterval(timer);
+    timer = null;
+    $("play").textContent = "Play";
+    return;
+  }
+  if (position >= frames.length) seek(0);
+  $("play").textContent = "Pause";
+  const perTick = Math.max(1, Math.ceil(frames.length / 500));
+  timer = setInterval(() => {
+    seek(position + perTick);
+    if (position >= frames.length) play();
+  }, 20);
+}
+$("back").addEventListener("click", () => seek(position - 1));
+$("step").addEventListener("click", () => seek(position + 1));
+$("play").addEventListener("click", play);
+slider.addEventListener("input", () => seek(Number(slider.value)));
+seek(0);
+})();
+</script>
+</body>
+</html>
+"""
+
+
+def render_dp_html(dp_updates, output="algo_viz_dp.html", events=None):
+    """
+    Write an HTML animation of the most updated DP table to ``output``.
+
+    The page holds the initial grid plus one diff frame per update (cell, old
+    and new text, cells read), so stepping through it only touches the cells
+    that change.
+    """
+    table = _main_table(dp_updates)
+    if table is None:
+        return
+    grid = initial_tables(events, {table}).get(table) if events is not None else None
+    if grid is None:
+        grid = DPGrid(table)
+    initial = dict(grid.cells)
+    frames = []
+    for cell, value, reads in dp_frames(dp_updates, table):
+        old = grid.set(cell, value)
+        frames.append([cell[0], cell[1], old, grid.get(cell), reads])
+    if not frames:
+        return
+    for frame in frames:
+        frame[4] = [list(read) for read in frame[4] if read[0] < grid.rows and read[1] < grid.cols]
+
+    data = {
+        "table": table,
+        "shape": [grid.rows, grid.cols],
+        # Same rule as the terminal grid: a single row is a 1D table
+        "nested": grid.rows > 1,
+        "initial": [initial.get((i, j), "") for i in range(grid.rows) for j in range(grid.cols)],
+        "frames": frames,
+    }
+    # "</" cannot appear inside the script element
+    payload = json.dumps(data, separators=(",", ":")).replace("</", "<\\/")
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(_HTML % {"title": table, "data": payload})
+
+    print("[*] DP table animation written to " + output)
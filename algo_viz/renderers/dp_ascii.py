@@ -3,11 +3,15 @@ def render_dp(dp_events):
     print("-" * 60)
 
     for i, e in enumerate(dp_events, 1):
-        if e.inputs:
+        if e.inputs or e.reads:
             # Show formula with computed values
             formula_parts = []
-            for idx_expr, value in e.inputs.items():
-                formula_parts.append(f"{e.table}[{idx_expr}]={value}")
+            if e.reads:
+                for table, _, idx_expr, value in e.reads:
+                    formula_parts.append(f"{table}[{idx_expr}]={value}")
+            else:
+                for idx_expr, value in e.inputs.items():
+                    formula_parts.append(f"{e.table}[{idx_expr}]={value}")
             formula = " + ".join(formula_parts)
             print(
                 f"Step {i:02d} | Line {e.line_no} | "
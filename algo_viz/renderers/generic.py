@@ -6,6 +6,8 @@ User-friendly formatting with clear sections and helpful output.
 
 from typing import Dict, Any, List
 
+from ..tracer.values import hashable
+
 
 def _section_header(title: str) -> None:
     """Print a formatted section header."""
@@ -14,11 +16,67 @@ def _section_header(title: str) -> None:
     print(f"{'='*60}")
 
 
-def render_behavior_summary(events) -> None:
+def _execution_stats(events, analyzer=None) -> Dict[str, Any]:
+    """Event counts, taken from a BehaviorAnalyzer when one is available."""
+    if analyzer is not None:
+        states = analyzer.variable_states
+        return {
+            "total_events": analyzer.event_count,
+            "var_changes": sum(len(changes) for changes in states.values()),
+            "calls": analyzer.control_flow["call_count"],
+            "returns": analyzer.control_flow["return_count"],
+            "unique_vars": set(states),
+        }
+
+    stats = {
+        "total_events": len(events),
+        "var_changes": 0,
+        "calls": 0,
+        "returns": 0,
+        "unique_vars": set(),
+    }
+
+    for e in events:
+        if e.event_type == "var_change":
+            stats["var_changes"] += 1
+            stats["unique_vars"].add(e.var_name)
+        elif e.event_type == "call":
+            stats["calls"] += 1
+        elif e.event_type == "return":
+            stats["returns"] += 1
+
+    return stats
+
+
+def _data_flow(events, analyzer=None):
+    """First value and set of new values per variable."""
+    from collections import defaultdict
+
+    var_origins = {}
+    var_destinations = defaultdict(set)
+
+    if analyzer is not None:
+        for var, states in analyzer.variable_states.items():
+            var_origins[var] = states[0]["old"]
+            for state in states:
+                var_destinations[var].add(hashable(state["new"]))
+        return var_origins, var_destinations
+
+    for e in events:
+        if e.event_type == "var_change":
+            if e.var_name not in var_origins:
+                var_origins[e.var_name] = e.old_value
+            var_destinations[e.var_name].add(hashable(e.new_value))
+
+    return var_origins, var_destinations
+
+
+def render_behavior_summary(events, analyzer=None) -> None:
     """Render a summary of function behavior."""
     from algo_viz.analyzers.behavior import BehaviorAnalyzer
 
-    analyzer = BehaviorAnalyzer(events)
+    if analyzer is None:
+        analyzer = BehaviorAnalyzer(events)
     _section_header("FUNCTION BEHAVIOR")
 
     # Input/Output
@@ -43,28 +101,17 @@ def render_behavior_summary(events) -> None:
     complexity = analyzer.get_complexity_indicators()
     if complexity["recursion_depth"] > 1:
         print(f"   • Recursion depth: {complexity['recursion_depth']}")
+    if complexity["branching_factor"] > 1:
+        print(f"   • Subcalls per call: {complexity['branching_factor']:g}")
+    if complexity["loop_depth"] > 0:
+        print(f"   • Loop nesting depth: {complexity['loop_depth']}")
     if complexity["data_size"] > 0:
         print(f"   • Max data size: {complexity['data_size']} items")
 
 
-def render_execution_stats(events) -> None:
+def render_execution_stats(events, analyzer=None) -> None:
     """Render execution statistics."""
-    stats = {
-        "total_events": len(events),
-        "var_changes": 0,
-        "calls": 0,
-        "returns": 0,
-        "unique_vars": set(),
-    }
-
-    for e in events:
-        if e.event_type == "var_change":
-            stats["var_changes"] += 1
-            stats["unique_vars"].add(e.var_name)
-        elif e.event_type == "call":
-            stats["calls"] += 1
-        elif e.event_type == "return":
-            stats["returns"] += 1
+    stats = _execution_stats(events, analyzer)
 
     _section_header("EXECUTION STATISTICS")
     print(f"\n[TRACE SUMMARY]")
@@ -75,12 +122,12 @@ def render_execution_stats(events) -> None:
     print(f"   • Returns: {stats['returns']}")
 
 
-def render_variable_tracking(events) -> None:
+def render_variable_tracking(events, analyzer=None) -> None:
     """Render variable state changes with detailed transformations."""
     from algo_viz.analyzers.behavior import BehaviorAnalyzer
-    from collections import defaultdict
 
-    analyzer = BehaviorAnalyzer(events)
+    if analyzer is None:
+        analyzer = BehaviorAnalyzer(events)
     var_flow = analyzer.get_variable_flow()
 
     if not var_flow["variables"]:
@@ -102,26 +149,25 @@ def render_variable_tracking(events) -> None:
     if high_change_vars:
         print("\n[HIGH ACTIVITY] (frequently changed):")
         for var in sorted(high_change_vars, key=lambda x: x['changes'], reverse=True):
-            _print_variable_detail(var, events)
+            _print_variable_detail(var, analyzer.variable_states[var['name']])
     
     # Show low-activity variables if any
     if low_change_vars:
         print("\n[LOW ACTIVITY] (set once or twice):")
         for var in sorted(low_change_vars, key=lambda x: x['changes']):
-            _print_variable_detail(var, events)
+            _print_variable_detail(var, analyzer.variable_states[var['name']])
 
 
-def _print_variable_detail(var: Dict[str, Any], events) -> None:
+def _print_variable_detail(var: Dict[str, Any], states: List[Dict[str, Any]]) -> None:
     """Print detailed information about a single variable."""
     final_val = var['final_value']
     final_repr = str(final_val) if len(str(final_val)) <= 40 else str(final_val)[:37] + "..."
     
     # Collect value sequence for this variable
     value_sequence = []
-    for e in events:
-        if e.event_type == "var_change" and e.var_name == var['name']:
-            if not value_sequence or value_sequence[-1] != e.new_value:
-                value_sequence.append(e.new_value)
+    for state in states:
+        if not value_sequence or value_sequence[-1] != state["new"]:
+            value_sequence.append(state["new"])
     
     # Print variable info
     print(f"\n   [{var['name']}]")
@@ -235,18 +281,9 @@ def render_operation_summary(operations: Dict[str, Any]) -> None:
         has_content = True
 
 
-def render_data_flow(events) -> None:
+def render_data_flow(events, analyzer=None) -> None:
     """Render data flow diagram (simplified)."""
-    from collections import defaultdict
-
-    var_origins = {}
-    var_destinations = defaultdict(set)
-
-    for e in events:
-        if e.event_type == "var_change":
-            if e.var_name not in var_origins:
-                var_origins[e.var_name] = e.old_value
-            var_destinations[e.var_name].add(e.new_value)
+    var_origins, var_destinations = _data_flow(events, analyzer)
 
     if not var_origins:
         return
@@ -316,19 +353,9 @@ def render_operation_summary(operations: Dict[str, Any]) -> None:
             print(f"  Decrements: {arith['decrement_ops']}")
 
 
-def render_data_flow(events) -> None:
+def render_data_flow(events, analyzer=None) -> None:
     """Render data flow diagram (simplified)."""
-    from collections import defaultdict
-
-    var_origins = {}
-    var_destinations = defaultdict(set)
-
-    for e in events:
-        if e.event_type == "var_change":
-            if e.var_name not in var_origins:
-                var_origins[e.var_name] = e.old_value
-
-            var_destinations[e.var_name].add(e.new_value)
+    var_origins, var_destinations = _data_flow(events, analyzer)
 
     if not var_origins:
         return
@@ -344,24 +371,9 @@ def render_data_flow(events) -> None:
             print(f"  To: {len(destinations)} different value(s)")
 
 
-def render_execution_stats(events) -> None:
+def render_execution_stats(events, analyzer=None) -> None:
     """Render execution statistics."""
-    stats = {
-        "total_events": len(events),
-        "var_changes": 0,
-        "calls": 0,
-        "returns": 0,
-        "unique_vars": set(),
-    }
-
-    for e in events:
-        if e.event_type == "var_change":
-            stats["var_changes"] += 1
-            stats["unique_vars"].add(e.var_name)
-        elif e.event_type == "call":
-            stats["calls"] += 1
-        elif e.event_type == "return":
-            stats["returns"] += 1
+    stats = _execution_stats(events, analyzer)
 
     print("\n[*] Execution Statistics")
     print("------" * 10)
@@ -1,49 +1,258 @@
 # algo_viz/renderers/html.py
+"""
+Self-contained HTML timeline.
+
+The page is written while the events are iterated: rows are packed into
+chunks of ``CHUNK_ROWS``, each stored as zlib-compressed JSON, base64
+encoded in its own inert ``<script>`` element. A small viewer script at the
+end of the file decompresses chunks on demand (``DecompressionStream``) and
+only puts the rows in view into the DOM, so traces with millions of events
+open instantly and memory stays bounded on both sides. Everything is
+inline; the file works offline.
+"""
+
+import base64
+import json
+import reprlib
+import zlib
 
-from html import escape
+# Timeline rows per compressed chunk
+CHUNK_ROWS = 2048
 
-HTML_TEMPLATE = """
+# Longest text shown for one row; the rest is elided
+MAX_TEXT = 300
+
+# Values are formatted no further than a row can show
+_repr = reprlib.Repr()
+_repr.maxlevel = 3
+_repr.maxlist = _repr.maxtuple = _repr.maxset = _repr.maxfrozenset = _repr.maxdict = 30
+_repr.maxdeque = _repr.maxarray = 30
+_repr.maxstring = _repr.maxlong = _repr.maxother = MAX_TEXT
+
+_HEAD = """<!DOCTYPE html>
 <html>
 <head>
+<meta charset="utf-8">
+<title>Algorithm Execution Timeline</title>
 <style>
-body {{ font-family: monospace; }}
-.step {{ margin: 4px 0; }}
-.call {{ color: blue; }}
-.return {{ color: green; }}
-.var {{ color: black; }}
+body { font-family: monospace; margin: 0; height: 100vh; display: flex; flex-direction: column; }
+header { padding: 0 12px 8px; border-bottom: 1px solid #ccc; }
+header input { font-family: monospace; }
+#view { flex: 1; overflow-y: auto; position: relative; }
+#rows { position: absolute; left: 0; right: 0; }
+.step { height: 18px; line-height: 18px; white-space: pre; overflow: hidden; text-overflow: ellipsis; padding: 0 12px; cursor: pointer; }
+.step .no { color: #999; display: inline-block; min-width: 8ch; }
+.call { color: blue; }
+.return { color: green; }
+.suspend { color: gray; }
+.var { color: black; }
+.selected { background: #fff3a8; }
 </style>
 </head>
 <body>
+<header>
 <h2>Algorithm Execution Timeline</h2>
-{content}
+<button id="prev" title="Previous step (k)">&larr;</button>
+<button id="next" title="Next step (j)">&rarr;</button>
+Step <input id="goto" type="number" min="1" style="width: 9ch"> of <span id="total">0</span>
+<input id="search" type="search" placeholder="Search (Enter / Shift+Enter)" style="width: 30ch">
+<span id="status"></span>
+</header>
+<div id="view"><div id="spacer"></div><div id="rows"></div></div>
+"""
+
+_CHUNK = '<script type="application/octet-stream" class="algoviz-chunk">{}</script>\n'
+
+_VIEWER = """<script>
+"use strict";
+(() => {
+const TOTAL = %(total)d, CHUNK = %(chunk)d, ROW_HEIGHT = 18, CACHE_CHUNKS = 64;
+// Browsers cap element heights; longer traces scroll proportionally
+const MAX_HEIGHT = 8000000;
+const chunkNodes = document.querySelectorAll("script.algoviz-chunk");
+const $ = (id) => document.getElementById(id);
+const view = $("view"), spacer = $("spacer"), rowsEl = $("rows"), status = $("status"), gotoEl = $("goto");
+const scaled = TOTAL * ROW_HEIGHT > MAX_HEIGHT;
+spacer.style.height = Math.min(TOTAL * ROW_HEIGHT, MAX_HEIGHT) + "px";
+$("total").textContent = TOTAL;
+
+// Decompressed chunks, least recently used first
+const cache = new Map();
+async function inflate(text) {
+  const bytes = Uint8Array.from(atob(text.trim()), (c) => c.charCodeAt(0));
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("deflate"));
+  return JSON.parse(await new Response(stream).text());
+}
+function chunk(index) {
+  let rows = cache.get(index);
+  if (rows) {
+    cache.delete(index);
+  } else {
+    rows = inflate(chunkNodes[index].textContent);
+  }
+  cache.set(index, rows);
+  if (cache.size > CACHE_CHUNKS) cache.delete(cache.keys().next().value);
+  return rows;
+}
+
+let selected = -1, drawing = 0;
+const visibleRows = () => Math.ceil(view.clientHeight / ROW_HEIGHT);
+function topRow() {
+  if (!scaled) return view.scrollTop / ROW_HEIGHT;
+  const maxScroll = spacer.offsetHeight - view.clientHeight;
+  return maxScroll > 0 ? view.scrollTop / maxScroll * Math.max(0, TOTAL - visibleRows()) : 0;
+}
+function scrollToRow(index) {
+  const target = Math.max(0, index - visibleRows() / 2);
+  if (!scaled) {
+    view.scrollTop = target * ROW_HEIGHT;
+  } else {
+    const maxScroll = spacer.offsetHeight - view.clientHeight;
+    view.scrollTop = target / Math.max(1, TOTAL - visibleRows()) * maxScroll;
+  }
+}
+
+async function draw() {
+  const token = ++drawing;
+  const top = topRow(), first = Math.floor(top);
+  const last = Math.min(TOTAL, first + visibleRows() + 2);
+  const base = Math.floor(first / CHUNK);
+  const needed = [];
+  for (let c = base; c * CHUNK < last; c++) needed.push(chunk(c));
+  const chunks = await Promise.all(needed);
+  if (token !== drawing) return;  // a later scroll superseded this one
+  const fragment = document.createDocumentFragment();
+  for (let i = first; i < last; i++) {
+    const [kind, depth, text] = chunks[Math.floor(i / CHUNK) - base][i %% CHUNK];
+    const div = document.createElement("div");
+    div.className = "step " + kind + (i === selected ? " selected" : "");
+    div.dataset.index = i;
+    const no = document.createElement("span");
+    no.className = "no";
+    no.textContent = i + 1;
+    div.append(no, " ".repeat(4 * depth) + text);
+    fragment.append(div);
+  }
+  rowsEl.style.top = view.scrollTop - (top - first) * ROW_HEIGHT + "px";
+  rowsEl.replaceChildren(fragment);
+}
+
+async function select(index) {
+  if (!TOTAL) return;
+  selected = Math.max(0, Math.min(TOTAL - 1, index));
+  const top = topRow();
+  if (selected < top || selected >= top + visibleRows() - 1) scrollToRow(selected);
+  gotoEl.value = selected + 1;
+  const [, , , line] = (await chunk(Math.floor(selected / CHUNK)))[selected %% CHUNK];
+  status.textContent = line == null ? "" : "line " + line;
+  draw();
+}
+
+async function search(backwards) {
+  const query = $("search").value.toLowerCase();
+  if (!query || !TOTAL) return;
+  status.textContent = "searching...";
+  const step = backwards ? -1 : 1;
+  let i = (selected + step + TOTAL) %% TOTAL;
+  for (let scanned = 0; scanned < TOTAL; ) {
+    const rows = await chunk(Math.floor(i / CHUNK));
+    const start = Math.floor(i / CHUNK) * CHUNK;
+    for (; i >= start && i < start + rows.length && scanned < TOTAL; i += step, scanned++) {
+      if (rows[i - start][2].toLowerCase().includes(query)) return select(i);
+    }
+    i = (i + TOTAL) %% TOTAL;
+  }
+  status.textContent = "no match";
+}
+
+if (typeof DecompressionStream === "undefined") {
+  status.textContent = "This browser cannot decompress the trace (DecompressionStream is missing).";
+  return;
+}
+view.addEventListener("scroll", draw, { passive: true });
+window.addEventListener("resize", draw);
+rowsEl.addEventListener("click", (event) => {
+  const row = event.target.closest(".step");
+  if (row) select(Number(row.dataset.index));
+});
+$("prev").addEventListener("click", () => select(selected - 1));
+$("next").addEventListener("click", () => select(selected + 1));
+gotoEl.addEventListener("change", () => select(Number(gotoEl.value) - 1));
+$("search").addEventListener("keydown", (event) => {
+  if (event.key === "Enter") search(event.shiftKey);
+});
+document.addEventListener("keydown", (event) => {
+  if (event.target.tagName === "INPUT") return;
+  if (event.key === "j" || event.key === "ArrowDown") { event.preventDefault(); select(selected + 1); }
+  if (event.key === "k" || event.key === "ArrowUp") { event.preventDefault(); select(selected - 1); }
+});
+draw();
+})();
+</script>
 </body>
 </html>
 """
 
+
+def _clip(text):
+    return text if len(text) <= MAX_TEXT else text[:MAX_TEXT] + "..."
+
+
+def _show(value):
+    if type(value) is str:
+        return value[:MAX_TEXT + 1]
+    return _repr.repr(value)
+
+
+def _timeline_row(event_type, line_no, func_name, var_name, old_value, new_value, depth):
+    """[kind, depth, text, line] for an event shown on the timeline, or None"""
+    depth = depth or 0
+    if event_type == "var_change":
+        return ["var", depth, _clip(f"{var_name}: {_show(old_value)} -> {_show(new_value)}"), line_no]
+    if event_type == "call":
+        args = ", ".join(f"{k}={_show(v)}" for k, v in new_value.items()) if isinstance(new_value, dict) else ""
+        return ["call", depth, _clip(f"[+] {func_name}({args})"), line_no]
+    if event_type == "return":
+        return ["return", depth, _clip(f"[-] return {_show(new_value)}"), line_no]
+    if event_type == "suspend":
+        return ["suspend", depth, _clip(f"[=] {func_name} yields {_show(new_value)}"), line_no]
+    if event_type == "resume":
+        return ["suspend", depth, f"[>] {func_name} resumes", line_no]
+    return None
+
+
+def _encode_chunk(rows):
+    data = json.dumps(rows, separators=(",", ":")).encode("utf-8")
+    return base64.b64encode(zlib.compress(data)).decode("ascii")
+
+
 def render_html(events, output="algo_viz.html"):
-    rows = []
-
-    for e in events:
-        indent = "&nbsp;" * 4 * (e.depth or 0)
-
-        if e.event_type == "call":
-            args = ", ".join(f"{k}={v}" for k, v in e.new_value.items()) if isinstance(e.new_value, dict) else ""
-            rows.append(
-                f"<div class='step call'>{indent}[+] {e.func_name}({args})</div>"
-            )
-        elif e.event_type == "return":
-            rows.append(
-                f"<div class='step return'>{indent}[-] return {escape(str(e.new_value))}</div>"
-            )
-        elif e.event_type == "var_change":
-            rows.append(
-                f"<div class='step var'>{indent}"
-                f"{e.var_name}: {escape(str(e.old_value))} -> {escape(str(e.new_value))}"
-                "</div>"
-            )
-
-    html = HTML_TEMPLATE.format(content="\n".join(rows))
+    """Write the timeline of ``events`` to ``output``, one compressed chunk at a time"""
+    if hasattr(events, "iter_rows"):
+        # EventStore fast path: plain tuples, no per-event views
+        source = events.iter_rows()
+    else:
+        source = (
+            (e.event_type, e.line_no, e.func_name, e.var_name, e.old_value, e.new_value, e.depth)
+            for e in events
+        )
+
+    total = 0
     with open(output, "w", encoding="utf-8") as f:
-        f.write(html)
+        f.write(_HEAD)
+        rows = []
+        for event in source:
+            row = _timeline_row(*event)
+            if row is None:
+                continue
+            rows.append(row)
+            if len(rows) == CHUNK_ROWS:
+                f.write(_CHUNK.format(_encode_chunk(rows)))
+                total += len(rows)
+                rows = []
+        if rows:
+            f.write(_CHUNK.format(_encode_chunk(rows)))
+            total += len(rows)
+        f.write(_VIEWER % {"total": total, "chunk": CHUNK_ROWS})
 
     print("[*] HTML visualization written to " + output)
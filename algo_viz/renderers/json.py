@@ -0,0 +1,195 @@
+# algo_viz/renderers/json.py
+"""
+Streaming JSON-lines (NDJSON) output.
+
+One compact JSON object per line: every event in trace order, then - when an
+analysis is given - one ``dp_update`` record per DP step and an ``analysis``
+record (with the exact ``operation_counts`` when the run counted them), and
+last a ``profile`` record when the run was profiled. Lines are written as
+the events are iterated, so a recorded trace is never decoded in full and a
+consumer reading the pipe sees them as they come. Values go through ``encode_value`` (size caps, cycle
+detection, tags for tuples, sets and opaque objects); ``iter_events`` reads
+them back lazily, one line at a time.
+
+Event lines have no ``record`` key, which keeps them as small as possible;
+every other line names its kind in ``record``.
+"""
+
+import json
+import sys
+from dataclasses import asdict
+
+from ..tracer.events import Event
+from ..tracer.values import encode_value, loads
+
+# Lines written between two flushes of the output stream
+FLUSH_EVERY = 1000
+
+_EVENT_FIELDS = ("event_type", "line_no", "func_name", "var_name", "old_value", "new_value", "depth")
+
+# Extras that only make sense next to the tracer's in-memory snapshot store
+_SKIPPED_EXTRAS = ("snapshot_id", "locals_snapshot")
+
+
+def event_to_dict(e, extras=None):
+    """JSON-compatible dict for one event, plus its optional ``extras`` attributes"""
+    record = {
+        "event_type": e.event_type,
+        "line_no": e.line_no,
+        "func_name": e.func_name,
+        "var_name": e.var_name,
+        "old_value": encode_value(e.old_value),
+        "new_value": encode_value(e.new_value),
+        "depth": e.depth,
+    }
+    if extras:
+        for name, value in extras.items():
+            if name not in _SKIPPED_EXTRAS and name not in record:
+                record[name] = encode_value(value)
+    return record
+
+
+def analysis_to_records(analysis):
+    """Yield the ``dp_update`` records and the final ``analysis`` record of a TraceAnalysis"""
+    for update in analysis.dp_updates or ():
+        record = {"record": "dp_update"}
+        record.update((name, encode_value(value)) for name, value in asdict(update).items())
+        yield record
+    record = {
+        "record": "analysis",
+        "detected_patterns": analysis.detected_patterns,
+        "generic_patterns": encode_value(analysis.generic_patterns),
+        "operations": encode_value(analysis.operations),
+    }
+    operation_counts = getattr(analysis, "operation_counts", None)
+    if operation_counts is not None:
+        record["operation_counts"] = operation_counts_to_dict(operation_counts)
+    yield record
+
+
+def operation_counts_to_dict(counts):
+    """Plain dict of an OperationCounts: the totals and every line that performed an operation"""
+    return {
+        "total": asdict(counts.total()),
+        "lines": [
+            dict({"file": code.co_filename, "function": code.co_name, "line": line}, **asdict(tally))
+            for code, line, tally in counts.by_line()
+        ],
+    }
+
+
+def _extras_of(e):
+    return {
+        name: value
+        for name, value in getattr(e, "__dict__", {}).items()
+        if name not in _EVENT_FIELDS
+    }
+
+
+def profile_to_record(profile):
+    """The ``profile`` record of a LineProfile: every line that ran, hottest first"""
+    return {
+        "record": "profile",
+        "overhead_ns": profile.overhead_ns,
+        "lines": [
+            {"file": code.co_filename, "function": code.co_name, "line": line, "hits": hits, "ns": ns}
+            for code, line, hits, ns in profile.hottest()
+        ],
+    }
+
+
+def render_json(events, output=None, analysis=None, profile=None):
+    """
+    Write ``events`` as NDJSON to ``output`` (path, file or stdout).
+
+    Args:
+        events: EventStore, RecordedTrace or any sequence of events
+        output: Path to create, or a text stream (default stdout)
+        analysis: Optional TraceAnalysis whose results follow the events
+        profile: Optional LineProfile written as a last ``profile`` record
+    """
+    if output is None:
+        output = sys.stdout
+    if isinstance(output, str):
+        with open(output, "w", encoding="utf-8") as f:
+            render_json(events, f, analysis, profile)
+        return
+
+    dumps = json.JSONEncoder(separators=(",", ":")).encode
+    write = output.write
+    # EventStore / RecordedTrace keep extras by row, which is iteration order
+    store_extras = getattr(events, "extras", None)
+    if not callable(store_extras):
+        store_extras = None
+    threaded = len(getattr(events, "threads", ())) > 1
+    pending = 0
+    for row, e in enumerate(events):
+        extras = store_extras(row) if store_extras is not None else _extras_of(e)
+        if threaded:
+            extras = dict(extras, thread=e.thread_name)
+        write(dumps(event_to_dict(e, extras)))
+        write("\n")
+        pending += 1
+        if pending >= FLUSH_EVERY:
+            output.flush()
+            pending = 0
+    if analysis is not None:
+        for record in analysis_to_records(analysis):
+            write(dumps(record))
+            write("\n")
+    if profile is not None:
+        write(dumps(profile_to_record(profile)))
+        write("\n")
+    output.flush()
+
+
+def iter_records(source):
+    """
+    Lazily yield the decoded records of an NDJSON trace.
+
+    ``source`` is a path or an iterable of lines (an open file, a pipe).
+    Tagged values come back as their built-in types; blank lines are skipped.
+    """
+    if isinstance(source, str):
+        with open(source, encoding="utf-8") as f:
+            yield from iter_records(f)
+        return
+
+    for line in source:
+        if line.strip():
+            yield loads(line)
+
+
+def iter_events(source):
+    """
+    Lazily yield the events of an NDJSON trace as ``Event`` objects.
+
+    Extras written with an event (``source_line``, ``frame_id``, ...) are
+    set as attributes; analysis records are skipped.
+    """
+    for record in iter_records(source):
+        if "record" in record:
+            continue
+        event = Event(*(record.pop(name, None) for name in _EVENT_FIELDS))
+        event.__dict__.update(record)
+        yield event
+
+
+def read_analysis(source):
+    """
+    Return the analysis stored after the events of an NDJSON trace, or None.
+
+    The result is the ``analysis`` record with its DP steps gathered under
+    ``dp_updates``; events are streamed past without being kept.
+    """
+    dp_updates = []
+    for record in iter_records(source):
+        kind = record.get("record")
+        if kind == "dp_update":
+            del record["record"]
+            dp_updates.append(record)
+        elif kind == "analysis":
+            del record["record"]
+            record["dp_updates"] = dp_updates
+            return record
+    return None
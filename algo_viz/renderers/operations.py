@@ -0,0 +1,47 @@
+# algo_viz/renderers/operations.py
+
+import linecache
+import os
+
+# Functions shown, most operations first
+MAX_FUNCTIONS = 5
+
+
+def _summary(tally):
+    return (
+        f"{tally.comparisons} comparisons, {tally.reads} reads, "
+        f"{tally.writes} writes, {tally.swaps} swaps"
+    )
+
+
+def render_operation_counts(counts, max_functions=MAX_FUNCTIONS):
+    """
+    Print the exact operation counts of a run: per function, then per line
+    next to its source.
+    """
+    print("\n[*] Operation Counts")
+    print("-" * 40)
+
+    functions = sorted(
+        counts.by_function().items(),
+        key=lambda item: item[1].comparisons + item[1].accesses,
+        reverse=True,
+    )
+    if not functions:
+        print("No comparisons or subscript operations recorded")
+        return
+
+    for code, tally in functions[:max_functions]:
+        print(f"\n{code.co_name} ({os.path.basename(code.co_filename)}): {_summary(tally)}")
+        print(f"{'line':>6} {'cmp':>8} {'reads':>8} {'writes':>8} {'swaps':>8}  source")
+        for line, line_tally in counts.lines(code).items():
+            text = linecache.getline(code.co_filename, line).strip()
+            print(
+                f"{line:>6} {line_tally.comparisons:>8} {line_tally.reads:>8} "
+                f"{line_tally.writes:>8} {line_tally.swaps:>8}  {text}"
+            )
+
+    hidden = len(functions) - max_functions
+    if hidden > 0:
+        print(f"\n... {hidden} more functions")
+    print(f"\nTotal: {_summary(counts.total())}")
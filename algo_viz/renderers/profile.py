@@ -0,0 +1,84 @@
+# algo_viz/renderers/profile.py
+
+import linecache
+import os
+
+# Functions shown, hottest first
+MAX_FUNCTIONS = 5
+
+# Width of the heat bar of the hottest line
+BAR_WIDTH = 10
+
+_EIGHTHS = " ▏▎▍▌▋▊▉"
+
+
+def _bar(fraction):
+    """Heat bar ``fraction`` of BAR_WIDTH long, in eighths of a cell"""
+    eighths = round(fraction * BAR_WIDTH * 8)
+    full, rest = divmod(eighths, 8)
+    return ("█" * full + (_EIGHTHS[rest] if rest else "")).ljust(BAR_WIDTH)
+
+
+def _duration(ns):
+    if ns >= 1_000_000_000:
+        return f"{ns / 1e9:.2f}s"
+    if ns >= 1_000_000:
+        return f"{ns / 1e6:.2f}ms"
+    if ns >= 1_000:
+        return f"{ns / 1e3:.1f}µs"
+    return f"{ns}ns"
+
+
+def render_profile(profile, max_functions=MAX_FUNCTIONS):
+    """
+    Print the source of the hottest profiled functions, each line annotated
+    with its hits, self time, share of the total and a heat bar.
+    """
+    print("\n[*] Line Profile")
+    print("-" * 40)
+
+    total = profile.total_ns
+    entries = sorted(profile.codes.values(), key=lambda entry: entry.total_ns, reverse=True)
+    if not total or not entries:
+        print("No line timings recorded")
+        return
+
+    hottest = max(ns for entry in entries for ns in entry.times)
+    for entry in entries[:max_functions]:
+        code = entry.code
+        lines = entry.lines()
+        if not lines:
+            continue
+        print(
+            f"\n{code.co_name} ({os.path.basename(code.co_filename)}), "
+            f"{_duration(entry.total_ns)}, {100 * entry.total_ns / total:.1f}% of the time"
+        )
+        print(f"{'line':>6} {'hits':>8} {'time':>10} {'share':>6}  {'':<{BAR_WIDTH}}  source")
+
+        stats = {line: (hits, ns) for line, hits, ns in lines}
+        top_line = max(lines, key=lambda row: row[2])[0]
+        first, last = lines[0][0], lines[-1][0]
+        source = [linecache.getline(code.co_filename, line).rstrip() for line in range(first, last + 1)]
+        indent = min(
+            (len(text) - len(text.lstrip()) for text in source if text.strip()),
+            default=0,
+        )
+        for line, text in zip(range(first, last + 1), source):
+            text = text[indent:]
+            if line not in stats:
+                print(f"{line:>6} {'':>8} {'':>10} {'':>6}  {'':<{BAR_WIDTH}}  {text}")
+                continue
+            hits, ns = stats[line]
+            marker = "  <- hottest" if line == top_line and len(lines) > 1 else ""
+            print(
+                f"{line:>6} {hits:>8} {_duration(ns):>10} {100 * ns / total:>5.1f}%  "
+                f"{_bar(ns / hottest if hottest else 0)}  {text}{marker}"
+            )
+
+    hidden = len(entries) - max_functions
+    if hidden > 0:
+        print(f"\n... {hidden} more functions")
+    print(
+        f"\nSelf time per line, {profile.overhead_ns}ns of tracer overhead "
+        "subtracted per event; timings are approximate"
+    )
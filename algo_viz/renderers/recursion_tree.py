@@ -1,26 +1,69 @@
 # algo_viz/renderers/recursion_tree.py
 
-def render_recursion_tree(events):
+from ..analyzers.recursion_tree import build_recursion_tree, show_value
+
+# Default caps on the printed tree: levels below the top call, subcalls per call
+MAX_DEPTH = 12
+MAX_WIDTH = 8
+
+
+def render_recursion_tree(events, tree=None, max_depth=MAX_DEPTH, max_width=MAX_WIDTH):
+    """
+    Print the recursion tree of ``events``, one line per distinct subtree.
+
+    A subtree that was already printed is shown as a reference to its first
+    appearance with the number of times it ran ("fib(n=2) ×3, see #4").
+    ``tree`` is a prebuilt RecursionTree (e.g. from the fused analysis);
+    ``max_depth`` and ``max_width`` (None for no limit) cap how many levels
+    and how many subcalls per call are printed.
+    """
     print("\n[*] Recursion Tree")
     print("-" * 40)
-    
-    has_recursion = False
-    for e in events:
-        if e.depth and e.depth > 1:
-            has_recursion = True
-            break
-    
-    if not has_recursion:
+
+    if tree is None:
+        tree = build_recursion_tree(events)
+    if not any(tree.subtrees[root].children for root in tree.roots):
         return
 
-    for e in events:
-        if e.depth is None:
+    subtrees = tree.subtrees
+    numbers = {}
+    # (subtree id or note, level) pairs still to print, next one last
+    pending = [(root, 0) for root in reversed(tree.roots)]
+    while pending:
+        subtree_id, level = pending.pop()
+        indent = "  " * level
+        if isinstance(subtree_id, str):
+            # Note standing in for elided subcalls
+            print(f"{indent}{subtree_id}")
             continue
-        indent = "  " * max(0, e.depth - 1)
 
-        if e.event_type == "call":
-            args = ", ".join(f"{k}={v}" for k, v in e.new_value.items())
-            print(f"{indent}[+] {e.func_name}({args})")
+        subtree = subtrees[subtree_id]
+        result = show_value(subtree.result)
+        times = f" ×{subtree.count}" if subtree.count > 1 else ""
+        number = numbers.get(subtree_id)
+        if number is not None:
+            print(f"{indent}[=] {subtree.label} -> {result}{times}, see #{number}")
+            continue
+
+        number = numbers[subtree_id] = len(numbers) + 1
+        print(f"{indent}[+] #{number} {subtree.label} -> {result}{times}")
+
+        children = subtree.children
+        if not children:
+            continue
+        if max_depth is not None and level + 1 > max_depth:
+            pending.append((f"... {subtree.calls - 1} calls below", level + 1))
+            continue
+        shown = children if max_width is None else children[:max_width]
+        if len(shown) < len(children):
+            hidden = children[len(shown):]
+            calls = sum(subtrees[child].calls for child in hidden)
+            pending.append((f"... {len(hidden)} more subcalls ({calls} calls)", level + 1))
+        pending.extend((child, level + 1) for child in reversed(shown))
 
-        elif e.event_type == "return":
-            print(f"{indent}[-] return {e.new_value}")
+    print(
+        f"\n{tree.calls} calls, {tree.distinct_subproblems} distinct subproblems, "
+        f"{tree.repeated_calls} repeated"
+    )
+    if tree.removable_calls:
+        print(f"Memoization would remove {tree.removable_calls} of {tree.calls} calls")
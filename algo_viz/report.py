@@ -0,0 +1,132 @@
+# algo_viz/report.py
+"""
+The report visualize() prints after a traced call, shared with the CLI's
+``run`` and ``render`` subcommands so a replayed trace renders the same way.
+"""
+
+import os
+
+from .analyzers.engine import analyze_trace
+from .renderers import REPORT_MODES
+from .renderers.ascii import render
+from .renderers.async_timeline import render_async_timeline
+from .renderers.recursion_tree import render_recursion_tree
+from .renderers.html import render_html
+from .renderers.dp import render_dp_grid, render_dp_html
+from .renderers.dp_ascii import render_dp
+from .renderers.json import render_json
+from .renderers.operations import render_operation_counts
+from .renderers.profile import render_profile
+from .renderers.two_pointers import render_two_pointers
+from .renderers.sliding_window import render_sliding_window
+from .renderers.generic import (
+    render_behavior_summary,
+    render_variable_tracking,
+    render_pattern_summary,
+    render_operation_summary,
+    render_execution_stats,
+    render_data_flow,
+)
+
+
+def render_report(
+    events,
+    mode="ascii",
+    show_generic=True,
+    output=None,
+    profile=None,
+    operation_counts=None,
+    animate=False,
+):
+    """
+    Analyze ``events`` (a live or recorded trace) and render the report.
+
+    Args:
+        events: EventStore, RecordedTrace or any sequence of events
+        mode: "ascii", "html" or "json"
+        show_generic: Include the generic behavior analysis (ascii mode)
+        output: Output path for html (default algo_viz.html; a DP table
+            animation goes next to it as <name>_dp.html); for json a path or
+            file object (default stdout)
+        profile: Optional LineProfile of the run; ascii mode prints the
+            annotated source after the pattern visualizations, json mode
+            adds a ``profile`` record
+        operation_counts: Optional OperationCounts of the run; the
+            detectors report its exact counts, ascii mode prints them per
+            function and line, json mode adds them to the analysis record
+        animate: Animate the DP table grid on the terminal (ascii mode)
+            instead of printing its final state once
+
+    In json mode the events are streamed out first and the analysis results
+    follow them as the last records.
+    """
+    if mode not in REPORT_MODES:
+        raise ValueError(f"Unknown mode {mode!r}; expected one of {REPORT_MODES}")
+
+    if mode == "json":
+        # Machine-readable output only; no banners mixed into the stream
+        render_json(events, output, analyze_trace(events, operation_counts), profile)
+        return
+
+    # One fused pass feeds every detector and analyzer
+    analysis = analyze_trace(events, operation_counts)
+    detected_patterns = analysis.detected_patterns
+
+    if analysis.dp and analysis.dp_updates:
+        render_dp(analysis.dp_updates)
+        if mode == "ascii":
+            render_dp_grid(analysis.dp_updates, events, animate=animate)
+
+    generic_patterns = analysis.generic_patterns
+    operations = analysis.operations
+
+    if detected_patterns:
+        print("[*] Detected Algorithm Patterns: " + ", ".join(detected_patterns))
+
+    # Render generic analysis if enabled
+    if show_generic:
+        if mode == "ascii":
+            # Render in logical order: Summary -> Stats -> Patterns -> Operations -> Variables -> Data Flow
+            render_behavior_summary(events, analysis.behavior)
+            render_execution_stats(events, analysis.behavior)
+
+            # Show detected patterns
+            if generic_patterns:
+                render_pattern_summary(generic_patterns)
+
+            # Show operations performed
+            if any(operations.values()):
+                render_operation_summary(operations)
+
+            # Show variable tracking
+            render_variable_tracking(events, analysis.behavior)
+
+            # Show data flow
+            render_data_flow(events, analysis.behavior)
+
+    if mode == "ascii":
+        # Render specialized visualizations for each pattern
+        if analysis.sliding_window:
+            render_sliding_window(events)
+        elif analysis.two_pointers:
+            render_two_pointers(events)
+
+        render(events)
+        if analysis.recursion:
+            render_recursion_tree(events, analysis.recursion_tree)
+        if analysis.coroutines:
+            render_async_timeline(events)
+        if operation_counts is not None:
+            render_operation_counts(operation_counts)
+        if profile is not None:
+            render_profile(profile)
+    elif mode == "html":
+        if output is None:
+            render_html(events)
+        else:
+            render_html(events, output)
+        if analysis.dp and analysis.dp_updates:
+            # Next to the timeline: algo_viz.html -> algo_viz_dp.html
+            base = os.path.splitext(output or "algo_viz.html")[0]
+            render_dp_html(analysis.dp_updates, base + "_dp.html", events)
+
@@ -0,0 +1,118 @@
+# algo_viz/targets.py
+"""
+Resolving "module:function" targets and their JSON arguments.
+
+Shared by the CLI, batch runs and complexity sweeps, where the function to
+trace is named by a string rather than decorated in place.
+"""
+
+import importlib
+import importlib.util
+import json
+import os
+import reprlib
+import sys
+import zlib
+
+_repr = reprlib.Repr()
+_repr.maxstring = 60
+_repr.maxother = 60
+_repr.maxlist = _repr.maxtuple = 20
+
+# Targets resolved in this process, by spec
+_TARGETS = {}
+
+
+def unwrap_visualized(func):
+    """The undecorated function behind any @visualize wrappers"""
+    while getattr(func, "_algo_viz_visualize", False):
+        func = func.__wrapped__
+    return func
+
+
+def load_target(spec):
+    """
+    Resolve "module.path:function" or "path/to/file.py:function" to a callable.
+
+    Functions decorated with @visualize are unwrapped so that the caller does
+    the tracing and rendering itself. A file is executed once per process,
+    as a module with a private name derived from its path, so that a file
+    named like an installed module (heapq.py, random.py) does not shadow it.
+    """
+    module_ref, sep, func_path = spec.rpartition(":")
+    if not sep or not module_ref or not func_path:
+        raise ValueError(f"target must look like 'module:function' or 'file.py:function', got {spec!r}")
+
+    if module_ref.endswith(".py") or os.path.sep in module_ref:
+        path = os.path.abspath(module_ref)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"no such file: {module_ref}")
+        name = f"_algoviz_target_{zlib.crc32(path.encode('utf-8')):08x}"
+        module = sys.modules.get(name)
+        if module is None or getattr(module, "__file__", None) != path:
+            # Let the file import its siblings the way `python file.py` would
+            directory = os.path.dirname(path)
+            if directory not in sys.path:
+                sys.path.insert(0, directory)
+            module_spec = importlib.util.spec_from_file_location(name, path)
+            module = importlib.util.module_from_spec(module_spec)
+            sys.modules[name] = module
+            module_spec.loader.exec_module(module)
+    else:
+        if os.getcwd() not in sys.path:
+            sys.path.insert(0, os.getcwd())
+        module = importlib.import_module(module_ref)
+
+    target = module
+    for attr in func_path.split("."):
+        target = getattr(target, attr)
+    target = unwrap_visualized(target)
+    if not callable(target):
+        raise TypeError(f"{spec} is not callable")
+    return target
+
+
+def resolve_target(target):
+    """
+    The undecorated callable for ``target``, a spec string or a function.
+
+    Specs are loaded once per process, so worker processes running many
+    jobs on one target import it once.
+    """
+    if not isinstance(target, str):
+        return unwrap_visualized(target)
+    func = _TARGETS.get(target)
+    if func is None:
+        func = _TARGETS[target] = load_target(target)
+    return func
+
+
+def short_repr(value):
+    """Repr of an input or result cut to a report line's worth"""
+    return _repr.repr(value)
+
+
+def load_arguments(args_json=None, args_file=None):
+    """
+    Positional and keyword arguments for the target, from JSON.
+
+    A JSON array is passed positionally, an object as keyword arguments and
+    any other value as the single positional argument.
+    """
+    if args_file is not None:
+        with open(args_file, encoding="utf-8") as f:
+            value = json.load(f)
+    elif args_json is not None:
+        value = json.loads(args_json)
+    else:
+        return [], {}
+    return call_arguments(value)
+
+
+def call_arguments(value):
+    """Split one decoded JSON value into (args, kwargs) as described in load_arguments"""
+    if isinstance(value, list):
+        return value, {}
+    if isinstance(value, dict):
+        return [], value
+    return [value], {}
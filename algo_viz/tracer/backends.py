@@ -0,0 +1,368 @@
+# algo_viz/tracer/backends.py
+"""
+Tracing backends that feed interpreter events into an ExecutionTracer.
+
+Both backends translate what the interpreter reports into the same tracer
+hooks (``_on_call``, ``_on_line``, ``_on_return`` and, when read tracking is
+on, ``_on_opcode``), so detectors and renderers see an identical Event stream
+whichever backend is used.
+"""
+
+import dis
+import inspect
+import sys
+import threading
+import weakref
+from _thread import get_ident
+
+# Frames that can suspend; coroutine mode reports them with resume/suspend
+SUSPENDABLE_FLAGS = inspect.CO_GENERATOR | inspect.CO_COROUTINE | inspect.CO_ASYNC_GENERATOR
+
+# Where f_lasti rests when settrace reports a yield/await as "return": the
+# YIELD_VALUE itself, or (3.13+) the RESUME right after it
+_SUSPEND_OPCODES = frozenset(
+    dis.opmap[name] for name in ("YIELD_VALUE", "RESUME") if name in dis.opmap
+)
+# Before 3.11 an await or ``yield from`` suspends in YIELD_FROM, which steps
+# f_lasti back one instruction so that resuming runs it again
+_YIELD_FROM = dis.opmap.get("YIELD_FROM")
+
+
+def _suspends(frame):
+    """Whether a generator/coroutine frame reported as returning is only suspending"""
+    offset = frame.f_lasti
+    if offset <= 0:
+        return False
+    code = frame.f_code.co_code
+    if code[offset] in _SUSPEND_OPCODES:
+        return True
+    return _YIELD_FROM is not None and code[offset + 2:offset + 3] == bytes((_YIELD_FROM,))
+
+
+_OFFSET_LINES = weakref.WeakKeyDictionary()
+
+
+def _offset_lines(code):
+    """{instruction offset: line} of ``code``"""
+    lines = _OFFSET_LINES.get(code)
+    if lines is None:
+        lines = _OFFSET_LINES[code] = {
+            offset: line
+            for start, end, line in code.co_lines()
+            for offset in range(start, end, 2)
+        }
+    return lines
+
+
+class SettraceBackend:
+    """
+    Classic ``sys.settrace`` backend, available on every interpreter.
+
+    With ``tracer.threads`` on, the trace function is also handed to threads
+    started while the trace runs (``threading.settrace``). Such threads can
+    outlive the run (pool workers); they drop their trace function at their
+    next event once the backend is uninstalled.
+    """
+
+    name = "settrace"
+
+    # On 3.12+ settrace runs on top of sys.monitoring, and f_trace_opcodes set
+    # from a "call" event only takes effect once tracing is re-armed
+    _REARM_OPCODES = sys.version_info >= (3, 12)
+    # On 3.13 a code object loses settrace's opcode instrumentation when another
+    # sys.monitoring tool drops its INSTRUCTION events there, while the flag
+    # still reads as set; clearing it first re-instruments the code
+    _RESET_OPCODES = sys.version_info >= (3, 13)
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+        self._rearm_frames = set()
+        self._opcode_codes = set()
+        self._active = False
+
+    def _trace(self, frame, event, arg):
+        if not self._active:
+            sys.settrace(None)
+            return None
+        tracer = self.tracer
+
+        if event == "call":
+            if not tracer._wants_code(frame.f_code) or not tracer._admits_call(frame):
+                # Returning None keeps CPython from line-tracing this frame
+                return None
+            tracer._on_call(frame)
+            if tracer._traces_reads(frame.f_code):
+                if self._RESET_OPCODES and frame.f_code not in self._opcode_codes:
+                    self._opcode_codes.add(frame.f_code)
+                    frame.f_trace_opcodes = False
+                frame.f_trace_opcodes = True
+                if self._REARM_OPCODES:
+                    self._rearm_frames.add(frame)
+            return self._trace
+
+        if event == "line":
+            if self._rearm_frames and frame in self._rearm_frames:
+                self._rearm_frames.discard(frame)
+                frame.f_trace_opcodes = True
+                sys.settrace(self._trace)
+            tracer._on_line(frame)
+        elif event == "opcode":
+            tracer._on_opcode(frame, frame.f_lasti)
+            if tracer.reads_truncated:
+                frame.f_trace_opcodes = False
+        elif event == "return":
+            self._rearm_frames.discard(frame)
+            suspended = (
+                tracer.coroutines
+                and frame.f_code.co_flags & SUSPENDABLE_FLAGS
+                and _suspends(frame)
+            )
+            tracer._on_return(frame, arg, suspended)
+
+        return self._trace
+
+    def install(self, func):
+        self._active = True
+        if self.tracer.threads:
+            threading.settrace(self._trace)
+        sys.settrace(self._trace)
+
+    def uninstall(self):
+        sys.settrace(None)
+        self._active = False
+        if self.tracer.threads:
+            threading.settrace(None)
+        self._rearm_frames.clear()
+        self._opcode_codes.clear()
+
+
+class MonitoringBackend:
+    """
+    PEP 669 ``sys.monitoring`` backend (Python 3.12+).
+
+    Only PY_START is enabled globally. The first time a wanted code object
+    starts, LINE/PY_RETURN are switched on locally for that code object alone;
+    code the tracer does not want gets ``DISABLE`` so the interpreter stops
+    reporting it altogether. Frames of wanted code that are rejected for
+    depth reasons are remembered individually, since DISABLE is per code.
+    With read tracking on, INSTRUCTION events are enabled for code objects
+    that contain subscript reads, and every other instruction is DISABLEd
+    after its first report, so only the subscripts keep calling back.
+
+    sys.monitoring reports LINE only when the line changes, while settrace
+    also reports a backward jump that stays on its line (the loop of an
+    inlined comprehension, ``while x: x -= 1``). JUMP events fill that in
+    the way CPython's own settrace emulation does: every other jump is
+    DISABLEd after its first report.
+
+    DISABLE marks outlive the tool id. Uninstalling therefore switches off
+    this tool's events and re-instruments every code object it touched,
+    which drops its marks and leaves other tools' alone, so the next run
+    sees that code again.
+    """
+
+    name = "monitoring"
+
+    # Tool ids we are willing to borrow, most appropriate first
+    _CANDIDATE_TOOL_IDS = (2, 3, 4)  # PROFILER_ID, then the unassigned ids
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+        self._tool_id = None
+        self._local_codes = set()
+        # Code whose PY_START was DISABLEd, re-instrumented on uninstall
+        self._disabled_codes = set()
+        self._skipped_frames = set()
+        # sys.monitoring is process-wide; unless the tracer follows threads,
+        # only report the thread that started the trace (like settrace)
+        self._thread_ident = None
+
+    @staticmethod
+    def is_available():
+        return hasattr(sys, "monitoring")
+
+    def _acquire_tool_id(self):
+        monitoring = sys.monitoring
+        for tool_id in self._CANDIDATE_TOOL_IDS:
+            if monitoring.get_tool(tool_id) is None:
+                monitoring.use_tool_id(tool_id, "algo_viz")
+                return tool_id
+        raise RuntimeError("No free sys.monitoring tool id for algo_viz")
+
+    def _on_py_start(self, code, instruction_offset):
+        return self._enter(code, sys._getframe(1))
+
+    def _on_py_throw(self, code, instruction_offset, exception):
+        # PY_THROW can only be enabled globally and cannot be DISABLEd
+        self._enter(code, sys._getframe(1))
+
+    def _enter(self, code, frame):
+        """A frame of ``code`` starts, resumes or is thrown into"""
+        if self._thread_ident is not None and get_ident() != self._thread_ident:
+            return None
+        tracer = self.tracer
+        if not tracer._wants_code(code):
+            self._disabled_codes.add(code)
+            return sys.monitoring.DISABLE
+
+        if code not in self._local_codes:
+            events = sys.monitoring.events
+            local_events = (
+                events.LINE | events.JUMP | events.PY_RETURN | events.PY_RESUME | events.PY_YIELD
+            )
+            if tracer._traces_reads(code):
+                local_events |= events.INSTRUCTION
+            sys.monitoring.set_local_events(self._tool_id, code, local_events)
+            self._local_codes.add(code)
+
+        if self._skipped_frames and frame in self._skipped_frames:
+            # Resumed generator that was rejected when it started
+            return None
+        if not tracer._admits_call(frame):
+            self._skipped_frames.add(frame)
+            return None
+        tracer._on_call(frame)
+
+    def _on_line(self, code, line_number):
+        if self._thread_ident is not None and get_ident() != self._thread_ident:
+            return None
+        frame = sys._getframe(1)
+        if self._skipped_frames and frame in self._skipped_frames:
+            return None
+        self.tracer._on_line(frame)
+
+    def _on_jump(self, code, instruction_offset, destination_offset):
+        if destination_offset > instruction_offset:
+            return sys.monitoring.DISABLE
+        lines = _offset_lines(code)
+        if lines.get(destination_offset) != lines.get(instruction_offset):
+            # The LINE event at the destination reports it
+            return sys.monitoring.DISABLE
+        if self._thread_ident is not None and get_ident() != self._thread_ident:
+            return None
+        frame = sys._getframe(1)
+        if self._skipped_frames and frame in self._skipped_frames:
+            return None
+        self.tracer._on_line(frame)
+
+    def _on_instruction(self, code, instruction_offset):
+        if self._thread_ident is not None and get_ident() != self._thread_ident:
+            return None
+        frame = sys._getframe(1)
+        if self._skipped_frames and frame in self._skipped_frames:
+            return None
+        if not self.tracer._on_opcode(frame, instruction_offset):
+            return sys.monitoring.DISABLE
+
+    def _on_py_return(self, code, instruction_offset, retval):
+        if self._thread_ident is not None and get_ident() != self._thread_ident:
+            return None
+        self._leave_frame(sys._getframe(1), retval)
+
+    def _on_py_yield(self, code, instruction_offset, retval):
+        if self._thread_ident is not None and get_ident() != self._thread_ident:
+            return None
+        frame = sys._getframe(1)
+        if self._skipped_frames and frame in self._skipped_frames:
+            # Stays skipped until it finishes
+            return None
+        self.tracer._on_return(frame, retval, self.tracer.coroutines)
+
+    def _on_py_unwind(self, code, instruction_offset, exception):
+        # PY_UNWIND can only be enabled globally, so filter it ourselves
+        if code in self._local_codes and (
+            self._thread_ident is None or get_ident() == self._thread_ident
+        ):
+            self._leave_frame(sys._getframe(1), None)
+
+    def _leave_frame(self, frame, retval):
+        if self._skipped_frames and frame in self._skipped_frames:
+            self._skipped_frames.discard(frame)
+            return
+        self.tracer._on_return(frame, retval)
+
+    def install(self, func):
+        monitoring = sys.monitoring
+        events = monitoring.events
+
+        self._tool_id = self._acquire_tool_id()
+        self._thread_ident = None if self.tracer.threads else get_ident()
+
+        callbacks = {
+            events.PY_START: self._on_py_start,
+            events.PY_RESUME: self._on_py_start,
+            events.PY_THROW: self._on_py_throw,
+            events.LINE: self._on_line,
+            events.JUMP: self._on_jump,
+            events.INSTRUCTION: self._on_instruction,
+            events.PY_RETURN: self._on_py_return,
+            events.PY_YIELD: self._on_py_yield,
+            events.PY_UNWIND: self._on_py_unwind,
+        }
+        for event, callback in callbacks.items():
+            monitoring.register_callback(self._tool_id, event, callback)
+
+        monitoring.set_events(self._tool_id, events.PY_START | events.PY_THROW | events.PY_UNWIND)
+
+    def uninstall(self):
+        if self._tool_id is None:
+            return
+
+        monitoring = sys.monitoring
+        events = monitoring.events
+        monitoring.set_events(self._tool_id, events.NO_EVENTS)
+        for event in (
+            events.PY_START,
+            events.PY_RESUME,
+            events.PY_THROW,
+            events.LINE,
+            events.JUMP,
+            events.INSTRUCTION,
+            events.PY_RETURN,
+            events.PY_YIELD,
+            events.PY_UNWIND,
+        ):
+            monitoring.register_callback(self._tool_id, event, None)
+        # Setting local events re-instruments the code at once; with none of
+        # this tool's events left on, that clears its DISABLE marks. The
+        # callbacks are gone first: that code includes this method.
+        for code in self._local_codes | self._disabled_codes:
+            if code not in self._local_codes:
+                monitoring.set_local_events(self._tool_id, code, events.LINE)
+            monitoring.set_local_events(self._tool_id, code, events.NO_EVENTS)
+        monitoring.free_tool_id(self._tool_id)
+
+        self._local_codes.clear()
+        self._disabled_codes.clear()
+        self._skipped_frames.clear()
+        self._tool_id = None
+        self._thread_ident = None
+
+
+BACKENDS = {
+    SettraceBackend.name: SettraceBackend,
+    MonitoringBackend.name: MonitoringBackend,
+}
+
+
+def resolve_backend(name="auto"):
+    """
+    Return the backend class for ``name``.
+
+    "auto" picks sys.monitoring when the interpreter has it and falls back
+    to sys.settrace otherwise.
+    """
+    if name == "auto":
+        if MonitoringBackend.is_available():
+            return MonitoringBackend
+        return SettraceBackend
+
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Unknown tracer backend {name!r}; expected 'auto' or one of {sorted(BACKENDS)}"
+        )
+
+    backend = BACKENDS[name]
+    if backend is MonitoringBackend and not MonitoringBackend.is_available():
+        raise RuntimeError("The 'monitoring' backend requires Python 3.12+")
+    return backend
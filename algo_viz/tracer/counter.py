@@ -0,0 +1,259 @@
+# algo_viz/tracer/counter.py
+"""
+Exact operation counts, the machine-independent cost of a run.
+
+``OperationCounts`` holds the comparisons, subscript reads/writes and swaps
+of one run, per function and per line. Recording is a single array
+increment per executed operation: every code object gets a preallocated
+``array('q')`` of hits per instruction, and what those instructions are
+(``operation_sites``), where they are (``operation_lines``) and which writes
+complete a swap (``swap_sites``) is only looked up when the counts are read.
+
+Two backend clients fill one in:
+
+- ``OperationCounter`` plugs into the same backends as the ExecutionTracer
+  but records no events at all: it only counts executed lines (steps),
+  calls and operations of the in-scope code. Complexity runs use it.
+- ``CountingClient`` sits in front of an ExecutionTracer
+  (``ExecutionTracer(count_operations=True)``), so a traced run gets the
+  counts alongside its events.
+
+Either way operations are counted at opcode level; on the sys.monitoring
+backend every other instruction is disabled after its first report, so the
+overhead stays close to plain line tracing.
+"""
+
+import os
+from array import array
+from dataclasses import dataclass
+
+from .backends import resolve_backend
+from .opcodes import operation_lines, operation_sites, swap_sites
+
+_TRACER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Default cap on executed lines per run
+DEFAULT_MAX_STEPS = 200_000
+
+# operation_sites() kind -> OperationTally field
+_TALLY_FIELDS = {"comparison": "comparisons", "read": "reads", "write": "writes"}
+
+
+class StepLimitExceeded(Exception):
+    """Raised inside the measured function once it runs more than max_steps lines"""
+
+
+@dataclass
+class OperationTally:
+    """Operations of a run, a function or a line"""
+
+    comparisons: int = 0    # <, ==, is, in, ...
+    reads: int = 0          # a[i], a[i:j]
+    writes: int = 0         # a[i] = x, del a[i], a[i:j] = xs
+    swaps: int = 0          # writes completing an exchange of two elements
+
+    @property
+    def accesses(self):
+        return self.reads + self.writes
+
+    def __iadd__(self, other):
+        self.comparisons += other.comparisons
+        self.reads += other.reads
+        self.writes += other.writes
+        self.swaps += other.swaps
+        return self
+
+
+def _code_of(func):
+    return getattr(func, "__code__", func)
+
+
+class OperationCounts:
+    """Exact operation counts of one run, per function and per line."""
+
+    def __init__(self):
+        self.codes = {}     # code -> (operation sites, hits per instruction)
+
+    def _add(self, code):
+        size = len(code.co_code) // 2
+        entry = self.codes[code] = (operation_sites(code), array("q", bytes(8 * size)))
+        return entry
+
+    def count(self, code, offset):
+        """Count the instruction at ``offset``; False if it is no operation"""
+        entry = self.codes.get(code)
+        if entry is None:
+            entry = self._add(code)
+        if offset not in entry[0]:
+            return False
+        entry[1][offset >> 1] += 1
+        return True
+
+    def _lines_of(self, code):
+        """{line: OperationTally} of one code object, lines that ran only"""
+        tallies = {}
+        entry = self.codes.get(code)
+        if entry is None:
+            return tallies
+        sites, hits = entry
+        lines = operation_lines(code)
+        swaps = swap_sites(code)
+        for offset, kind in sites.items():
+            count = hits[offset >> 1]
+            if not count:
+                continue
+            tally = tallies.get(lines[offset])
+            if tally is None:
+                tally = tallies[lines[offset]] = OperationTally()
+            setattr(tally, _TALLY_FIELDS[kind], getattr(tally, _TALLY_FIELDS[kind]) + count)
+            if offset in swaps:
+                tally.swaps += count
+        return tallies
+
+    def lines(self, func):
+        """``{line: OperationTally}`` of a function (or code object), lines that ran only"""
+        return dict(sorted(self._lines_of(_code_of(func)).items()))
+
+    def function(self, func):
+        """OperationTally of a function or code object (all zero if it never ran)"""
+        total = OperationTally()
+        for tally in self._lines_of(_code_of(func)).values():
+            total += tally
+        return total
+
+    def by_function(self):
+        """``{code: OperationTally}`` of every function that performed an operation"""
+        tallies = {code: self.function(code) for code in self.codes}
+        return {code: tally for code, tally in tallies.items() if any(vars(tally).values())}
+
+    def by_line(self):
+        """``[(code, line, OperationTally)]`` of every line that performed an operation"""
+        return [
+            (code, line, tally)
+            for code in self.codes
+            for line, tally in self.lines(code).items()
+        ]
+
+    def total(self):
+        total = OperationTally()
+        for tally in self.by_function().values():
+            total += tally
+        return total
+
+
+class CountingClient:
+    """
+    Backend client that counts the operations of ``client``'s traced code
+    into ``counts`` and hands every hook on to ``client``.
+
+    Opcode events are enabled wherever there is an operation to count; the
+    client's own ``_on_opcode`` (an ExecutionTracer tracking reads) only sees
+    the code it asked opcode events for.
+    """
+
+    # Counting needs opcode events after the client's read log is full
+    reads_truncated = False
+
+    def __init__(self, client, counts):
+        self.client = client
+        self.counts = counts
+        self._client_opcodes = {}
+        # Bound once; the backends call these on every event
+        self._wants_code = client._wants_code
+        self._admits_call = client._admits_call
+        self._on_call = client._on_call
+        self._on_line = client._on_line
+        self._on_return = client._on_return
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def _traces_reads(self, code):
+        wanted = self._client_opcodes[code] = bool(self.client._traces_reads(code))
+        return wanted or bool(operation_sites(code))
+
+    def _on_opcode(self, frame, offset):
+        counted = self.counts.count(frame.f_code, offset)
+        if self._client_opcodes.get(frame.f_code):
+            return self.client._on_opcode(frame, offset) or counted
+        return counted
+
+
+class OperationCounter:
+    """
+    Counts what one call of a function does.
+
+    Args:
+        backend: "auto" (default), "settrace" or "monitoring"
+        scope: Optional TraceScope limiting which frames are counted
+        max_steps: Abort the run with StepLimitExceeded after this many
+            lines, so an exponential algorithm cannot run away; None for
+            no limit
+    """
+
+    # Backend client flags: one thread, returns are plain returns
+    threads = False
+    coroutines = False
+    reads_truncated = False
+
+    def __init__(self, backend="auto", scope=None, max_steps=DEFAULT_MAX_STEPS):
+        self.backend = resolve_backend(backend)(self)
+        self.scope = scope
+        self.max_steps = max_steps
+        self._scope_cache = {}
+        self.steps = 0
+        self.calls = 0
+        self.operations = OperationCounts()
+
+    @property
+    def counts(self):
+        total = self.operations.total()
+        return {
+            "steps": self.steps,
+            "calls": self.calls,
+            "comparisons": total.comparisons,
+            "list_reads": total.reads,
+            "list_writes": total.writes,
+            "swaps": total.swaps,
+        }
+
+    # -- backend client interface -------------------------------------------
+
+    def _wants_code(self, code):
+        wanted = self._scope_cache.get(code)
+        if wanted is None:
+            wanted = os.path.dirname(code.co_filename) != _TRACER_DIR and (
+                self.scope is None or self.scope.contains(code)
+            )
+            self._scope_cache[code] = wanted
+        return wanted
+
+    def _admits_call(self, frame=None):
+        return True
+
+    def _traces_reads(self, code):
+        return bool(operation_sites(code))
+
+    def _on_call(self, frame):
+        self.calls += 1
+
+    def _on_line(self, frame):
+        self.steps += 1
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise StepLimitExceeded(f"more than {self.max_steps} steps")
+
+    def _on_return(self, frame, value, suspended=False):
+        pass
+
+    def _on_opcode(self, frame, offset):
+        return self.operations.count(frame.f_code, offset)
+
+    # -------------------------------------------------------------------------
+
+    def run(self, func, *args, **kwargs):
+        """Call ``func`` while counting; returns its result"""
+        self.backend.install(func)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.backend.uninstall()
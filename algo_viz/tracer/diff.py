@@ -0,0 +1,328 @@
+# algo_viz/tracer/diff.py
+"""
+Incremental change detection for container locals.
+
+The tracer keeps one private snapshot per tracked container and brings it up
+to date in place, so an unchanged list costs a single C-level comparison per
+line instead of a copy plus a Python-level element loop. When the tracer
+knows which elements a statement wrote (its write sites), the ``*_at``
+variants compare just those, so a flat list, dict or set costs time in
+proportion to what the statement wrote rather than to its size.
+
+Nested lists (``dp[i][j]`` grids) are the exception: their snapshot is a
+persistent image whose nodes are never modified once built. A change copies
+only the path down to it, so unchanged rows stay shared between successive
+images and can be told apart by identity alone.
+
+NumPy arrays are diffed with vectorized comparisons when the traced code has
+imported numpy; this module never imports it itself.
+"""
+
+import operator
+import sys
+
+# Elements compared per slice when narrowing down which part of a list changed
+CHUNK_SIZE = 64
+
+# List levels a nested table is diffed through (dp[i][j][k])
+MAX_TABLE_DEPTH = 3
+
+_MISSING = object()
+
+
+def _differs(a, b):
+    # Same identity-first rule list.__eq__ uses, so NaN and other objects that
+    # are not equal to themselves do not show up as changing on every line
+    return a is not b and a != b
+
+
+def diff_list(snapshot, current, chunk_size=CHUNK_SIZE):
+    """
+    Compare ``snapshot`` against ``current`` and update ``snapshot`` to match.
+
+    Cheap checks come first: equal length plus a C-level ``==`` settles the
+    common unchanged case. Otherwise the list is compared chunk by chunk with
+    slice equality and only differing chunks are scanned element by element.
+
+    Returns a list of (index, old_value, new_value) for indices present in
+    both versions, the same contract the tracer used with full copies.
+    """
+    changes = []
+    for i in changed_indices(snapshot, current, chunk_size):
+        old_v = snapshot[i]
+        new_v = current[i]
+        changes.append((i, old_v, new_v))
+        snapshot[i] = new_v
+
+    if len(snapshot) != len(current):
+        common = min(len(snapshot), len(current))
+        snapshot[common:] = current[common:]
+
+    return changes
+
+
+def diff_list_at(snapshot, current, indices):
+    """
+    ``diff_list`` restricted to ``indices``, the ones a statement may have
+    written (negative ones count from the end of ``current``); the rest of
+    the list is taken to be unchanged and its length is left alone.
+    """
+    common = min(len(snapshot), len(current))
+    positions = set()
+    for index in indices:
+        try:
+            index = operator.index(index)
+        except TypeError:
+            continue
+        if index < 0:
+            index += len(current)
+        if 0 <= index < common:
+            positions.add(index)
+    changes = []
+    for i in sorted(positions):
+        old_v = snapshot[i]
+        new_v = current[i]
+        if _differs(old_v, new_v):
+            changes.append((i, old_v, new_v))
+            snapshot[i] = new_v
+    return changes
+
+
+def changed_indices(old, new, chunk_size=CHUNK_SIZE):
+    """
+    Indices present in both lists whose elements differ, in ascending order.
+
+    The lists are compared chunk by chunk with C-level slice equality
+    (identity-first, like ``list.__eq__``) and only differing chunks are
+    scanned element by element.
+    """
+    if len(old) == len(new) and old == new:
+        return []
+
+    indices = []
+    common = min(len(old), len(new))
+    for start in range(0, common, chunk_size):
+        end = min(start + chunk_size, common)
+        if old[start:end] == new[start:end]:
+            continue
+        for i in range(start, end):
+            if _differs(old[i], new[i]):
+                indices.append(i)
+    return indices
+
+
+def array_type():
+    """``numpy.ndarray`` if numpy has been imported (by the traced code), else None"""
+    numpy = sys.modules.get("numpy")
+    return None if numpy is None else numpy.ndarray
+
+
+def diff_array(snapshot, current, mask=None):
+    """
+    Compare numpy array ``snapshot`` against ``current`` (same shape and
+    dtype) and update ``snapshot`` to match.
+
+    The comparison is one vectorized ``not_equal`` into ``mask``, a
+    preallocated boolean array of the same shape, so an unchanged array costs
+    no allocation; changed positions come from ``flatnonzero``.
+
+    Returns (index, old_value, new_value) with int indices for 1-D arrays and
+    index tuples otherwise; values are converted to Python scalars.
+    """
+    numpy = sys.modules["numpy"]
+    mask = numpy.not_equal(snapshot, current, out=mask)
+    if not mask.any():
+        return []
+
+    changes = []
+    shape = current.shape
+    for flat in numpy.flatnonzero(mask).tolist():
+        old_v = snapshot.item(flat)
+        new_v = current.item(flat)
+        if old_v != old_v and new_v != new_v:
+            # NaN on both sides
+            continue
+        index = flat if len(shape) == 1 else tuple(map(int, numpy.unravel_index(flat, shape)))
+        changes.append((index, old_v, new_v))
+    numpy.copyto(snapshot, current, where=mask)
+    return changes
+
+
+def diff_dict(snapshot, current):
+    """
+    Compare dict ``snapshot`` against ``current`` and update ``snapshot`` to match.
+
+    Length plus a C-level ``==`` settles the unchanged case. Otherwise the
+    changed items are found with C-level item-view set operations, falling
+    back to a key loop when values are unhashable.
+
+    Returns (key, old_value, new_value, deleted) tuples; added keys have an
+    old value of None and removed keys a new value of None.
+    """
+    if len(snapshot) == len(current) and snapshot == current:
+        return []
+
+    changes = []
+    try:
+        changed = current.items() - snapshot.items()
+        if len(changed) > 1:
+            # Report in the dict's own order rather than set order
+            changed = [item for item in current.items() if item in changed]
+    except TypeError:
+        changed = [
+            (key, value)
+            for key, value in current.items()
+            if key not in snapshot or _differs(snapshot[key], value)
+        ]
+    for key, value in changed:
+        changes.append((key, snapshot.get(key), value, False))
+        snapshot[key] = value
+
+    if len(snapshot) != len(current):
+        for key in snapshot.keys() - current.keys():
+            changes.append((key, snapshot.pop(key), None, True))
+
+    return changes
+
+
+def diff_dict_at(snapshot, current, keys):
+    """
+    ``diff_dict`` restricted to ``keys``, the keys a statement may have
+    written or removed; the rest of the dict is taken to be unchanged.
+    """
+    changes = []
+    for key in dict.fromkeys(keys):
+        old = snapshot.get(key, _MISSING)
+        new = dict.get(current, key, _MISSING)
+        if new is _MISSING:
+            if old is not _MISSING:
+                changes.append((key, snapshot.pop(key), None, True))
+        elif old is _MISSING or _differs(old, new):
+            changes.append((key, None if old is _MISSING else old, new, False))
+            snapshot[key] = new
+    return changes
+
+
+def diff_set(snapshot, current):
+    """
+    Compare set ``snapshot`` against ``current`` and update ``snapshot`` to match.
+
+    Returns (added, removed) element lists, both computed with C-level set
+    differences.
+    """
+    if len(snapshot) == len(current) and snapshot == current:
+        return [], []
+
+    added = list(current - snapshot)
+    removed = list(snapshot - current)
+    snapshot.difference_update(removed)
+    snapshot.update(added)
+    return added, removed
+
+
+def diff_set_at(snapshot, current, elements):
+    """
+    ``diff_set`` restricted to ``elements``, the ones a statement may have
+    added or removed; the rest of the set is taken to be unchanged.
+    """
+    added = []
+    removed = []
+    for element in dict.fromkeys(elements):
+        if element in current:
+            if element not in snapshot:
+                added.append(element)
+                snapshot.add(element)
+        elif element in snapshot:
+            removed.append(element)
+            snapshot.discard(element)
+    return added, removed
+
+
+def is_table(value):
+    """Whether ``value`` is a list of lists, diffed cell by cell"""
+    return type(value) is list and bool(value) and type(value[0]) is list
+
+
+def copy_table(value, depth=MAX_TABLE_DEPTH):
+    """Copy the first ``depth`` list levels of ``value``"""
+    if depth > 1 and is_table(value):
+        return [copy_table(row, depth - 1) if type(row) is list else row for row in value]
+    return list(value)
+
+
+def diff_table(image, current, depth=MAX_TABLE_DEPTH, path=(), indices=None):
+    """
+    Compare the persistent image of a nested list against ``current``.
+
+    Only the elements at ``indices`` are compared when given (what a
+    statement may have written), otherwise every element is. Rows of equal
+    length are compared cell by cell; a row whose length changed is
+    reported as one change of the whole row.
+
+    Returns (changes, image): ``changes`` lists (path, old_value, new_value)
+    per changed cell, and ``image`` is a new image sharing every unchanged
+    row with the old one, or the old one itself when nothing changed.
+    """
+    # Lists at the last level are stored as values, not copied further
+    leaf = depth <= 1 or not (is_table(image) or is_table(current))
+    if indices is None:
+        if len(image) == len(current) and image == current:
+            return [], image
+        indices = changed_indices(image, current)
+
+    common = min(len(image), len(current))
+    changes = []
+    new_image = None
+    for index in indices:
+        if not 0 <= index < common:
+            continue
+        old = image[index]
+        new = current[index]
+        if not leaf and type(old) is list and type(new) is list:
+            if len(old) == len(new):
+                row_changes, value = diff_table(old, new, depth - 1, path + (index,))
+                if value is old:
+                    continue
+                changes.extend(row_changes)
+            else:
+                value = copy_table(new, depth - 1)
+                changes.append((path + (index,), old, value))
+        elif _differs(old, new):
+            value = copy_table(new, depth - 1) if not leaf and type(new) is list else new
+            changes.append((path + (index,), old, value))
+        else:
+            continue
+        if new_image is None:
+            new_image = list(image)
+        new_image[index] = value
+
+    if len(image) != len(current):
+        # Rows appended or removed, silent like list appends
+        if new_image is None:
+            new_image = list(image)
+        del new_image[common:]
+        new_image.extend(
+            copy_table(row, depth - 1) if not leaf and type(row) is list else row
+            for row in current[common:]
+        )
+
+    return changes, image if new_image is None else new_image
+
+
+def diff_table_at(image, current, path, depth=MAX_TABLE_DEPTH):
+    """
+    ``diff_table`` restricted to the one element at ``path`` (a tuple of
+    indices valid in ``current``), rebuilding only the image nodes above it.
+    """
+    index = path[0]
+    if len(path) > 1 and depth > 1 and index < len(image):
+        old = image[index]
+        new = current[index]
+        if type(old) is list and type(new) is list and len(old) == len(new):
+            changes, row = diff_table_at(old, new, path[1:], depth - 1)
+            if row is old:
+                return changes, image
+            image = list(image)
+            image[index] = row
+            return [((index,) + cell, old_value, new_value) for cell, old_value, new_value in changes], image
+    return diff_table(image, current, depth, (), (index,))
@@ -0,0 +1,693 @@
+# algo_viz/tracer/opcodes.py
+"""
+Per-code-object index of subscript reads and writes.
+
+CPython does not let a tracer peek at the value stack, so the operands of a
+``BINARY_SUBSCR`` are recovered statically instead: the code object's
+instructions are walked once with a small stack simulation that knows how
+names, constants, arithmetic and nested subscripts build up each operand. The
+result maps the offset of every resolvable read to a ``ReadSite``; at run time
+an opcode event at that offset re-evaluates the (side-effect free) operand
+expressions against the frame to learn exactly which element is being read.
+
+The same walk also collects, per source line, the elements that line may
+change in place (``dp[i][j] = ...``, ``graph[u].append(v)``) as
+``WriteSite``s, so containers are diffed at those elements instead of in
+full. Lines that may change containers in ways no write site describes (a
+call to a user function, a store into an element no name leads to) are
+listed by ``opaque_lines``.
+
+``operation_sites`` is a much simpler index used for counting: the offsets
+of every comparison and every subscript read or write, whatever its operands.
+``swap_sites`` picks out the writes that complete an exchange of two elements,
+``a[i], a[j] = a[j], a[i]`` or the same through a temporary, found by the same
+walk, so swaps are counted exactly without any run-time comparison of values.
+"""
+
+import builtins
+import dis
+import operator
+import weakref
+
+# Names pushed onto the stack by these opcodes; LOAD_FAST_LOAD_FAST pushes two
+_LOAD_NAME_OPS = {
+    "LOAD_FAST",
+    "LOAD_FAST_CHECK",
+    "LOAD_FAST_BORROW",
+    "LOAD_DEREF",
+    "LOAD_NAME",
+    "LOAD_GLOBAL",
+}
+_LOAD_PAIR_OPS = {"LOAD_FAST_LOAD_FAST", "LOAD_FAST_BORROW_LOAD_FAST_BORROW"}
+_LOAD_CONST_OPS = {"LOAD_CONST", "LOAD_SMALL_INT"}
+# Opcodes that leave the simulated stack untouched (PRECALL only sets up the CALL after it)
+_NEUTRAL_OPS = {"NOP", "CACHE", "RESUME", "EXTENDED_ARG", "NOT_TAKEN", "PRECALL"}
+# Attribute/method lookups; one on a table row may mutate it (row.append(x))
+_ATTR_OPS = {"LOAD_ATTR", "LOAD_METHOD"}
+# Calls; their arguments sit on top of the stack, argc of them (the
+# keyword and star forms do not say which entries are arguments)
+_CALL_OPS = {"CALL", "CALL_METHOD", "CALL_FUNCTION"}
+_OTHER_CALL_OPS = {"CALL_KW", "CALL_FUNCTION_KW", "CALL_FUNCTION_EX"}
+# Built-in functions that change none of their arguments
+_PURE_BUILTINS = frozenset({
+    "abs", "all", "any", "bin", "bool", "chr", "dict", "divmod", "enumerate",
+    "filter", "float", "frozenset", "hash", "hex", "id", "int", "isinstance",
+    "iter", "len", "list", "map", "max", "min", "next", "oct", "ord", "pow",
+    "print", "range", "repr", "reversed", "round", "set", "sorted", "str",
+    "sum", "tuple", "type", "zip",
+})
+
+# Arithmetic allowed inside an index; ** and shifts are left out since they
+# can build arbitrarily large numbers
+_BINARY_OPS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "//": operator.floordiv,
+    "%": operator.mod,
+    "&": operator.and_,
+    "|": operator.or_,
+    "^": operator.xor,
+}
+# Pre-3.11 arithmetic opcodes (BINARY_ADD, INPLACE_ADD, ...) by the symbol
+# BINARY_OP shows for them from 3.11 on
+_LEGACY_BINARY_OPS = {}
+for _name, _symbol in [
+    ("ADD", "+"), ("SUBTRACT", "-"), ("MULTIPLY", "*"), ("FLOOR_DIVIDE", "//"),
+    ("MODULO", "%"), ("AND", "&"), ("OR", "|"), ("XOR", "^"), ("TRUE_DIVIDE", "/"),
+    ("POWER", "**"), ("LSHIFT", "<<"), ("RSHIFT", ">>"), ("MATRIX_MULTIPLY", "@"),
+]:
+    _LEGACY_BINARY_OPS["BINARY_" + _name] = _symbol
+    _LEGACY_BINARY_OPS["INPLACE_" + _name] = _symbol + "="
+del _name, _symbol
+# Pre-3.11 rotations: the top of the stack moves down to this position
+_ROTATE_OPS = {"ROT_TWO": 2, "ROT_THREE": 3, "ROT_FOUR": 4}
+_NUMBER_TYPES = (int, float, bool)
+_SEQUENCE_TYPES = (list, tuple, str)
+_CONTAINER_TYPES = (list, tuple, str, dict)
+
+_SITE_CACHE = weakref.WeakKeyDictionary()
+_OPERATION_CACHE = weakref.WeakKeyDictionary()
+
+# Opcodes counted by operation_sites(), by kind
+_COMPARISON_OPS = {"COMPARE_OP", "IS_OP", "CONTAINS_OP"}
+_SUBSCRIPT_WRITE_OPS = {"STORE_SUBSCR", "DELETE_SUBSCR", "STORE_SLICE"}
+# Stores binding one name, the temporary of a swap (tmp = a[i])
+_STORE_NAME_OPS = {"STORE_FAST", "STORE_NAME", "STORE_DEREF", "STORE_GLOBAL"}
+
+_MISSING = object()
+
+
+class _Unresolved(Exception):
+    pass
+
+
+# Simulated stack entries are tuples:
+#   ("name", name) | ("const", value) | ("binop", symbol, left, right)
+#   ("subscr", container, index, offset)
+# and None for anything the simulation does not understand.
+
+
+def _expr_text(expr):
+    kind = expr[0]
+    if kind == "name":
+        return expr[1]
+    if kind == "const":
+        return repr(expr[1])
+    if kind == "binop":
+        left, right = expr[2], expr[3]
+        left_text = _expr_text(left)
+        right_text = _expr_text(right)
+        if left[0] == "binop":
+            left_text = f"({left_text})"
+        if right[0] == "binop":
+            right_text = f"({right_text})"
+        return f"{left_text} {expr[1]} {right_text}"
+    return f"{_expr_text(expr[1])}[{_expr_text(expr[2])}]"
+
+
+def _lookup(name, frame_locals, frame_globals):
+    value = frame_locals.get(name, _MISSING)
+    if value is _MISSING:
+        value = frame_globals.get(name, _MISSING)
+    if value is _MISSING:
+        value = getattr(builtins, name, _MISSING)
+    if value is _MISSING:
+        raise _Unresolved(name)
+    return value
+
+
+def _subscript(container, index):
+    """``container[index]`` restricted to built-in containers (no user __getitem__)"""
+    if type(container) in _SEQUENCE_TYPES:
+        if type(index) not in (int, bool):
+            raise _Unresolved(index)
+        if index < 0:
+            index += len(container)
+        if not 0 <= index < len(container):
+            raise _Unresolved(index)
+        return index, container[index]
+    if type(container) is dict:
+        try:
+            return index, container[index]
+        except (KeyError, TypeError):
+            raise _Unresolved(index) from None
+    raise _Unresolved(container)
+
+
+def _element(container, index):
+    """
+    ``container[index]`` for a list, tuple or dict, dict subclasses included;
+    a missing key raises _Unresolved rather than calling ``__missing__``
+    """
+    if isinstance(container, dict):
+        try:
+            value = dict.get(container, index, _MISSING)
+        except TypeError:
+            raise _Unresolved(index) from None
+        if value is _MISSING:
+            raise _Unresolved(index)
+        return value
+    if type(container) is list or type(container) is tuple:
+        return _subscript(container, index)[1]
+    raise _Unresolved(container)
+
+
+def _evaluate(expr, frame_locals, frame_globals):
+    kind = expr[0]
+    if kind == "name":
+        return _lookup(expr[1], frame_locals, frame_globals)
+    if kind == "const":
+        return expr[1]
+    if kind == "binop":
+        left = _evaluate(expr[2], frame_locals, frame_globals)
+        right = _evaluate(expr[3], frame_locals, frame_globals)
+        if type(left) not in _NUMBER_TYPES or type(right) not in _NUMBER_TYPES:
+            raise _Unresolved(expr[1])
+        try:
+            return _BINARY_OPS[expr[1]](left, right)
+        except ArithmeticError:
+            raise _Unresolved(expr[1]) from None
+    container = _evaluate(expr[1], frame_locals, frame_globals)
+    return _subscript(container, _evaluate(expr[2], frame_locals, frame_globals))[1]
+
+
+class ReadSite:
+    """One element read, e.g. ``dp[i - 1][j]`` compiled to a table name plus index expressions."""
+
+    __slots__ = ("table", "label", "index_exprs")
+
+    def __init__(self, table, label, index_exprs):
+        self.table = table              # name of the container being read
+        self.label = label              # index text, "i - 1" or "i - 1][j"
+        self.index_exprs = index_exprs  # one operand expression per dimension
+
+    def resolve(self, frame_locals, frame_globals):
+        """Return (indices, value) for the read about to happen, or None"""
+        try:
+            value = _lookup(self.table, frame_locals, frame_globals)
+            if type(value) not in _CONTAINER_TYPES:
+                return None
+            indices = []
+            for expr in self.index_exprs:
+                index, value = _subscript(value, _evaluate(expr, frame_locals, frame_globals))
+                indices.append(index)
+        except _Unresolved:
+            return None
+        return tuple(indices), value
+
+
+class WriteSite:
+    """
+    An element some statement may change in place: ``dp[i][j] = v`` the
+    cell ``dp[i][j]``, ``graph[u].append(v)`` the row ``graph[u]``.
+    """
+
+    __slots__ = ("table", "index_exprs", "method", "call", "args")
+
+    def __init__(self, table, index_exprs, method=None, call=False, args=None):
+        self.table = table              # name of the container written
+        self.index_exprs = index_exprs  # path to the element, () for the container, None if unknown
+        self.method = method            # attribute looked up on the element (row.append), None for stores
+        self.call = call                # whether that attribute is called as a method
+        self.args = args                # the call's argument expressions, None if not known
+
+    def resolve(self, table, frame_locals, frame_globals):
+        """Return the path of normalized indices into ``table``, or None"""
+        if self.index_exprs is None:
+            return None
+        path = []
+        value = table
+        try:
+            for expr in self.index_exprs:
+                if type(value) is not list:
+                    return None
+                index, value = _subscript(value, _evaluate(expr, frame_locals, frame_globals))
+                path.append(index)
+        except _Unresolved:
+            return None
+        return tuple(path)
+
+    def locate(self, frame_locals, frame_globals):
+        """
+        Return (container, keys) for what the statement changed: the
+        container holding the element and ``(key,)`` for a store, the
+        element itself and ``()`` for a method call on it or a store over it
+        as a whole (``a[i:j] = xs``). None if the element cannot be found.
+        """
+        if self.index_exprs is None:
+            return None
+        exprs = self.index_exprs
+        if self.method is None and exprs:
+            exprs, last = exprs[:-1], exprs[-1]
+        else:
+            last = None
+        try:
+            value = _lookup(self.table, frame_locals, frame_globals)
+            for expr in exprs:
+                value = _element(value, _evaluate(expr, frame_locals, frame_globals))
+            if last is None:
+                return value, ()
+            return value, (_evaluate(last, frame_locals, frame_globals),)
+        except _Unresolved:
+            return None
+
+    def evaluate_args(self, frame_locals, frame_globals):
+        """The values of the method call's arguments, or None if not known"""
+        if self.args is None:
+            return None
+        try:
+            return [_evaluate(expr, frame_locals, frame_globals) for expr in self.args]
+        except _Unresolved:
+            return None
+
+
+def _make_write_site(node, index=None, method=None, call=False):
+    """
+    WriteSite for ``node[index]``, or for ``node`` itself when the index is
+    unknown or ``method`` is looked up on it, ``node`` being a name or a
+    subscript chain on one.
+    """
+    index_exprs = [] if _contains_unknown(index) else [index]
+    while node is not None and node[0] == "subscr":
+        index_exprs.append(node[2])
+        node = node[1]
+    if node is None or node[0] != "name":
+        return None
+    if any(_contains_unknown(expr) for expr in index_exprs):
+        return WriteSite(node[1], None, method, call)
+    index_exprs.reverse()
+    return WriteSite(node[1], tuple(index_exprs), method, call)
+
+
+def _subscript_opcode(instr):
+    """Whether ``instr`` performs ``TOS1[TOS]`` (BINARY_OP [] on 3.14+)"""
+    if instr.opname == "BINARY_SUBSCR":
+        return True
+    return instr.opname == "BINARY_OP" and instr.argrepr == "[]"
+
+
+def _make_site(node):
+    """Flatten a subscript chain rooted at a plain name into a ReadSite"""
+    index_exprs = []
+    while node is not None and node[0] == "subscr":
+        if node[2] is None:
+            return None
+        index_exprs.append(node[2])
+        node = node[1]
+    if node is None or node[0] != "name" or not index_exprs:
+        return None
+    index_exprs.reverse()
+    label = "][".join(_expr_text(expr) for expr in index_exprs)
+    return ReadSite(node[1], label, tuple(index_exprs))
+
+
+def _contains_unknown(expr):
+    if expr is None:
+        return True
+    kind = expr[0]
+    if kind == "binop":
+        return _contains_unknown(expr[2]) or _contains_unknown(expr[3])
+    if kind == "subscr":
+        return _contains_unknown(expr[1]) or _contains_unknown(expr[2])
+    return False
+
+
+def _shape(expr):
+    """``expr`` without the offsets of its subscripts, to compare two expressions"""
+    kind = expr[0]
+    if kind == "subscr":
+        return ("subscr", _shape(expr[1]), _shape(expr[2]))
+    if kind == "binop":
+        return ("binop", expr[1], _shape(expr[2]), _shape(expr[3]))
+    return expr
+
+
+def _mentions(shape, name):
+    kind = shape[0]
+    if kind == "name":
+        return shape[1] == name
+    if kind == "subscr":
+        return _mentions(shape[1], name) or _mentions(shape[2], name)
+    if kind == "binop":
+        return _mentions(shape[2], name) or _mentions(shape[3], name)
+    return False
+
+
+def _stored_names(instr):
+    """Names an opcode (re)binds, which invalidates what the swap search knows about them"""
+    opname = instr.opname
+    if not opname.startswith(("STORE_", "DELETE_")) or opname in _SUBSCRIPT_WRITE_OPS:
+        return ()
+    if opname in ("STORE_ATTR", "DELETE_ATTR"):
+        return ()
+    if opname == "STORE_FAST_LOAD_FAST":
+        return (instr.argval[0],)
+    if isinstance(instr.argval, tuple):
+        return instr.argval
+    return (instr.argval,)
+
+
+def _instruction_line(instr, line):
+    positions = getattr(instr, "positions", None)
+    if positions is not None and positions.lineno is not None:
+        return positions.lineno
+    starts_line = instr.starts_line
+    if type(starts_line) is int:
+        return starts_line
+    return line
+
+
+def _method_load(instr):
+    """Whether ``instr`` looks up a method to call it (LOAD_ATTR's method form on 3.12+)"""
+    return instr.opname == "LOAD_METHOD" or "NULL|self" in instr.argrepr
+
+
+def _analyze(code):
+    """
+    One stack-simulation walk over ``code``: (read sites, write sites by
+    line, swap offsets, opaque lines).
+    """
+    stack = []
+    candidates = {}
+    writes = {}
+    swaps = set()
+    line = None
+
+    # Swap search within a basic block: names bound to an element read
+    # (tmp = a[i]) as name -> (shape, offset), and the previous element
+    # store as (target shape, stored value shape, offset of the store)
+    bound = {}
+    last_store = None
+
+    # Calls per line, and how many of them call a pure built-in or a method
+    # of a named element (which the method's WriteSite describes)
+    calls = {}
+    covered = {}
+    opaque = set()
+    # Method site whose call has not been reached yet
+    pending = None
+    # Symbol of the in-place operator just run (+=), whose result may be stored next
+    in_place = None
+
+    def write(container, index=None, method=None, call=False):
+        if container is None:
+            return None
+        site = _make_write_site(container, index, method, call)
+        if site is not None:
+            writes.setdefault(line, []).append(site)
+        return site
+
+    # Subscripts whose result is only the container of another subscript
+    # (the dp[i] in dp[i][j], or in dp[i][j] = ...) are not reads of their own
+    inner = set()
+
+    def pop():
+        return stack.pop() if stack else None
+
+    for instr in dis.get_instructions(code):
+        if instr.is_jump_target:
+            stack.clear()
+            bound.clear()
+            last_store = None
+        opname = instr.opname
+        line = _instruction_line(instr, line)
+
+        for name in _stored_names(instr):
+            bound = {
+                key: value
+                for key, value in bound.items()
+                if key != name and not _mentions(value[0], name)
+            }
+            if last_store is not None and (
+                _mentions(last_store[0], name) or _mentions(last_store[1], name)
+            ):
+                last_store = None
+            # Sites are evaluated after the line ran: one whose index the
+            # line rebinds afterwards (a[i] = 0; i += 1) no longer knows it
+            for k, site in enumerate(writes.get(line, ())):
+                if site.index_exprs and any(_mentions(expr, name) for expr in site.index_exprs):
+                    writes[line][k] = WriteSite(site.table, None, site.method, site.call)
+                elif site.args and any(_mentions(expr, name) for expr in site.args):
+                    site.args = None
+        if in_place is not None:
+            if opname in _STORE_NAME_OPS:
+                # ``s ^= t`` may change the container bound to s as a whole
+                write(("name", instr.argval), None, in_place)
+            in_place = None
+        if opname in _STORE_NAME_OPS and stack:
+            value = stack[-1]
+            if value is not None and value[0] == "subscr" and not _contains_unknown(value):
+                bound[instr.argval] = (_shape(value), instr.offset)
+
+        if opname in _LOAD_NAME_OPS:
+            stack.append(("name", instr.argval))
+            if opname in ("LOAD_GLOBAL", "LOAD_NAME") and instr.argval in _PURE_BUILTINS:
+                covered[line] = covered.get(line, 0) + 1
+        elif opname in _LOAD_PAIR_OPS:
+            stack.extend(("name", name) for name in instr.argval)
+        elif opname in _LOAD_CONST_OPS:
+            stack.append(("const", instr.argval))
+        elif _subscript_opcode(instr):
+            index = pop()
+            container = pop()
+            node = None
+            if not _contains_unknown(container) and not _contains_unknown(index):
+                node = ("subscr", container, index, instr.offset)
+                candidates[instr.offset] = node
+                if container[0] == "subscr":
+                    inner.add(container[3])
+            stack.append(node)
+        elif opname == "BINARY_OP" or opname in _LEGACY_BINARY_OPS:
+            right = pop()
+            left = pop()
+            symbol = instr.argrepr if opname == "BINARY_OP" else _LEGACY_BINARY_OPS[opname]
+            if symbol in _BINARY_OPS and left is not None and right is not None:
+                stack.append(("binop", symbol, left, right))
+            else:
+                if symbol.endswith("="):
+                    in_place = symbol
+                stack.append(None)
+        elif opname in ("STORE_SUBSCR", "DELETE_SUBSCR", "STORE_SLICE"):
+            if opname == "STORE_SLICE":
+                pop()
+                pop()
+                index = None
+            else:
+                index = pop()
+            container = pop()
+            value = pop() if opname != "DELETE_SUBSCR" else None
+            if container is not None and container[0] == "subscr":
+                inner.add(container[3])
+            if _contains_unknown(index):
+                # Some element (or slice) of ``container``: a change of it as a whole
+                dunder = "__delitem__" if opname == "DELETE_SUBSCR" else "__setitem__"
+                site = write(container, None, dunder)
+            else:
+                site = write(container, index)
+            if site is None or site.index_exprs is None:
+                opaque.add(line)
+            if opname == "STORE_SUBSCR":
+                last_store = _swap_store(
+                    last_store, container, index, value, bound, instr.offset, swaps
+                )
+        elif opname in _ATTR_OPS:
+            receiver = pop()
+            call = _method_load(instr)
+            site = write(receiver, None, instr.argval, call)
+            if call:
+                if site is not None and site.index_exprs is not None:
+                    covered[line] = covered.get(line, 0) + 1
+                elif receiver is not None and receiver[0] == "const":
+                    # Methods of constants (", ".join) change nothing
+                    covered[line] = covered.get(line, 0) + 1
+                pending = site
+            stack.clear()
+        elif opname in _CALL_OPS or opname in _OTHER_CALL_OPS:
+            calls[line] = calls.get(line, 0) + 1
+            if pending is not None:
+                if (
+                    opname in _CALL_OPS
+                    and len(stack) == instr.arg
+                    and not any(_contains_unknown(arg) for arg in stack)
+                ):
+                    pending.args = tuple(stack)
+                pending = None
+            stack.clear()
+        elif opname == "BUILD_SLICE":
+            for _ in range(instr.arg):
+                pop()
+            stack.append(None)
+        elif opname == "COPY":
+            stack.append(stack[-instr.arg] if len(stack) >= instr.arg else None)
+        elif opname == "DUP_TOP":
+            stack.append(stack[-1] if stack else None)
+        elif opname == "DUP_TOP_TWO":
+            stack.extend(stack[-2:] if len(stack) >= 2 else (None, None))
+        elif opname == "SWAP":
+            if len(stack) >= instr.arg:
+                stack[-1], stack[-instr.arg] = stack[-instr.arg], stack[-1]
+            else:
+                stack.clear()
+        elif opname in _ROTATE_OPS or opname == "ROT_N":
+            depth = instr.arg if opname == "ROT_N" else _ROTATE_OPS[opname]
+            if len(stack) >= depth:
+                top = stack.pop()
+                stack.insert(len(stack) + 1 - depth, top)
+            else:
+                stack.clear()
+        elif opname == "STORE_FAST_LOAD_FAST":
+            pop()
+            stack.append(("name", instr.argval[1]))
+        elif opname not in _NEUTRAL_OPS:
+            # Unknown stack effect: forget everything simulated so far
+            stack.clear()
+
+    sites = {}
+    for offset, node in candidates.items():
+        if offset in inner:
+            continue
+        site = _make_site(node)
+        if site is not None:
+            sites[offset] = site
+    line_writes = {line: tuple(line_writes) for line, line_writes in writes.items()}
+    opaque.update(line for line, count in calls.items() if count > covered.get(line, 0))
+    return sites, line_writes, frozenset(swaps), frozenset(opaque)
+
+
+def _swap_store(last_store, container, index, value, bound, offset, swaps):
+    """
+    Note the element store ``container[index] = value`` at ``offset`` for the
+    swap search; it completes a swap when the previous store wrote the element
+    whose old value this one stores, and vice versa. That old value must have
+    been read before the previous store, directly or through a temporary.
+    Returns the new ``last_store``.
+    """
+    if container is None or index is None or value is None:
+        return None
+    target = ("subscr", container, index)
+    if _contains_unknown(target):
+        return None
+    target = _shape(target)
+    if value[0] == "name" and value[1] in bound:
+        stored, read_at = bound[value[1]]
+    elif value[0] == "subscr" and not _contains_unknown(value):
+        stored, read_at = _shape(value), value[3]
+    else:
+        return None
+    if (
+        last_store is not None
+        and last_store[0] == stored
+        and last_store[1] == target
+        and stored != target
+        and read_at < last_store[2]
+    ):
+        swaps.add(offset)
+        return None
+    return target, stored, offset
+
+
+def build_read_sites(code):
+    """Map instruction offsets of ``code`` to the ReadSite each subscript performs."""
+    return _analyze(code)[0]
+
+
+def build_write_sites(code):
+    """Map source lines of ``code`` to the WriteSites of the elements they may change in place."""
+    return _analyze(code)[1]
+
+
+def _sites(code):
+    try:
+        return _SITE_CACHE[code]
+    except KeyError:
+        sites = _SITE_CACHE[code] = _analyze(code)
+        return sites
+
+
+def read_sites(code):
+    """build_read_sites() memoized per code object"""
+    return _sites(code)[0]
+
+
+def write_sites(code):
+    """build_write_sites() memoized per code object"""
+    return _sites(code)[1]
+
+
+def opaque_lines(code):
+    """
+    Source lines of ``code`` that may change containers in ways their write
+    sites do not describe: they call code other than pure built-ins and
+    methods of named elements, or store into an element no name leads to
+    (``self.items[i] = x``). Memoized per code object.
+    """
+    return _sites(code)[3]
+
+
+def swap_sites(code):
+    """
+    Offsets of the element stores of ``code`` that complete a swap (the
+    second store of ``a[i], a[j] = a[j], a[i]``). Memoized per code object.
+    """
+    return _sites(code)[2]
+
+
+def _operations(code):
+    try:
+        return _OPERATION_CACHE[code]
+    except KeyError:
+        pass
+    sites = {}
+    lines = {}
+    line = None
+    for instr in dis.get_instructions(code):
+        opname = instr.opname
+        line = _instruction_line(instr, line)
+        if opname in _COMPARISON_OPS:
+            sites[instr.offset] = "comparison"
+        elif _subscript_opcode(instr) or opname == "BINARY_SLICE":
+            sites[instr.offset] = "read"
+        elif opname in _SUBSCRIPT_WRITE_OPS:
+            sites[instr.offset] = "write"
+        else:
+            continue
+        lines[instr.offset] = line
+    operations = _OPERATION_CACHE[code] = (sites, lines)
+    return operations
+
+
+def operation_sites(code):
+    """
+    Map instruction offsets of ``code`` to the operation each performs.
+
+    Kinds are "comparison" (``<``, ``==``, ``is``, ``in``, ...), "read"
+    (``a[i]``, ``a[i:j]``) and "write" (``a[i] = x``, ``del a[i]``,
+    ``a[i:j] = xs``). Memoized per code object.
+    """
+    return _operations(code)[0]
+
+
+def operation_lines(code):
+    """Map the offsets of operation_sites() to their source lines"""
+    return _operations(code)[1]
@@ -0,0 +1,232 @@
+# algo_viz/tracer/profiler.py
+"""
+Per-line timings for traced code.
+
+A ``ProfilingClient`` sits between a backend and the ExecutionTracer and
+timestamps every hook with ``perf_counter_ns``. The time from the end of one
+hook to the start of the next is what the traced code itself spent, and it
+is charged to the line that was running: the last line event of the
+innermost traced frame (self time - traced callees are charged to their own
+lines, untraced ones to the calling line). What the tracer does inside its
+hooks is thereby excluded; what remains is the interpreter's cost of
+reaching a hook, calibrated once per backend by tracing a trivial loop and
+subtracted from every interval.
+
+Times and hit counts live in two preallocated ``array('q')`` per code
+object, indexed by line offset, so recording is two array stores.
+"""
+
+import statistics
+import threading
+from array import array
+from time import perf_counter_ns
+
+from .backends import resolve_backend
+
+# Line events sampled when calibrating a backend
+CALIBRATION_EVENTS = 4000
+
+# Backend name -> calibrated overhead in ns per event, once per process
+_OVERHEAD = {}
+
+
+class CodeLines:
+    """Time (ns) and hits per line of one code object"""
+
+    __slots__ = ("code", "first", "hits", "times")
+
+    def __init__(self, code):
+        lines = [line for _, _, line in code.co_lines() if line is not None]
+        self.code = code
+        self.first = min(lines, default=code.co_firstlineno)
+        size = max(lines, default=self.first) - self.first + 1
+        self.hits = array("q", bytes(8 * size))
+        self.times = array("q", bytes(8 * size))
+
+    def lines(self):
+        """(line, hits, ns) of every line that ran"""
+        first = self.first
+        return [
+            (first + offset, hits, self.times[offset])
+            for offset, hits in enumerate(self.hits)
+            if hits
+        ]
+
+    @property
+    def total_ns(self):
+        return sum(self.times)
+
+
+class LineProfile:
+    """Per-line timings of one traced run, keyed by code object."""
+
+    def __init__(self, overhead_ns=0):
+        self.codes = {}
+        self.overhead_ns = overhead_ns  # subtracted from every measured interval
+
+    def lines_of(self, code):
+        entry = self.codes.get(code)
+        if entry is None:
+            entry = self.codes[code] = CodeLines(code)
+        return entry
+
+    @property
+    def total_ns(self):
+        return sum(entry.total_ns for entry in self.codes.values())
+
+    def hottest(self):
+        """``(code, line, hits, ns)`` of every line that ran, most time first"""
+        rows = [
+            (entry.code, line, hits, ns)
+            for entry in self.codes.values()
+            for line, hits, ns in entry.lines()
+        ]
+        rows.sort(key=lambda row: row[3], reverse=True)
+        return rows
+
+
+class _ThreadClock:
+    __slots__ = ("entry", "offset", "last", "stack")
+
+    def __init__(self):
+        self.entry = None   # CodeLines of the running line, None between frames
+        self.offset = 0
+        self.last = None    # when the previous hook returned
+        self.stack = []     # callers' (entry, offset), innermost last
+
+
+class ProfilingClient:
+    """
+    Backend client that times the hooks of ``tracer`` into ``profile``.
+
+    Every other attribute the backends read (``threads``, ``coroutines``,
+    ``reads_truncated``, ``_wants_code``, ...) is the tracer's own.
+    """
+
+    def __init__(self, tracer, profile):
+        self.tracer = tracer
+        self.profile = profile
+        self._local = threading.local()
+
+    def __getattr__(self, name):
+        return getattr(self.tracer, name)
+
+    def _clock(self):
+        try:
+            return self._local.clock
+        except AttributeError:
+            clock = self._local.clock = _ThreadClock()
+            return clock
+
+    def _charge(self, clock, now):
+        """Charge the time since the previous hook to the running line"""
+        if clock.entry is not None and clock.last is not None:
+            elapsed = now - clock.last - self.profile.overhead_ns
+            if elapsed > 0:
+                clock.entry.times[clock.offset] += elapsed
+
+    def _on_call(self, frame):
+        now = perf_counter_ns()
+        clock = self._clock()
+        self._charge(clock, now)
+        clock.stack.append((clock.entry, clock.offset))
+        clock.entry = None
+        self.tracer._on_call(frame)
+        clock.last = perf_counter_ns()
+
+    def _on_line(self, frame):
+        now = perf_counter_ns()
+        clock = self._clock()
+        self._charge(clock, now)
+        entry = clock.entry
+        code = frame.f_code
+        if entry is None or entry.code is not code:
+            entry = clock.entry = self.profile.lines_of(code)
+        offset = clock.offset = frame.f_lineno - entry.first
+        if 0 <= offset < len(entry.hits):
+            entry.hits[offset] += 1
+        else:
+            clock.entry = None
+        self.tracer._on_line(frame)
+        clock.last = perf_counter_ns()
+
+    def _on_return(self, frame, value, suspended=False):
+        now = perf_counter_ns()
+        clock = self._clock()
+        self._charge(clock, now)
+        clock.entry, clock.offset = clock.stack.pop() if clock.stack else (None, 0)
+        self.tracer._on_return(frame, value, suspended)
+        clock.last = perf_counter_ns()
+
+    def _on_opcode(self, frame, offset):
+        now = perf_counter_ns()
+        clock = self._clock()
+        self._charge(clock, now)
+        result = self.tracer._on_opcode(frame, offset)
+        clock.last = perf_counter_ns()
+        return result
+
+
+class _IntervalRecorder(ProfilingClient):
+    """ProfilingClient keeping every raw interval instead of summing them"""
+
+    def __init__(self, tracer):
+        super().__init__(tracer, LineProfile())
+        self.intervals = []
+
+    def _charge(self, clock, now):
+        if clock.entry is not None and clock.last is not None:
+            self.intervals.append(now - clock.last)
+
+
+# Traced when calibrating; compiled outside the package so the tracer takes it
+_CALIBRATION_SOURCE = """
+def calibration_loop(n):
+    x = 0
+    for i in range(n):
+        x = i
+    return x
+"""
+
+
+def _calibration_loop():
+    namespace = {}
+    exec(compile(_CALIBRATION_SOURCE, "<algo_viz calibration>", "exec"), namespace)
+    return namespace["calibration_loop"]
+
+
+def calibrate(backend="auto"):
+    """
+    Interpreter overhead in ns of reaching one tracer hook on ``backend``.
+
+    A trivial loop is traced by a real ExecutionTracer; the median time
+    between two of its hooks minus the loop's untraced time per line is the
+    overhead. Using the real tracer matters: its hooks evict caches and make
+    the interpreter sync frame locals, and both slow down the code between
+    hooks. Medians keep GC pauses and other noise out. Cached per backend
+    for the life of the process.
+    """
+    from .tracer import ExecutionTracer
+
+    backend_class = resolve_backend(backend)
+    cached = _OVERHEAD.get(backend_class.name)
+    if cached is not None:
+        return cached
+
+    loop = _calibration_loop()
+    iterations = CALIBRATION_EVENTS // 2
+    rounds = []
+    for _ in range(3):
+        start = perf_counter_ns()
+        loop(iterations)
+        plain = (perf_counter_ns() - start) / CALIBRATION_EVENTS
+
+        tracer = ExecutionTracer(backend=backend_class.name, threads=False, coroutines=False)
+        recorder = _IntervalRecorder(tracer)
+        tracer.backend = backend_class(recorder)
+        tracer.run(loop, iterations)
+        if recorder.intervals:
+            rounds.append(max(0, int(statistics.median(recorder.intervals) - plain)))
+
+    _OVERHEAD[backend_class.name] = int(statistics.median(rounds)) if rounds else 0
+    return _OVERHEAD[backend_class.name]
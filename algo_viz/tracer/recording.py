@@ -0,0 +1,372 @@
+# algo_viz/tracer/recording.py
+"""
+Binary trace files.
+
+A recorded trace lets a run be analysed and rendered again without
+re-executing the algorithm. Layout (all integers little-endian)::
+
+    header     MAGIC, format version, record size            (16 bytes)
+    events     one fixed-width record per event               (RECORD)
+    heap       length-prefixed, JSON-encoded values, uncapped (values.dumps)
+    snapshots  (base id, heap offset) pairs, int64            (SnapshotStore)
+    footer     JSON: section offsets, event type names, interned names, threads
+    trailer    footer offset (int64) + MAGIC                  (16 bytes)
+
+Records reference names by id and values by heap offset (-1 for None), so
+the event table stays fixed width. The writer streams records to the file
+while the trace runs and keeps the heap in a temporary file until ``close``.
+``open_trace`` maps the file with ``mmap`` and exposes it as a read-only
+EventStore: nothing is decoded until an event is actually looked at.
+"""
+
+import json
+import mmap
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from functools import lru_cache
+
+from .snapshots import SnapshotStore
+from .store import EVENT_TYPES, EventStore, event_type_code
+from .values import dumps, loads
+
+MAGIC = b"ALGOVIZ\x00"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<8sHH4x")
+_TRAILER = struct.Struct("<q8s")
+# event type, thread, line, depth, function id, variable id, old value, new value, extras
+RECORD = struct.Struct("<BxHiiiiqqq")
+_LENGTH = struct.Struct("<I")
+
+_NO_VALUE = -1
+
+# Scalars worth de-duplicating in the heap (loop counters, short strings, ...)
+_DEDUP_TYPES = (int, float, bool, str)
+_DEDUP_LIMIT = 100_000
+
+
+class TraceFormatError(ValueError):
+    """Raised when a file is not a readable algo_viz trace"""
+
+
+class TraceWriter:
+    """
+    Streams an EventStore to a trace file.
+
+    Call ``flush(events)`` as often as convenient while the store grows (only
+    rows added since the previous flush are written) and ``close(events)``
+    once at the end.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.rows_written = 0
+        self.snapshots_written = 0
+        self._file = open(path, "wb")
+        self._file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, RECORD.size))
+        self._heap = tempfile.TemporaryFile()
+        self._heap_size = 0
+        self._dedup = {}
+        # Extras dict last written and its heap offset: the events of one line share one
+        self._last_extras = (None, _NO_VALUE)
+        self._snapshot_table = array("q")
+
+    def _put(self, value):
+        """Append ``value`` to the heap and return its offset"""
+        if value is None:
+            return _NO_VALUE
+
+        key = None
+        if type(value) in _DEDUP_TYPES and (type(value) is not str or len(value) <= 64):
+            key = (type(value), value)
+            offset = self._dedup.get(key)
+            if offset is not None:
+                return offset
+
+        payload = dumps(value)
+        offset = self._heap_size
+        self._heap.write(_LENGTH.pack(len(payload)))
+        self._heap.write(payload)
+        self._heap_size += _LENGTH.size + len(payload)
+
+        if key is not None and len(self._dedup) < _DEDUP_LIMIT:
+            self._dedup[key] = offset
+        return offset
+
+    def flush(self, events):
+        """Write the events and snapshots added to ``events`` since the last flush"""
+        put = self._put
+        pack = RECORD.pack
+        extras = events._extras
+        last_extras, extras_offset = self._last_extras
+        chunk = []
+        for row in range(self.rows_written, len(events)):
+            row_extras = extras.get(row)
+            if row_extras is not last_extras:
+                last_extras = row_extras
+                extras_offset = put(row_extras) if row_extras else _NO_VALUE
+            chunk.append(
+                pack(
+                    events._types[row],
+                    events._threads[row],
+                    events._lines[row],
+                    events._depths[row],
+                    events._funcs[row],
+                    events._vars[row],
+                    put(events._old_values[row]),
+                    put(events._new_values[row]),
+                    extras_offset,
+                )
+            )
+        self._file.write(b"".join(chunk))
+        self.rows_written = len(events)
+        self._last_extras = (last_extras, extras_offset)
+
+        snapshots = events.snapshots
+        for snapshot_id in range(self.snapshots_written, len(snapshots)):
+            base, entries = snapshots.export_changes(snapshot_id)
+            self._snapshot_table.append(_NO_VALUE if base is None else base)
+            self._snapshot_table.append(put(entries))
+        self.snapshots_written = len(snapshots)
+
+    def close(self, events):
+        """Flush what is left and write the heap, snapshot table and footer"""
+        self.flush(events)
+
+        heap_offset = self._file.tell()
+        self._heap.seek(0)
+        shutil.copyfileobj(self._heap, self._file)
+        self._heap.close()
+
+        snapshot_offset = self._file.tell()
+        table = self._snapshot_table
+        if sys.byteorder != "little":
+            table.byteswap()
+        self._file.write(table.tobytes())
+
+        footer = {
+            "version": FORMAT_VERSION,
+            "events": [_HEADER.size, self.rows_written],
+            "heap": heap_offset,
+            "snapshots": [snapshot_offset, self.snapshots_written],
+            "event_types": list(EVENT_TYPES),
+            "names": list(events._names),
+            "threads": [list(thread) for thread in events.threads],
+        }
+        footer_offset = self._file.tell()
+        self._file.write(json.dumps(footer, separators=(",", ":")).encode("utf-8"))
+        self._file.write(_TRAILER.pack(footer_offset, MAGIC))
+        self._file.close()
+
+    def abort(self):
+        """Stop writing without finishing the file (it is left unreadable)"""
+        self._heap.close()
+        self._file.close()
+
+
+def write_trace(events, path):
+    """Write an existing EventStore to ``path`` in one go"""
+    writer = TraceWriter(path)
+    writer.close(events)
+    return path
+
+
+class _RecordColumn:
+    """One field of the mmapped event table, read without copying the table"""
+
+    def __init__(self, table, count, field, translate=None):
+        self._table = table
+        self._count = count
+        self._field = field
+        self._translate = translate
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, row):
+        value = RECORD.unpack_from(self._table, row * RECORD.size)[self._field]
+        return value if self._translate is None else self._translate[value]
+
+    def __iter__(self):
+        field = self._field
+        translate = self._translate
+        for record in RECORD.iter_unpack(self._table):
+            yield record[field] if translate is None else translate[record[field]]
+
+
+class _ValueColumn(_RecordColumn):
+    def __init__(self, table, count, field, load_value):
+        super().__init__(table, count, field)
+        self._load_value = load_value
+
+    def __getitem__(self, row):
+        return self._load_value(super().__getitem__(row))
+
+    def __iter__(self):
+        load_value = self._load_value
+        for offset in super().__iter__():
+            yield load_value(offset)
+
+
+class _ExtrasColumn(_ValueColumn):
+    """Stands in for EventStore._extras (a row -> dict mapping)"""
+
+    def get(self, row, default=None):
+        if not 0 <= row < self._count:
+            return default
+        extras = self[row]
+        return default if extras is None else extras
+
+
+class _SnapshotBases:
+    def __init__(self, table):
+        self._table = table
+
+    def __len__(self):
+        return len(self._table) // 2
+
+    def __getitem__(self, snapshot_id):
+        base = self._table[2 * snapshot_id]
+        return None if base == _NO_VALUE else base
+
+
+class _SnapshotChanges:
+    def __init__(self, table, load_value):
+        self._table = table
+        self._load_value = load_value
+
+    def __len__(self):
+        return len(self._table) // 2
+
+    def __getitem__(self, snapshot_id):
+        entries = self._load_value(self._table[2 * snapshot_id + 1])
+        return SnapshotStore.changes_from_entries(entries)
+
+
+class RecordedTrace(EventStore):
+    """
+    A trace file opened for replay.
+
+    Behaves like the EventStore the trace was recorded from (iteration,
+    indexing, ``iter_rows``, ``locals_snapshot``), so detectors, analyzers
+    and renderers accept it unchanged. It is read-only.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self._fh = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._fh.close()
+            raise TraceFormatError(f"{path} is empty, not an algo_viz trace") from None
+        try:
+            self._load()
+        except Exception:
+            self.close()
+            raise
+
+    def _load(self):
+        data = self._mmap
+        if len(data) < _HEADER.size + _TRAILER.size:
+            raise TraceFormatError(f"{self.path} is too short to be an algo_viz trace")
+        magic, version, record_size = _HEADER.unpack_from(data, 0)
+        footer_offset, trailer_magic = _TRAILER.unpack_from(data, len(data) - _TRAILER.size)
+        if magic != MAGIC or trailer_magic != MAGIC:
+            raise TraceFormatError(f"{self.path} is not an algo_viz trace (or was not closed)")
+        if version != FORMAT_VERSION or record_size != RECORD.size:
+            raise TraceFormatError(
+                f"{self.path} uses trace format {version}; this version reads {FORMAT_VERSION}"
+            )
+
+        footer = json.loads(bytes(data[footer_offset:len(data) - _TRAILER.size]))
+        self.footer = footer
+        self._view = memoryview(data)
+        events_offset, count = footer["events"]
+        table = self._view[events_offset:events_offset + count * RECORD.size]
+        self._table = table
+        heap_offset = footer["heap"]
+
+        @lru_cache(maxsize=4096)
+        def load_value(offset):
+            if offset == _NO_VALUE:
+                return None
+            start = heap_offset + offset
+            (length,) = _LENGTH.unpack_from(data, start)
+            start += _LENGTH.size
+            return loads(data[start:start + length])
+
+        # Event type codes are per process; map the file's to ours
+        type_codes = [event_type_code(name) for name in footer["event_types"]]
+
+        self._types = _RecordColumn(table, count, 0, type_codes)
+        self._threads = _RecordColumn(table, count, 1)
+        self._lines = _RecordColumn(table, count, 2)
+        self._depths = _RecordColumn(table, count, 3)
+        self._funcs = _RecordColumn(table, count, 4)
+        self._vars = _RecordColumn(table, count, 5)
+        self._old_values = _ValueColumn(table, count, 6, load_value)
+        self._new_values = _ValueColumn(table, count, 7, load_value)
+        self._extras = _ExtrasColumn(table, count, 8, load_value)
+        # Rows are written in merged order, so the sequence is the row number
+        self._seqs = range(count)
+        self.threads = [tuple(thread) for thread in footer["threads"]]
+        self._names = footer["names"]
+        self._name_ids = {name: name_id for name_id, name in enumerate(self._names)}
+
+        snapshot_offset, snapshot_count = footer["snapshots"]
+        snapshot_table = self._view[snapshot_offset:snapshot_offset + 16 * snapshot_count]
+        if sys.byteorder == "little":
+            snapshot_table = snapshot_table.cast("q")
+        else:
+            snapshot_table = array("q", snapshot_table)
+            snapshot_table.byteswap()
+        self._snapshot_table = snapshot_table
+        self.snapshots = SnapshotStore.replay(
+            _SnapshotBases(snapshot_table), _SnapshotChanges(snapshot_table, load_value)
+        )
+
+    def add(self, *args, **kwargs):
+        raise TypeError("Recorded traces are read-only")
+
+    def iter_rows(self):
+        names = self._names
+        types = EVENT_TYPES
+        type_codes = self._types._translate
+        load_value = self._old_values._load_value
+        for type_code, _, line, depth, func_id, var_id, old, new, _ in RECORD.iter_unpack(self._table):
+            yield (
+                types[type_codes[type_code]],
+                None if line == _NO_VALUE else line,
+                None if func_id == _NO_VALUE else names[func_id],
+                None if var_id == _NO_VALUE else names[var_id],
+                load_value(old),
+                load_value(new),
+                None if depth == _NO_VALUE else depth,
+            )
+
+    def close(self):
+        """Release the mapping; events read earlier stay valid"""
+        for name in ("_snapshot_table", "_table", "_view"):
+            view = self.__dict__.pop(name, None)
+            if isinstance(view, memoryview):
+                view.release()
+        if getattr(self, "_mmap", None) is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_trace(path):
+    """Open a trace file written by TraceWriter / ExecutionTracer(record=...)"""
+    return RecordedTrace(path)
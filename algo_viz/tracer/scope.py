@@ -0,0 +1,108 @@
+# algo_viz/tracer/scope.py
+"""
+Scope filters that decide which frames the tracer follows.
+
+Frames outside the scope are rejected at call time, so the interpreter never
+line-traces them (settrace gets ``None`` back, sys.monitoring gets DISABLE).
+"""
+
+import os
+import sys
+import sysconfig
+
+_PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _default_excluded_paths():
+    """Standard library, site-packages and algo_viz itself"""
+    paths = {_PACKAGE_DIR + os.sep}
+    for key in ("stdlib", "platstdlib", "purelib", "platlib"):
+        path = sysconfig.get_paths().get(key)
+        if path:
+            paths.add(os.path.abspath(path) + os.sep)
+    return tuple(sorted(paths))
+
+
+def _nested_codes(code):
+    """Yield ``code`` and every code object defined inside it (lambdas, comprehensions, closures)"""
+    yield code
+    for const in code.co_consts:
+        if hasattr(const, "co_code"):
+            yield from _nested_codes(const)
+
+
+class TraceScope:
+    """
+    Describes which code the tracer should follow.
+
+    A frame is in scope when its code object is one of ``codes`` (or nested
+    inside one of them), or its file belongs to one of ``modules`` or starts
+    with one of ``path_prefixes``. When none of those allow-lists are given,
+    everything except ``exclude_paths`` (stdlib, site-packages and algo_viz
+    by default) is in scope. ``max_depth`` caps how deep traced calls nest.
+    """
+
+    def __init__(
+        self,
+        codes=None,
+        modules=None,
+        path_prefixes=None,
+        max_depth=None,
+        exclude_paths=None,
+    ):
+        self.codes = set()
+        for code in codes or ():
+            code = getattr(code, "__code__", code)
+            self.codes.update(_nested_codes(code))
+        self.modules = list(modules or ())
+        self.path_prefixes = [os.path.abspath(p) for p in path_prefixes or ()]
+        self.max_depth = max_depth
+        self.exclude_paths = (
+            _default_excluded_paths()
+            if exclude_paths is None
+            else tuple(os.path.abspath(p) for p in exclude_paths)
+        )
+        self._allowed_paths = None
+
+    @classmethod
+    def for_function(cls, func, **kwargs):
+        """Scope covering ``func`` and the rest of the module it was defined in"""
+        modules = kwargs.pop("modules", None) or [getattr(func, "__module__", None)]
+        return cls(codes=[func], modules=[m for m in modules if m], **kwargs)
+
+    @property
+    def has_allow_list(self):
+        return bool(self.codes or self.modules or self.path_prefixes)
+
+    def _resolve_allowed_paths(self):
+        """Turn the module allow-list into file paths (packages become directory prefixes)"""
+        paths = list(self.path_prefixes)
+        for name in self.modules:
+            module = sys.modules.get(name)
+            filename = getattr(module, "__file__", None)
+            if not filename:
+                continue
+            filename = os.path.abspath(filename)
+            if os.path.basename(filename) == "__init__.py":
+                paths.append(os.path.dirname(filename) + os.sep)
+            else:
+                paths.append(filename)
+        return tuple(paths)
+
+    def contains(self, code):
+        """Whether frames running ``code`` are in scope"""
+        if code in self.codes:
+            return True
+
+        filename = code.co_filename
+        if not filename.startswith("<"):
+            filename = os.path.abspath(filename)
+
+        if self.has_allow_list:
+            if self._allowed_paths is None:
+                self._allowed_paths = self._resolve_allowed_paths()
+            return filename.startswith(self._allowed_paths)
+
+        if filename.startswith("<frozen"):
+            return False
+        return not filename.startswith(self.exclude_paths)
@@ -0,0 +1,456 @@
+# algo_viz/tracer/snapshots.py
+"""
+Delta-encoded locals snapshots.
+
+Instead of a full ``dict`` copy per container write, the tracer hands each
+frame's locals to a SnapshotStore once per line that changed a list, dict or
+set. The store keeps one materialized state per live frame and records only
+what changed since that frame's previous snapshot: rebound names, and for
+lists, dicts, sets and numpy arrays the individual elements that were
+written, added or removed. Flat lists, dicts and sets are not compared at
+all: the tracer logs the indices and keys it saw change, and the store looks
+at those only. Every ``KEYFRAME_INTERVAL`` snapshots of a frame a full
+keyframe is stored so that reconstruction never replays long chains. Frames
+holding large containers keyframe less often, so that keyframes stay in
+proportion to the deltas between them; the keyframe's copies double as the
+frame's state, copied again only when a delta first updates them in place.
+
+Nested tables (``dp[i][j]``) arrive as the tracer's persistent images, which
+are shared rather than copied; the cells that changed are found by comparing
+two images, whose unchanged rows are shared.
+
+Snapshots are rebuilt on demand; containers are copied at snapshot time (by
+the deltas), so a reconstructed snapshot shows their contents as they were at
+that step, not as they ended up.
+"""
+
+from .diff import array_type, changed_indices, diff_array, diff_dict, diff_list
+
+# Snapshots per frame between two full keyframes
+KEYFRAME_INTERVAL = 32
+
+# Delta marker for a name that is no longer bound
+_DELETED = object()
+
+
+class _Element:
+    """
+    Delta entry: ``name[index] = value`` on a list or dict carried over from
+    the base state (``value`` is _DELETED for a removed dict key). On a set,
+    ``index`` is an element added (``value`` True) or removed (_DELETED).
+    """
+
+    __slots__ = ("index", "value")
+
+    def __init__(self, index, value):
+        self.index = index
+        self.value = value
+
+
+class _Tail:
+    """Delta entry: a list carried over from the base state cut to ``length`` elements, then extended by ``items``"""
+
+    __slots__ = ("length", "items")
+
+    def __init__(self, length, items):
+        self.length = length
+        self.items = items
+
+
+class _Cell:
+    """Delta entry: the cell (or whole row) at ``path`` of a nested table set to ``value``"""
+
+    __slots__ = ("path", "value")
+
+    def __init__(self, path, value):
+        self.path = path
+        self.value = value
+
+
+class _FrameState:
+    __slots__ = ("values", "keyframe", "last_id", "since_keyframe", "interval", "tables", "logs")
+
+    def __init__(self):
+        self.values = {}
+        self.keyframe = {}          # changes of the last keyframe, sharing containers with values
+        self.last_id = None
+        self.since_keyframe = 0
+        self.interval = 0
+        self.tables = frozenset()   # names whose values are table images
+        self.logs = {}              # name -> (change log, entries of it already applied)
+
+
+def _copy_value(value):
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, set):
+        return set(value)
+    ndarray = array_type()
+    if ndarray is not None and isinstance(value, ndarray):
+        return value.copy()
+    return value
+
+
+def _element_count(value, table=False):
+    """Elements a keyframe copies for ``value``: cells of a table image, items of a container"""
+    if table:
+        return sum(len(row) if type(row) is list else 1 for row in value)
+    if isinstance(value, (list, dict, set)):
+        return len(value)
+    ndarray = array_type()
+    if ndarray is not None and isinstance(value, ndarray):
+        return value.size
+    return 1
+
+
+def _logged_changes(old, value, keys):
+    """
+    Bring the stored list, dict or set ``old`` up to date with ``value`` at
+    the logged ``keys``; returns (key, delta entry) pairs. None when ``old``
+    cannot be caught up that way (another kind of container, or changes
+    that went unlogged), so that ``value`` has to be stored whole.
+    """
+    if isinstance(value, list) and isinstance(old, list):
+        common = min(len(old), len(value))
+        changes = []
+        for index in sorted(set(keys)):
+            if index < common:
+                old[index] = value[index]
+                changes.append((index, _Element(index, old[index])))
+        if len(old) != len(value):
+            del old[common:]
+            old.extend(value[common:])
+            changes.append((_Tail, _Tail(common, value[common:])))
+        return changes
+    if isinstance(value, dict) and isinstance(old, dict):
+        elements = []
+        for key in dict.fromkeys(keys):
+            new = dict.get(value, key, _DELETED)
+            if new is _DELETED:
+                if key in old:
+                    del old[key]
+                    elements.append((key, _DELETED))
+            else:
+                old[key] = new
+                elements.append((key, new))
+    elif isinstance(value, set) and isinstance(old, set):
+        elements = []
+        for element in dict.fromkeys(keys):
+            if element in value:
+                if element not in old:
+                    old.add(element)
+                    elements.append((element, True))
+            elif element in old:
+                old.discard(element)
+                elements.append((element, _DELETED))
+    else:
+        return None
+    if len(old) != len(value):
+        return None
+    return [(key, _Element(key, new)) for key, new in elements]
+
+
+def _table_cells(old, new, path=()):
+    """(path, value) for every cell that differs between two table images"""
+    if len(old) != len(new):
+        return [(path, new)]
+    cells = []
+    for index in changed_indices(old, new):
+        old_value = old[index]
+        new_value = new[index]
+        if type(old_value) is list and type(new_value) is list:
+            cells.extend(_table_cells(old_value, new_value, path + (index,)))
+        else:
+            cells.append((path + (index,), new_value))
+    return cells
+
+
+def _assign_path(node, path, value, owned):
+    """Set ``node[path]``, copying each shared list on the way down (``owned`` maps id -> own copy)"""
+    if id(node) not in owned:
+        node = list(node)
+        owned[id(node)] = node
+    if len(path) == 1:
+        node[path[0]] = value
+    else:
+        node[path[0]] = _assign_path(node[path[0]], path[1:], value, owned)
+    return node
+
+
+def _own(state, name):
+    """The frame's value of ``name``, copied first if it is still the keyframe's container"""
+    value = state.values[name]
+    if value is state.keyframe.get(name):
+        value = state.values[name] = _copy_value(value)
+    return value
+
+
+class SnapshotStore:
+    """Keyframes plus per-step deltas of frame locals, shared across events."""
+
+    def __init__(self, keyframe_interval=KEYFRAME_INTERVAL):
+        self.keyframe_interval = keyframe_interval
+        # Per snapshot id: (base id or None for keyframes, changes dict)
+        self._bases = []
+        self._changes = []
+        self._frames = {}
+        # Most recently reconstructed snapshot, the usual base for the next one
+        self._cached_id = None
+        self._cached = None
+
+    def __len__(self):
+        return len(self._bases)
+
+    def take(self, frame_key, locals_now, tables=None, logs=None):
+        """
+        Record ``locals_now`` for ``frame_key`` and return the snapshot id.
+
+        ``tables`` maps names bound to nested tables to (image, previous
+        image, cell changes): the persistent image stored in place of the
+        live table, plus its last change as reported by ``diff_table``,
+        which spares comparing the two images when the frame's previous
+        snapshot holds the previous image.
+
+        ``logs`` maps names bound to flat lists, dicts and sets to the
+        tracer's change log of that container, the index or key of every
+        change it reported in order. Only the keys logged since the frame's previous snapshot are
+        looked at, instead of comparing the whole container.
+        """
+        state = self._frames.get(frame_key)
+        if state is None:
+            state = self._frames[frame_key] = _FrameState()
+        tables = tables or {}
+        logs = logs or {}
+        ndarray = array_type()
+
+        values = state.values
+        if state.last_id is None or state.since_keyframe >= state.interval:
+            # The keyframe's containers double as the frame's state until a
+            # delta first updates them in place (see _own)
+            changes = {
+                name: tables[name][0] if name in tables else _copy_value(value)
+                for name, value in locals_now.items()
+            }
+            state.values = dict(changes)
+            state.keyframe = changes
+            base = None
+            state.since_keyframe = 0
+            elements = sum(_element_count(value, name in tables) for name, value in changes.items())
+            state.interval = max(self.keyframe_interval, elements // self.keyframe_interval)
+        else:
+            changes = {}
+            for name, value in locals_now.items():
+                old = values.get(name, _DELETED)
+                if name in tables:
+                    image, previous, last_cells = tables[name]
+                    if name in state.tables and old is not image:
+                        if old is previous and len(old) == len(image):
+                            cells = [(path, new) for path, _, new in last_cells]
+                        else:
+                            cells = _table_cells(old, image)
+                        if cells and not cells[0][0]:
+                            changes[name] = image
+                        else:
+                            for path, new in cells:
+                                changes[(name, path)] = _Cell(path, new)
+                    elif name not in state.tables:
+                        changes[name] = image
+                    values[name] = image
+                elif name in state.tables:
+                    # No longer a table: rebound, stored whole
+                    values[name] = _copy_value(value)
+                    changes[name] = _copy_value(value)
+                elif name in logs:
+                    elements = None
+                    seen = state.logs.get(name)
+                    if seen is not None and seen[0] is logs[name]:
+                        keys = seen[0][seen[1]:]
+                        if keys or len(old) != len(value):
+                            elements = _logged_changes(_own(state, name), value, keys)
+                        else:
+                            elements = ()
+                    if elements is None:
+                        values[name] = _copy_value(value)
+                        changes[name] = _copy_value(value)
+                    else:
+                        for key, change in elements:
+                            changes[(name, key)] = change
+                elif isinstance(value, list):
+                    if isinstance(old, list) and len(old) == len(value):
+                        try:
+                            if old != value:
+                                for index, _, new in diff_list(_own(state, name), value):
+                                    changes[(name, index)] = _Element(index, new)
+                            continue
+                        except Exception:
+                            # Elements whose comparison raises; store the whole list
+                            pass
+                    values[name] = list(value)
+                    changes[name] = list(value)
+                elif isinstance(value, dict):
+                    if isinstance(old, dict):
+                        try:
+                            for key, _, new, deleted in diff_dict(_own(state, name), value):
+                                changes[(name, key)] = _Element(key, _DELETED if deleted else new)
+                            continue
+                        except Exception:
+                            pass
+                    values[name] = dict(value)
+                    changes[name] = dict(value)
+                elif ndarray is not None and (isinstance(value, ndarray) or isinstance(old, ndarray)):
+                    if (
+                        isinstance(value, ndarray)
+                        and isinstance(old, ndarray)
+                        and old.shape == value.shape
+                        and old.dtype == value.dtype
+                    ):
+                        try:
+                            for index, _, new in diff_array(_own(state, name), value):
+                                changes[(name, index)] = _Element(index, new)
+                            continue
+                        except Exception:
+                            pass
+                    values[name] = _copy_value(value)
+                    changes[name] = _copy_value(value)
+                elif old is _DELETED or (old is not value and old != value):
+                    values[name] = _copy_value(value)
+                    changes[name] = _copy_value(value)
+            for name in [name for name in values if name not in locals_now]:
+                del values[name]
+                changes[name] = _DELETED
+            base = state.last_id
+            state.since_keyframe += 1
+        state.tables = frozenset(tables)
+        state.logs = {name: (log, len(log)) for name, log in logs.items()}
+
+        snapshot_id = len(self._bases)
+        self._bases.append(base)
+        self._changes.append(changes)
+        state.last_id = snapshot_id
+        return snapshot_id
+
+    @classmethod
+    def replay(cls, bases, changes):
+        """
+        Read-only store over recorded tables: ``bases[i]`` is the base id of
+        snapshot ``i`` (None for keyframes) and ``changes[i]`` its changes as
+        produced by ``changes_from_entries`` (may be a lazy sequence).
+        """
+        store = cls()
+        store._bases = bases
+        store._changes = changes
+        return store
+
+    def export_changes(self, snapshot_id):
+        """Return (base id, entries) for ``snapshot_id``, entries being plain lists"""
+        entries = []
+        for key, change in self._changes[snapshot_id].items():
+            if isinstance(change, _Cell):
+                entries.append(["cell", key[0], list(change.path), change.value])
+            elif isinstance(change, _Tail):
+                entries.append(["tail", key[0], change.length, change.items])
+            elif isinstance(change, _Element):
+                if change.value is _DELETED:
+                    entries.append(["delelem", key[0], change.index])
+                else:
+                    entries.append(["elem", key[0], change.index, change.value])
+            elif change is _DELETED:
+                entries.append(["del", key])
+            else:
+                entries.append(["set", key, change])
+        return self._bases[snapshot_id], entries
+
+    @staticmethod
+    def changes_from_entries(entries):
+        """Inverse of ``export_changes``' entries"""
+        changes = {}
+        for entry in entries:
+            op, name = entry[0], entry[1]
+            if op == "cell":
+                path = tuple(entry[2])
+                changes[(name, path)] = _Cell(path, entry[3])
+            elif op == "elem":
+                changes[(name, entry[2])] = _Element(entry[2], entry[3])
+            elif op == "tail":
+                changes[(name, _Tail)] = _Tail(entry[2], entry[3])
+            elif op == "delelem":
+                changes[(name, entry[2])] = _Element(entry[2], _DELETED)
+            elif op == "del":
+                changes[name] = _DELETED
+            else:
+                changes[name] = entry[2]
+        return changes
+
+    def absorb(self, other):
+        """
+        Append the snapshots of ``other`` (e.g. another thread's store) and
+        return the offset to add to its snapshot ids.
+        """
+        offset = len(self._bases)
+        self._bases.extend(None if base is None else base + offset for base in other._bases)
+        self._changes.extend(other._changes)
+        return offset
+
+    def release(self, frame_key):
+        """Forget the live state of a finished frame (its snapshots stay readable)"""
+        self._frames.pop(frame_key, None)
+
+    def locals_at(self, snapshot_id):
+        """
+        Rebuild the locals recorded as ``snapshot_id``.
+
+        Returns a fresh dict; containers in it must be treated as read-only since
+        they can be shared with other reconstructed snapshots.
+        """
+        if snapshot_id == self._cached_id:
+            return dict(self._cached)
+
+        # Walk back to a keyframe, or to the snapshot reconstructed last
+        chain = []
+        current = snapshot_id
+        while current is not None and current != self._cached_id:
+            chain.append(current)
+            current = self._bases[current]
+
+        if current is None:
+            values = {}
+        else:
+            values = dict(self._cached)
+
+        copied = set()
+        owned = {}
+        for step in reversed(chain):
+            for key, change in self._changes[step].items():
+                if isinstance(change, _Cell):
+                    name = key[0]
+                    values[name] = _assign_path(values[name], change.path, change.value, owned)
+                elif isinstance(change, (_Element, _Tail)):
+                    name = key[0]
+                    if name not in copied:
+                        # Copy on write: the container may be shared with an older snapshot
+                        values[name] = _copy_value(values[name])
+                        copied.add(name)
+                    container = values[name]
+                    if isinstance(change, _Tail):
+                        del container[change.length:]
+                        container.extend(change.items)
+                    elif isinstance(container, set):
+                        if change.value is _DELETED:
+                            container.discard(change.index)
+                        else:
+                            container.add(change.index)
+                    elif change.value is _DELETED:
+                        container.pop(change.index, None)
+                    else:
+                        container[change.index] = change.value
+                elif change is _DELETED:
+                    values.pop(key, None)
+                else:
+                    values[key] = change
+                    copied.discard(key)
+
+        self._cached_id = snapshot_id
+        self._cached = values
+        return dict(values)
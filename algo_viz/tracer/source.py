@@ -0,0 +1,175 @@
+# algo_viz/tracer/source.py
+"""
+Per-code-object source line tables.
+
+Each traced code object gets a table, built once from the AST of its source
+file, that maps a line number to what lives on that line: the statement kind,
+the full logical statement (even when it spans several lines) and, for loop
+headers, the first statement of the loop body. The tracer's hot path is then a
+single dict lookup instead of re-reading and string-matching source lines.
+"""
+
+import ast
+import linecache
+import textwrap
+import weakref
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+_LOOP_KINDS = ("for", "while")
+
+_KIND_BY_NODE = {
+    ast.For: "for",
+    ast.AsyncFor: "for",
+    ast.While: "while",
+    ast.If: "if",
+    ast.With: "with",
+    ast.AsyncWith: "with",
+    ast.Try: "try",
+    ast.ExceptHandler: "except",
+    ast.FunctionDef: "def",
+    ast.AsyncFunctionDef: "def",
+    ast.ClassDef: "class",
+    ast.Assign: "assign",
+    ast.AugAssign: "augassign",
+    ast.AnnAssign: "assign",
+    ast.Return: "return",
+    ast.Expr: "expr",
+}
+
+
+@dataclass(frozen=True)
+class LineInfo:
+    kind: str                  # statement kind, e.g. "assign", "for", "decorator"
+    lineno: int                # first line of the statement
+    statement: str             # full logical statement (header only for compound statements)
+    body_line: Optional[int]   # loop headers: line of the first body statement
+    source_line: str           # statement list writes seen on this line are attributed to
+
+
+# filename -> {line: LineInfo}; code objects share their file's table
+_FILE_TABLES: Dict[str, Dict[int, LineInfo]] = {}
+_CODE_TABLES = weakref.WeakKeyDictionary()
+
+
+def _slice(line, start=None, end=None):
+    # AST column offsets count UTF-8 bytes, not characters
+    return line.encode("utf-8")[start:end].decode("utf-8", "replace")
+
+
+def _segment(node, source_lines):
+    """Exact source text of ``node`` (which may span several lines)"""
+    lines = source_lines[node.lineno - 1:node.end_lineno]
+    if not lines:
+        return ""
+    if len(lines) == 1:
+        return _slice(lines[0], node.col_offset, node.end_col_offset).strip()
+    lines = list(lines)
+    lines[0] = _slice(lines[0], node.col_offset)
+    lines[-1] = _slice(lines[-1], None, node.end_col_offset)
+    return "".join(lines).strip()
+
+
+def _statement_text(node, source_lines):
+    """Source of a statement; compound statements contribute their header only"""
+    body = getattr(node, "body", None)
+    if isinstance(body, list) and body and isinstance(body[0], ast.stmt):
+        first = body[0]
+        if first.lineno == node.lineno:
+            # One-line compound statement, e.g. "for x in xs: total += x"
+            line = source_lines[node.lineno - 1]
+            return _slice(line, node.col_offset, first.col_offset).strip()
+        header = source_lines[node.lineno - 1:first.lineno - 1]
+        return " ".join(part.strip() for part in header if part.strip())
+
+    return _segment(node, source_lines)
+
+
+def _header_end(node):
+    """Last line belonging to a statement's own text (not its body)"""
+    body = getattr(node, "body", None)
+    if isinstance(body, list) and body and isinstance(body[0], ast.stmt):
+        return max(node.lineno, body[0].lineno - 1)
+    return node.end_lineno
+
+
+def build_line_table(tree, source_lines, line_offset=0):
+    """Map every line of ``tree`` to the innermost statement covering it."""
+    table = {}
+
+    # ast.walk visits parents before children, so inner statements overwrite
+    # the header ranges of the compound statements that contain them
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.stmt, ast.ExceptHandler)):
+            continue
+
+        kind = _KIND_BY_NODE.get(type(node), type(node).__name__.lower())
+        statement = _statement_text(node, source_lines)
+        body_line = None
+        source_line = statement
+
+        if kind in _LOOP_KINDS and node.body:
+            first = node.body[0]
+            body_line = first.lineno + line_offset
+            source_line = _statement_text(first, source_lines)
+
+        info = LineInfo(kind, node.lineno + line_offset, statement, body_line, source_line)
+        for line in range(node.lineno, _header_end(node) + 1):
+            table[line + line_offset] = info
+
+        for decorator in getattr(node, "decorator_list", ()):
+            text = "@" + _segment(decorator, source_lines)
+            decorator_info = LineInfo(
+                "decorator", decorator.lineno + line_offset, text, None, text
+            )
+            for line in range(decorator.lineno, decorator.end_lineno + 1):
+                table[line + line_offset] = decorator_info
+
+    return table
+
+
+def _file_table(filename):
+    table = _FILE_TABLES.get(filename)
+    if table is None:
+        source_lines = linecache.getlines(filename)
+        try:
+            table = build_line_table(ast.parse("".join(source_lines)), source_lines)
+        except (SyntaxError, ValueError):
+            table = {}
+        _FILE_TABLES[filename] = table
+    return table
+
+
+def _code_block_table(code):
+    """Fallback for files that do not parse as a whole: parse just the code's own block"""
+    import inspect
+
+    try:
+        block, start = inspect.getsourcelines(code)
+    except (OSError, TypeError):
+        return {}
+    block = textwrap.dedent("".join(block)).splitlines(keepends=True)
+    try:
+        return build_line_table(ast.parse("".join(block)), block, line_offset=start - 1)
+    except (SyntaxError, ValueError):
+        return {}
+
+
+def line_table(code):
+    """Return the {line: LineInfo} table for ``code``, building it on first use."""
+    try:
+        return _CODE_TABLES[code]
+    except KeyError:
+        pass
+
+    table = _file_table(code.co_filename)
+    if code.co_firstlineno not in table:
+        table = _code_block_table(code)
+    _CODE_TABLES[code] = table
+    return table
+
+
+def clear_cache():
+    """Forget all tables (e.g. after source files were edited)"""
+    _FILE_TABLES.clear()
+    _CODE_TABLES.clear()
@@ -0,0 +1,290 @@
+# algo_viz/tracer/store.py
+"""
+Columnar event storage.
+
+Events are kept in parallel typed arrays (event-type codes, line numbers,
+depths, interned function/variable name ids) with the rich old/new values in
+side tables. Iterating yields small slot-based row views, so existing code
+written against ``Event`` attributes keeps working unchanged.
+"""
+
+import heapq
+from array import array
+
+from .snapshots import SnapshotStore
+
+# Event type names by code; new types are registered on first use
+EVENT_TYPES = ["line", "var_change", "call", "return"]
+_TYPE_CODES = {name: code for code, name in enumerate(EVENT_TYPES)}
+
+# Sentinel stored in the integer columns for a missing (None) value
+_NONE = -1
+
+_VIEW_FIELDS = (
+    "event_type",
+    "line_no",
+    "func_name",
+    "var_name",
+    "old_value",
+    "new_value",
+    "depth",
+)
+
+
+def event_type_code(event_type):
+    """Return the integer code for ``event_type``, registering it if new"""
+    code = _TYPE_CODES.get(event_type)
+    if code is None:
+        code = len(EVENT_TYPES)
+        EVENT_TYPES.append(event_type)
+        _TYPE_CODES[event_type] = code
+    return code
+
+
+class EventView:
+    """Lightweight read-only view of one row of an EventStore."""
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store, row):
+        self._store = store
+        self._row = row
+
+    @property
+    def event_type(self):
+        return EVENT_TYPES[self._store._types[self._row]]
+
+    @property
+    def line_no(self):
+        line = self._store._lines[self._row]
+        return None if line == _NONE else line
+
+    @property
+    def func_name(self):
+        return self._store._name(self._store._funcs[self._row])
+
+    @property
+    def var_name(self):
+        return self._store._name(self._store._vars[self._row])
+
+    @property
+    def old_value(self):
+        return self._store._old_values[self._row]
+
+    @property
+    def new_value(self):
+        return self._store._new_values[self._row]
+
+    @property
+    def depth(self):
+        depth = self._store._depths[self._row]
+        return None if depth == _NONE else depth
+
+    @property
+    def thread(self):
+        """Index of the traced thread into ``EventStore.threads`` (0: the caller's)"""
+        return self._store._threads[self._row]
+
+    @property
+    def thread_id(self):
+        threads = self._store.threads
+        thread = self._store._threads[self._row]
+        return threads[thread][0] if thread < len(threads) else None
+
+    @property
+    def thread_name(self):
+        threads = self._store.threads
+        thread = self._store._threads[self._row]
+        return threads[thread][1] if thread < len(threads) else None
+
+    @property
+    def seq(self):
+        """Position of the event in the tracer's global order across threads"""
+        return self._store._seqs[self._row]
+
+    def __getattr__(self, name):
+        # Optional per-event attributes (locals_snapshot, source_line, ...)
+        extras = self._store._extras.get(self._row)
+        if extras is not None:
+            if name in extras:
+                return extras[name]
+            if name == "locals_snapshot" and "snapshot_id" in extras:
+                return self._store.snapshots.locals_at(extras["snapshot_id"])
+        raise AttributeError(name)
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in _VIEW_FIELDS)
+        return f"EventView({fields})"
+
+
+class EventStore:
+    """Append-only, column-oriented sequence of trace events."""
+
+    def __init__(self):
+        self._types = array("b")
+        self._lines = array("i")
+        self._depths = array("i")
+        self._funcs = array("i")
+        self._vars = array("i")
+        self._threads = array("H")
+        self._seqs = array("q")
+        self._old_values = []
+        self._new_values = []
+        self._extras = {}
+        self._names = []
+        self._name_ids = {}
+        # Delta-encoded locals referenced by "snapshot_id" extras
+        self.snapshots = SnapshotStore()
+        # (ident, name) of each traced thread, indexed by the thread column
+        self.threads = []
+        # Per-trace memo for derived results (e.g. the fused analysis)
+        self.cache = {}
+
+    def _intern(self, name):
+        if name is None:
+            return _NONE
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = len(self._names)
+            self._names.append(name)
+            self._name_ids[name] = name_id
+        return name_id
+
+    def _name(self, name_id):
+        return None if name_id == _NONE else self._names[name_id]
+
+    def add(
+        self,
+        event_type,
+        line_no,
+        func_name,
+        var_name,
+        old_value,
+        new_value,
+        depth=None,
+        extras=None,
+        thread=0,
+        seq=None,
+    ):
+        """Append one event and return its row index"""
+        row = len(self._types)
+        self._types.append(event_type_code(event_type))
+        self._lines.append(_NONE if line_no is None else line_no)
+        self._depths.append(_NONE if depth is None else depth)
+        self._funcs.append(self._intern(func_name))
+        self._vars.append(self._intern(var_name))
+        self._threads.append(thread)
+        self._seqs.append(row if seq is None else seq)
+        self._old_values.append(old_value)
+        self._new_values.append(new_value)
+        if extras:
+            self._extras[row] = extras
+        return row
+
+    def append(self, event):
+        """Append an ``Event`` (or any object with the same attributes)"""
+        extras = {
+            name: value
+            for name, value in getattr(event, "__dict__", {}).items()
+            if name not in _VIEW_FIELDS
+        }
+        return self.add(
+            event.event_type,
+            event.line_no,
+            event.func_name,
+            event.var_name,
+            event.old_value,
+            event.new_value,
+            event.depth,
+            extras,
+        )
+
+    def extend(self, events):
+        for event in events:
+            self.append(event)
+
+    def __len__(self):
+        return len(self._types)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [EventView(self, row) for row in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("event index out of range")
+        return EventView(self, index)
+
+    def __iter__(self):
+        for row in range(len(self._types)):
+            yield EventView(self, row)
+
+    def __bool__(self):
+        return len(self._types) > 0
+
+    def iter_rows(self):
+        """
+        Yield plain tuples in ``Event`` field order, without creating views.
+
+        This is the fast path for analyses that only need the core fields.
+        """
+        names = self._names
+        types = EVENT_TYPES
+        for type_code, line, func_id, var_id, old_v, new_v, depth in zip(
+            self._types,
+            self._lines,
+            self._funcs,
+            self._vars,
+            self._old_values,
+            self._new_values,
+            self._depths,
+        ):
+            yield (
+                types[type_code],
+                None if line == _NONE else line,
+                None if func_id == _NONE else names[func_id],
+                None if var_id == _NONE else names[var_id],
+                old_v,
+                new_v,
+                None if depth == _NONE else depth,
+            )
+
+    def extras(self, row):
+        """Optional attributes attached to ``row`` (empty dict if none)"""
+        return self._extras.get(row, {})
+
+
+def merge_stores(stores):
+    """
+    Merge per-thread EventStores into one, ordered by their ``seq`` column.
+
+    Each input must already be in ``seq`` order (true for a tracer's
+    per-thread buffers). Snapshot ids in extras are renumbered into the
+    merged store's SnapshotStore.
+    """
+    merged = EventStore()
+    offsets = [merged.snapshots.absorb(store.snapshots) for store in stores]
+
+    def rows(index, store):
+        for row, seq in enumerate(store._seqs):
+            yield seq, index, row
+
+    for seq, index, row in heapq.merge(*(rows(i, store) for i, store in enumerate(stores))):
+        store = stores[index]
+        extras = store._extras.get(row)
+        if extras and offsets[index] and "snapshot_id" in extras:
+            extras = dict(extras, snapshot_id=extras["snapshot_id"] + offsets[index])
+        line, depth = store._lines[row], store._depths[row]
+        merged.add(
+            EVENT_TYPES[store._types[row]],
+            None if line == _NONE else line,
+            store._name(store._funcs[row]),
+            store._name(store._vars[row]),
+            store._old_values[row],
+            store._new_values[row],
+            None if depth == _NONE else depth,
+            extras,
+            store._threads[row],
+            seq,
+        )
+    return merged
@@ -1,170 +1,841 @@
 # algo_viz/tracer/tracer.py
 
+import inspect
+import itertools
+import os
 import sys
-import dis
-from .events import Event
+import threading
+import types
+from .backends import SUSPENDABLE_FLAGS, resolve_backend
+from .counter import CountingClient, OperationCounts
+from .diff import (
+    array_type,
+    changed_indices,
+    copy_table,
+    diff_array,
+    diff_dict,
+    diff_dict_at,
+    diff_list,
+    diff_list_at,
+    diff_set,
+    diff_set_at,
+    diff_table,
+    diff_table_at,
+    is_table,
+)
+from .opcodes import opaque_lines, read_sites, write_sites
+from .profiler import LineProfile, ProfilingClient, calibrate
+from .recording import TraceWriter, write_trace
+from .source import line_table
+from .store import EventStore, merge_stores
+
+# The tracer must never trace itself (e.g. the backend's uninstall call)
+_TRACER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Upper bound on recorded subscript reads per trace when track_reads is on
+DEFAULT_MAX_READS = 100_000
+
+# Events buffered in memory between two writes to a recording
+RECORD_FLUSH_EVERY = 10_000
+
+_ASYNC_FLAGS = inspect.CO_COROUTINE | inspect.CO_ASYNC_GENERATOR
+
+# Mutable containers diffed element by element instead of as whole values;
+# numpy arrays join them once the traced code has imported numpy
+_CONTAINER_TYPES = (list, dict, set)
+
+# What a method called on (or an augmented assignment to) a list, dict or
+# set may change, by name:
+#   "read"  nothing
+#   "key"   the element its first argument names, added or removed
+#   "tail"  the list's length, growing or shrinking it at the end only
+#           (pop only when called without arguments)
+# Any other method may change any element; the container is diffed in full.
+_LIST_METHODS = {
+    "copy": "read",
+    "count": "read",
+    "index": "read",
+    "append": "tail",
+    "extend": "tail",
+    "pop": "tail",
+    "+=": "tail",
+}
+_DICT_METHODS = {
+    "copy": "read",
+    "elements": "read",
+    "get": "read",
+    "items": "read",
+    "keys": "read",
+    "most_common": "read",
+    "total": "read",
+    "values": "read",
+    "pop": "key",
+    "setdefault": "key",
+}
+_SET_METHODS = {
+    "copy": "read",
+    "difference": "read",
+    "intersection": "read",
+    "isdisjoint": "read",
+    "issubset": "read",
+    "issuperset": "read",
+    "symmetric_difference": "read",
+    "union": "read",
+    "add": "key",
+    "discard": "key",
+    "remove": "key",
+}
+
+
+def _copy_container(value):
+    if isinstance(value, list):
+        return copy_table(value) if is_table(value) else list(value)
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, set):
+        return set(value)
+    return value.copy()
+
+
+def _array_mask(array):
+    """Preallocated comparison buffer for diffing ``array``"""
+    return sys.modules["numpy"].empty(array.shape, dtype=bool)
+
+
+def _method_kind(container, method):
+    if isinstance(container, list):
+        return _LIST_METHODS.get(method)
+    if isinstance(container, dict):
+        return _DICT_METHODS.get(method)
+    if isinstance(container, set):
+        return _SET_METHODS.get(method)
+    return None
+
+
+def _inert(value):
+    """Whether calling methods of ``value`` can change no container but ``value`` itself"""
+    if isinstance(value, types.ModuleType):
+        return value is sys.modules.get("math")
+    return type(value).__module__ in ("builtins", "collections")
+
+
+def _value_changed(old, new):
+    try:
+        return bool(old != new)
+    except Exception:
+        # No single truth value, e.g. a numpy array compared elementwise
+        return old is not new
+
+
+class _Writes:
+    """What the statement last run may have changed in one flat list, dict or set"""
+
+    __slots__ = ("keys", "tail", "whole")
+
+    def __init__(self, whole=False):
+        self.keys = []      # list indices, dict keys or set elements it wrote, added or removed
+        self.tail = False   # it appended to or popped from the end of the list
+        self.whole = whole  # anything else: diff the container in full
+
+
+# Diff in full: the statement may have changed any element of any container
+_ANY_WRITES = _Writes(whole=True)
+
+
+class _FrameDiff:
+    """
+    Diff state of one live frame, created on call and dropped on return.
+
+    Generator and coroutine frames keep theirs while suspended.
+    """
+
+    __slots__ = ("prev_locals", "containers", "reads", "instance", "suspended", "last_line")
+
+    def __init__(self, instance=None):
+        self.prev_locals = {}
+        self.containers = {}      # local name -> id of the container it was last seen bound to
+        self.reads = None         # reads since the frame's previous line event
+        self.instance = instance  # numbers generator/coroutine frames in start order
+        self.suspended = False
+        self.last_line = None     # line of the previous line event, whose writes are diffed next
+
+
+class _ThreadState:
+    """Per-frame diff state and event buffer of one traced thread."""
+
+    __slots__ = ("index", "events", "depth", "frames", "containers")
+
+    def __init__(self, index, events):
+        self.index = index        # 0 for the thread that called run()
+        self.events = events      # the tracer's own store for thread 0, a private buffer otherwise
+        self.depth = 0
+        self.frames = {}          # frame -> _FrameDiff
+        # id(container) -> [container, snapshot, frames referencing it, rows, extra, log];
+        # keyed by identity so a container shared between frames (memo tables) is
+        # diffed once. ``rows`` is None except for nested tables, where it holds
+        # the rows last seen in the live table, the snapshot is a persistent image
+        # and ``extra`` the last change as (previous image, cell changes). For
+        # numpy arrays ``extra`` is the preallocated comparison mask. ``log``
+        # lists the index or key of every change reported for a flat list, dict
+        # or set (None for tables and arrays), plus for lists the indices past
+        # the shorter length whenever the length changed; snapshots are
+        # delta-encoded from it
+        self.containers = {}
+
+    def frame_diff(self, frame):
+        diff = self.frames.get(frame)
+        if diff is None:
+            diff = self.frames[frame] = _FrameDiff()
+        return diff
+
+    def drop_frame(self, frame):
+        diff = self.frames.pop(frame, None)
+        if diff is not None:
+            for container_id in diff.containers.values():
+                self.release_container(container_id)
+
+    def release_container(self, container_id):
+        entry = self.containers[container_id]
+        entry[2] -= 1
+        if not entry[2]:
+            del self.containers[container_id]
+
 
 class ExecutionTracer:
-    def __init__(self):
-        self.events = []
-        self._prev_locals = {}
-        self._depth = 0
-        self._prev_list_states = {}
-        self._list_access_log = []  # Track list[index] accesses
-
-    def _get_list_changes(self, frame):
-        """Detect which list indices changed by comparing list contents"""
+    def __init__(
+        self,
+        backend="auto",
+        scope=None,
+        track_reads=False,
+        max_reads=DEFAULT_MAX_READS,
+        record=None,
+        threads=True,
+        coroutines=True,
+        profile=False,
+        count_operations=False,
+    ):
+        """
+        Args:
+            backend: "auto" (default), "settrace" or "monitoring". "auto" uses
+                sys.monitoring on Python 3.12+ and sys.settrace elsewhere.
+            scope: Optional TraceScope limiting which frames are traced.
+                None traces everything except the tracer itself.
+            track_reads: Record every list/dict element read (``dp[i - 1]``)
+                as a "read" event using opcode-level tracing, and attach the
+                reads behind each list write to its event.
+            max_reads: Stop tracking reads after this many, bounding the
+                cost on large inputs; ``reads_truncated`` is then set.
+            record: Optional path; the trace is streamed to this file while
+                it runs (see ``algo_viz.tracer.recording.open_trace``).
+            threads: Also trace other threads running in-scope code (e.g.
+                concurrent.futures workers). Each thread keeps its own
+                state and buffer; buffers are merged in event order by run().
+            coroutines: Report generator and coroutine frames leaving at a
+                yield/await as "suspend" and coming back as "resume" (instead
+                of a return and a fresh call), keeping their diff state
+                across suspensions. Their events carry a "frame_id" extra,
+                plus the asyncio "task" name when one is running.
+            profile: Also time every traced line (see tracer.profiler); the
+                result is in ``self.profile``, a LineProfile.
+            count_operations: Also count every comparison, subscript read and
+                write, and swap exactly (see tracer.counter); the result is
+                in ``self.operation_counts``, an OperationCounts.
+        """
+        self.profile = LineProfile() if profile else None
+        self.operation_counts = OperationCounts() if count_operations else None
+        client = self
+        if self.operation_counts is not None:
+            client = CountingClient(client, self.operation_counts)
+        if self.profile is not None:
+            # Outermost, so the counting is not charged to the traced lines
+            client = ProfilingClient(client, self.profile)
+        self.backend = resolve_backend(backend)(client)
+        self.scope = scope
+        self._max_depth = scope.max_depth if scope is not None else None
+        self._scope_cache = {}
+        self.events = EventStore()
+        self.track_reads = track_reads
+        self.reads_truncated = False
+        self._reads_left = max_reads
+        self.record = record
+        self._writer = None
+        self.threads = threads
+        self.coroutines = coroutines
+        self._instances = itertools.count(1)
+        # Global event order across threads; next() on a count is atomic
+        self._seq = itertools.count()
+        self._local = threading.local()
+        self._thread_states = []
+        self._threads_lock = threading.Lock()
+        self._tracked_types = _CONTAINER_TYPES
+
+    def _thread_state(self):
+        try:
+            return self._local.state
+        except AttributeError:
+            return self._new_thread_state()
+
+    def _new_thread_state(self):
+        thread = threading.current_thread()
+        with self._threads_lock:
+            index = len(self._thread_states)
+            events = self.events if index == 0 else EventStore()
+            state = _ThreadState(index, events)
+            self._thread_states.append(state)
+            self.events.threads.append((thread.ident, thread.name))
+        self._local.state = state
+        return state
+
+    def _container_types(self):
+        """Types diffed element by element, numpy.ndarray included once numpy is loaded"""
+        types = self._tracked_types
+        if types is _CONTAINER_TYPES:
+            ndarray = array_type()
+            if ndarray is not None:
+                types = self._tracked_types = _CONTAINER_TYPES + (ndarray,)
+        return types
+
+    def _get_container_changes(self, state, diff, locals_now, frame):
+        """
+        Detect which list indices, dict keys and set elements changed since
+        the previous line, as (name, key, old, new, op) tuples; ``op`` is
+        None for assignments, "del" for removed keys and "add"/"discard"
+        for set elements (old/new are then the element's membership).
+
+        Returns (changes, table_changes), the latter for cells of nested
+        tables as ("dp[i]", j, old, new, None). Cells of numpy arrays with
+        more than one dimension are named the same way.
+        """
         changes = []
-        locals_now = frame.f_locals.copy()
-        
+        table_changes = []
+        containers = state.containers
+        frame_containers = diff.containers
+        sites = write_sites(frame.f_code).get(diff.last_line, ())
+        touched = self._line_writes(state, frame.f_code, diff.last_line, sites, locals_now, frame.f_globals)
+        container_types = self._container_types()
+        # container id -> (name, start, end of its changes) of the first local
+        # diffed this line, so that aliases report the same changes
+        diffed = {}
+
         for var_name, val in locals_now.items():
-            if isinstance(val, list) and not var_name.startswith("__"):
-                prev_list = self._prev_list_states.get(var_name)
-                if prev_list is not None:
-                    # Handle lists of different lengths (expansion/contraction)
-                    min_len = min(len(prev_list), len(val))
-                    for i in range(min_len):
-                        if prev_list[i] != val[i]:
-                            changes.append((var_name, i, prev_list[i], val[i]))
-                # Update state - copy to avoid mutation tracking issues
+            if isinstance(val, container_types) and not var_name.startswith("__"):
+                container_id = id(val)
+                if frame_containers.get(var_name) != container_id:
+                    # New name or rebound to another container
+                    if var_name in frame_containers:
+                        state.release_container(frame_containers[var_name])
+                    frame_containers[var_name] = container_id
+                    entry = containers.get(container_id)
+                    if entry is None:
+                        # First sighting: take the one full copy this container will need
+                        log = None if is_table(val) or not isinstance(val, _CONTAINER_TYPES) else []
+                        containers[container_id] = [val, _copy_container(val), 1, None, None, log]
+                        if is_table(val):
+                            containers[container_id][3] = list(val)
+                        elif not isinstance(val, _CONTAINER_TYPES):
+                            containers[container_id][4] = _array_mask(val)
+                        continue
+                    entry[2] += 1
+                entry = containers[container_id]
+                aliased = diffed.get(container_id)
+                if aliased is not None:
+                    # Another local bound to the same object: its changes are this
+                    # name's too (tables were already reported under every name)
+                    if entry[3] is None:
+                        name, start, end = aliased
+                        changes.extend((var_name + c[0][len(name):],) + c[1:] for c in changes[start:end])
+                    continue
+                start = len(changes)
+                writes = _ANY_WRITES if touched is None else touched.get(container_id)
                 try:
-                    self._prev_list_states[var_name] = val.copy()
-                except (TypeError, AttributeError):
-                    # If list contains unmutable items, just reference it
-                    self._prev_list_states[var_name] = list(val)
-        
-        return changes
+                    if isinstance(val, list):
+                        if entry[3] is None and is_table(val):
+                            # Rows appended to a flat list: diff it as a table from now on
+                            entry[1] = copy_table(val)
+                            entry[3] = list(val)
+                            entry[5] = None
+                            continue
+                        if entry[3] is not None:
+                            names = [
+                                name for name, value in locals_now.items()
+                                if value is val and not name.startswith("__")
+                            ]
+                            table_changes.extend(
+                                self._table_changes(entry, names, sites, locals_now, frame.f_globals)
+                            )
+                            continue
+                        snapshot = entry[1]
+                        size = len(snapshot)
+                        found = []
+                        if writes is not None and writes.keys:
+                            found = diff_list_at(snapshot, val, writes.keys)
+                        if size != len(val) and writes is not None and writes.tail and not writes.whole:
+                            # Appended or popped at the end: only the tail moved
+                            common = min(size, len(val))
+                            snapshot[common:] = val[common:]
+                        elif (writes is not None and writes.whole) or size != len(val):
+                            found += diff_list(snapshot, val)
+                        for idx, old_v, new_v in found:
+                            changes.append((var_name, idx, old_v, new_v, None))
+                            entry[5].append(idx)
+                        if size != len(val):
+                            entry[5].extend(range(min(size, len(val)), max(size, len(val))))
+                    elif isinstance(val, dict):
+                        snapshot = entry[1]
+                        found = []
+                        if writes is not None and writes.keys:
+                            found = diff_dict_at(snapshot, val, writes.keys)
+                        if (writes is not None and writes.whole) or len(snapshot) != len(val):
+                            found += diff_dict(snapshot, val)
+                        for key, old_v, new_v, deleted in found:
+                            changes.append((var_name, key, old_v, new_v, "del" if deleted else None))
+                            entry[5].append(key)
+                    elif isinstance(val, set):
+                        snapshot = entry[1]
+                        added = removed = ()
+                        if writes is not None and writes.keys:
+                            added, removed = diff_set_at(snapshot, val, writes.keys)
+                        if (writes is not None and writes.whole) or len(snapshot) != len(val):
+                            more_added, more_removed = diff_set(snapshot, val)
+                            added = list(added) + more_added
+                            removed = list(removed) + more_removed
+                        for element in added:
+                            changes.append((var_name, element, False, True, "add"))
+                            entry[5].append(element)
+                        for element in removed:
+                            changes.append((var_name, element, True, False, "discard"))
+                            entry[5].append(element)
+                    elif entry[1].shape != val.shape or entry[1].dtype != val.dtype:
+                        # Array reshaped or retyped in place: start over silently
+                        entry[1] = val.copy()
+                        entry[4] = _array_mask(val)
+                    else:
+                        for index, old_v, new_v in diff_array(entry[1], val, entry[4]):
+                            if type(index) is tuple:
+                                prefix = var_name + "".join(f"[{i}]" for i in index[:-1])
+                                changes.append((prefix, index[-1], old_v, new_v, None))
+                            else:
+                                changes.append((var_name, index, old_v, new_v, None))
+                except Exception:
+                    # Elements whose comparison raises; start over from a fresh copy
+                    entry[1] = _copy_container(val)
+                    if entry[3] is not None:
+                        entry[3] = list(val)
+                    elif entry[5] is not None:
+                        # Changes went unreported: snapshots copy the container anew
+                        entry[5] = []
+                    elif not isinstance(val, _CONTAINER_TYPES):
+                        entry[4] = _array_mask(val)
+                finally:
+                    diffed[container_id] = (var_name, start, len(changes))
 
-    def _extract_formula_from_bytecode(self, frame):
-        """Extract which list indices are being read from bytecode"""
-        try:
-            code = frame.f_code
-            instructions = list(dis.get_instructions(code))
-            
-            # Find the current instruction
-            offset = frame.f_lasti
-            current_idx = None
-            for i, instr in enumerate(instructions):
-                if instr.offset <= offset < (instructions[i+1].offset if i+1 < len(instructions) else float('inf')):
-                    current_idx = i
-                    break
-            
-            if current_idx is None:
-                return {}
-            
-            # Look backwards for BINARY_SUBSCR operations (list reads)
-            reads = {}
-            for i in range(max(0, current_idx - 20), current_idx + 1):
-                instr = instructions[i]
-                if instr.opname == 'BINARY_SUBSCR':
-                    # This reads a list at an index
-                    # We need to look at the stack state, but that's complex
-                    # For now, return empty to avoid errors
-                    pass
-            
-            return reads
-        except Exception:
+        return changes, table_changes
+
+    def _line_writes(self, state, code, line, sites, frame_locals, frame_globals):
+        """
+        What the statement(s) at ``line`` may have changed in the flat lists,
+        dicts and sets of ``state``, as {container id: _Writes}, from the line's write
+        sites. A container missing from it was not written by name, so only
+        a change of its length (the same element written through a call
+        into other code) makes it diffed in full.
+
+        Returns None when the line may have changed anything: it calls code
+        other than pure built-ins and container methods, or writes an
+        element that cannot be located.
+        """
+        if line is None:
             return {}
+        if line in opaque_lines(code):
+            return None
+        containers = state.containers
+        touched = {}
+        for site in sites:
+            located = site.locate(frame_locals, frame_globals)
+            if located is None:
+                if site.method is not None and not site.call:
+                    # Attribute of an element that cannot be found: read, not written
+                    continue
+                root = containers.get(id(frame_locals.get(site.table)))
+                if root is not None and (root[3] is not None or not isinstance(root[0], _CONTAINER_TYPES)):
+                    # Tables find their own cells, numpy arrays are diffed in full
+                    continue
+                return None
+            target, keys = located
+            entry = containers.get(id(target))
+            if entry is None or entry[5] is None:
+                if site.call and entry is None and not _inert(target):
+                    # A method that may change anything
+                    return None
+                continue
+            writes = touched.get(id(target))
+            if writes is None:
+                writes = touched[id(target)] = _Writes()
+            if keys:
+                writes.keys.append(keys[0])
+                continue
+            kind = _method_kind(target, site.method) if site.method is not None else None
+            if kind == "read":
+                continue
+            if kind == "tail" and (site.method != "pop" or site.args == ()):
+                writes.tail = True
+                continue
+            if kind == "key":
+                args = site.evaluate_args(frame_locals, frame_globals)
+                if args:
+                    writes.keys.append(args[0])
+                    continue
+            writes.whole = True
+        return touched
 
-    def _trace(self, frame, event, arg):
-        func_name = frame.f_code.co_name
+    def _table_changes(self, entry, names, sites, locals_now, frame_globals):
+        """
+        Changed cells of the nested table ``entry``, as container changes
+        under each of ``names``, the locals bound to it.
 
-        if event == "call":
-            self._depth += 1
-            args = {
-                k: v
-                for k, v in frame.f_locals.items()
-                if not k.startswith("__")
-            }
-
-            self.events.append(
-                Event(
-                    event_type="call",
-                    line_no=frame.f_lineno,
-                    func_name=func_name,
-                    var_name=None,
-                    old_value=None,
-                    new_value=args,
-                    depth=self._depth,
-                )
+        Rescanning a 1000x1000 grid on every line would dominate the trace,
+        so only two things are checked: whether rows were replaced, appended
+        or removed (one identity comparison per row), and the elements the
+        previous line's write sites (``dp[i][j] = ...``) point at. Writes
+        through another name (``row = dp[i]; row[j] = 0``) are reported
+        under that name.
+        """
+        table, image, _, rows = entry[:4]
+        previous = image
+        changes = []
+        if len(rows) != len(table) or rows != table:
+            changes, image = diff_table(image, table, indices=changed_indices(rows, table))
+            entry[3] = list(table)
+        for site in sites:
+            if site.table not in names:
+                continue
+            path = site.resolve(table, locals_now, frame_globals)
+            if path is None:
+                # Element not known statically: rescan the whole table
+                row_changes, image = diff_table(image, table)
+            elif path:
+                row_changes, image = diff_table_at(image, table, path)
+            else:
+                continue
+            changes.extend(row_changes)
+        if image is not previous:
+            entry[1] = image
+            entry[4] = (previous, changes)
+        return [
+            (var_name + "".join(f"[{index!r}]" for index in cell[:-1]), cell[-1], old, new, None)
+            for cell, old, new in changes
+            for var_name in names
+        ]
+
+    def _flush_table_writes(self, state, frame, diff):
+        """Emit the table cells written by a frame's last line, which no line event follows"""
+        sites = write_sites(frame.f_code).get(diff.last_line)
+        if not sites:
+            return
+        locals_now = frame.f_locals.copy()
+        changes = []
+        tables = {}
+        for var_name, container_id in diff.containers.items():
+            entry = state.containers[container_id]
+            if entry[3] is not None and locals_now.get(var_name) is entry[0]:
+                tables.setdefault(container_id, []).append(var_name)
+        for container_id, names in tables.items():
+            changes.extend(
+                self._table_changes(state.containers[container_id], names, sites, locals_now, frame.f_globals)
             )
-            return self._trace
-
-        if event == "return":
-            self.events.append(
-                Event(
-                    event_type="return",
-                    line_no=frame.f_lineno,
-                    func_name=func_name,
-                    var_name=None,
-                    old_value=None,
-                    new_value=arg,
-                    depth=self._depth,
-                )
+        line, diff.last_line = diff.last_line, None
+        if changes:
+            reads, diff.reads = diff.reads, None
+            self._record_container_changes(state, frame, diff, locals_now, changes, reads, line)
+
+    def _traces_reads(self, code):
+        """Whether opcode events should be enabled for frames running ``code``"""
+        return self.track_reads and self._reads_left > 0 and bool(read_sites(code))
+
+    def _on_opcode(self, frame, offset):
+        """
+        Record the subscript read at ``offset``, if there is one.
+
+        Returns False once the instruction can never produce a read, so the
+        backend may stop reporting it.
+        """
+        if self._reads_left <= 0:
+            self.reads_truncated = True
+            return False
+        site = read_sites(frame.f_code).get(offset)
+        if site is None:
+            return False
+
+        resolved = site.resolve(frame.f_locals, frame.f_globals)
+        if resolved is None:
+            return True
+        indices, value = resolved
+        self._reads_left -= 1
+
+        state = self._thread_state()
+        diff = state.frame_diff(frame)
+        if diff.reads is None:
+            diff.reads = []
+        diff.reads.append((site.table, indices, site.label, value))
+        state.events.add(
+            "read",
+            frame.f_lineno,
+            frame.f_code.co_name,
+            site.table + "".join(f"[{index!r}]" for index in indices),
+            None,
+            value,
+            state.depth,
+            thread=state.index,
+            seq=next(self._seq),
+        )
+        return True
+
+    def _wants_code(self, code):
+        """Whether frames running ``code`` should be traced at all"""
+        wanted = self._scope_cache.get(code)
+        if wanted is None:
+            wanted = os.path.dirname(code.co_filename) != _TRACER_DIR and (
+                self.scope is None or self.scope.contains(code)
             )
-            self._depth -= 1
-            return self._trace
-
-        if event == "line":
-            locals_now = frame.f_locals.copy()
-            
-            # Track scalar variable changes
-            for var, val in locals_now.items():
-                if var in self._prev_locals and self._prev_locals[var] != val:
-                    if not isinstance(val, (list, dict)):
-                        self.events.append(
-                            Event(
-                                event_type="var_change",
-                                line_no=frame.f_lineno,
-                                func_name=func_name,
-                                var_name=var,
-                                old_value=self._prev_locals[var],
-                                new_value=val,
-                                depth=self._depth,
-                            )
-                        )
-            
-            # Track list index changes
-            list_changes = self._get_list_changes(frame)
-            for var_name, idx, old_v, new_v in list_changes:
-                # Store the locals snapshot and source line for formula analysis
+            self._scope_cache[code] = wanted
+        return wanted
+
+    def _admits_call(self, frame=None):
+        """Whether a new in-scope frame fits under the scope's max_depth"""
+        if self._max_depth is None:
+            return True
+        state = self._thread_state()
+        if frame is not None and self.coroutines:
+            diff = state.frames.get(frame)
+            if diff is not None and diff.suspended:
+                # Resuming a frame that was admitted when it started
+                return True
+        return state.depth < self._max_depth
+
+    def _frame_extras(self, frame, diff):
+        """Extras identifying a generator/coroutine frame and its asyncio task"""
+        extras = {"frame_id": diff.instance}
+        if frame.f_code.co_flags & _ASYNC_FLAGS:
+            asyncio = sys.modules.get("asyncio")
+            if asyncio is not None:
                 try:
-                    import linecache
-                    # Get current and next lines to find the actual assignment
-                    current_line = linecache.getline(frame.f_code.co_filename, frame.f_lineno).strip()
-                    next_line = linecache.getline(frame.f_code.co_filename, frame.f_lineno + 1).strip()
-                    
-                    # If current line is a for/while loop, use the next line (the body)
-                    if current_line.startswith('for ') or current_line.startswith('while '):
-                        source_line = next_line
-                    else:
-                        source_line = current_line
-                except Exception:
-                    source_line = ""
-                
-                change_event = Event(
-                    event_type="var_change",
-                    line_no=frame.f_lineno,
-                    func_name=func_name,
-                    var_name=f"{var_name}[{idx}]",
-                    old_value=old_v,
-                    new_value=new_v,
-                    depth=self._depth,
-                )
-                # Attach locals snapshot and source for formula analysis
-                change_event.locals_snapshot = locals_now.copy()
-                change_event.source_line = source_line
-                change_event.filename = frame.f_code.co_filename
-                self.events.append(change_event)
-            
-            self._prev_locals = locals_now
-
-        return self._trace
+                    task = asyncio.current_task()
+                except RuntimeError:
+                    task = None
+                if task is not None:
+                    extras["task"] = task.get_name()
+        return extras
+
+    def _on_call(self, frame):
+        state = self._thread_state()
+        func_name = frame.f_code.co_name
+        state.depth += 1
+
+        diff = state.frames.get(frame)
+        if diff is not None and diff.suspended:
+            diff.suspended = False
+            state.events.add(
+                "resume",
+                frame.f_lineno,
+                func_name,
+                None,
+                None,
+                None,
+                state.depth,
+                extras=self._frame_extras(frame, diff),
+                thread=state.index,
+                seq=next(self._seq),
+            )
+            return
+
+        extras = None
+        if self.coroutines and frame.f_code.co_flags & SUSPENDABLE_FLAGS:
+            diff = state.frames[frame] = _FrameDiff(next(self._instances))
+            extras = self._frame_extras(frame, diff)
+        else:
+            state.frames[frame] = _FrameDiff()
+        args = {
+            k: v
+            for k, v in frame.f_locals.items()
+            if not k.startswith("__")
+        }
+
+        state.events.add(
+            "call",
+            frame.f_lineno,
+            func_name,
+            None,
+            None,
+            args,
+            state.depth,
+            extras=extras,
+            thread=state.index,
+            seq=next(self._seq),
+        )
+
+    def _on_return(self, frame, value, suspended=False):
+        """
+        Record ``frame`` leaving the stack; ``suspended`` tells a generator
+        or coroutine stopping at a yield/await apart from finishing.
+        """
+        state = self._thread_state()
+        diff = state.frames.get(frame)
+        if diff is not None and diff.last_line is not None:
+            self._flush_table_writes(state, frame, diff)
+        instance = diff.instance if diff is not None else None
+        if suspended and instance is not None:
+            diff.suspended = True
+            state.events.add(
+                "suspend",
+                frame.f_lineno,
+                frame.f_code.co_name,
+                None,
+                None,
+                value,
+                state.depth,
+                extras=self._frame_extras(frame, diff),
+                thread=state.index,
+                seq=next(self._seq),
+            )
+            state.depth -= 1
+            return
+
+        state.events.add(
+            "return",
+            frame.f_lineno,
+            frame.f_code.co_name,
+            None,
+            None,
+            value,
+            state.depth,
+            extras=None if instance is None else self._frame_extras(frame, diff),
+            thread=state.index,
+            seq=next(self._seq),
+        )
+        state.drop_frame(frame)
+        state.events.snapshots.release(frame)
+        state.depth -= 1
+
+    def _on_line(self, frame):
+        state = self._thread_state()
+        events = state.events
+        diff = state.frame_diff(frame)
+        prev_locals = diff.prev_locals
+        func_name = frame.f_code.co_name
+        locals_now = frame.f_locals.copy()
+        
+        # Track scalar variable changes
+        container_types = self._container_types()
+        for var, val in locals_now.items():
+            if var in prev_locals and not isinstance(val, container_types):
+                if _value_changed(prev_locals[var], val):
+                    events.add(
+                        "var_change",
+                        frame.f_lineno,
+                        func_name,
+                        var,
+                        prev_locals[var],
+                        val,
+                        state.depth,
+                        thread=state.index,
+                        seq=next(self._seq),
+                    )
+        
+        # Reads performed by the statement(s) run since this frame's last line event
+        reads, diff.reads = diff.reads, None
+
+        # Track list index, dict key and set element changes
+        container_changes, table_changes = self._get_container_changes(state, diff, locals_now, frame)
+        if table_changes:
+            # Cells are attributed to the statement that wrote them
+            self._record_container_changes(
+                state, frame, diff, locals_now, container_changes + table_changes, reads, diff.last_line
+            )
+        elif container_changes:
+            self._record_container_changes(
+                state, frame, diff, locals_now, container_changes, reads, frame.f_lineno
+            )
+        
+        diff.prev_locals = locals_now
+        diff.last_line = frame.f_lineno
+
+        writer = self._writer
+        if (
+            writer is not None
+            and state.index == 0
+            and len(events) - writer.rows_written >= RECORD_FLUSH_EVERY
+        ):
+            writer.flush(events)
+
+    def _record_container_changes(self, state, frame, diff, locals_now, changes, reads, line):
+        events = state.events
+        # Statement the writes are attributed to; loop headers map to their body
+        info = line_table(frame.f_code).get(line)
+        source_line = info.source_line if info is not None else ""
+        # Nested tables are snapshotted from their persistent images, flat
+        # lists, dicts and sets from their change logs
+        tables = {}
+        logs = {}
+        for var_name, container_id in diff.containers.items():
+            entry = state.containers[container_id]
+            if locals_now.get(var_name) is not entry[0]:
+                continue
+            if entry[3] is not None:
+                tables[var_name] = (entry[1],) + (entry[4] or (None, ()))
+            elif entry[5] is not None:
+                logs[var_name] = entry[5]
+        # One delta-encoded snapshot is shared by all writes of this line
+        extras = {
+            "snapshot_id": events.snapshots.take(frame, locals_now, tables, logs),
+            "source_line": source_line,
+            "filename": frame.f_code.co_filename,
+        }
+        if self.track_reads and not self.reads_truncated:
+            extras["reads"] = reads or []
+
+        for var_name, key, old_v, new_v, op in changes:
+            # Attach locals snapshot and source for formula analysis
+            events.add(
+                "var_change",
+                frame.f_lineno,
+                frame.f_code.co_name,
+                f"{var_name}[{key!r}]",
+                old_v,
+                new_v,
+                state.depth,
+                extras=extras if op is None else dict(extras, op=op),
+                thread=state.index,
+                seq=next(self._seq),
+            )
 
     def run(self, func, *args, **kwargs):
-        sys.settrace(self._trace)
+        if self.record is not None:
+            self._writer = TraceWriter(self.record)
+        if self.profile is not None:
+            self.profile.overhead_ns = calibrate(self.backend.name)
+        # The calling thread owns self.events; other threads get buffers
+        self._thread_state()
+        self.backend.install(func)
         try:
             result = func(*args, **kwargs)
         finally:
-            sys.settrace(None)
+            self.backend.uninstall()
+            self._merge_threads()
         return result, self.events
+
+    def _merge_threads(self):
+        """Fold other threads' buffers into self.events and finish the recording"""
+        with self._threads_lock:
+            states = list(self._thread_states)
+        buffers = [state.events for state in states[1:] if state.events]
+
+        writer, self._writer = self._writer, None
+        if buffers:
+            merged = merge_stores([self.events] + buffers)
+            merged.threads = self.events.threads
+            self.events = merged
+            if writer is not None:
+                # Rows already streamed are out of order now; write the file anew
+                writer.abort()
+                write_trace(self.events, self.record)
+        elif writer is not None:
+            writer.close(self.events)
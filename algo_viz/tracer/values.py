@@ -0,0 +1,144 @@
+# algo_viz/tracer/values.py
+"""
+Safe, portable encoding of traced values.
+
+Traced values can be anything: huge lists, self-referencing structures,
+user objects with expensive or broken ``__repr__``. ``encode_value`` turns a
+value into plain JSON-compatible data with bounded size for display, and
+``loads`` turns its serialized form back into the closest built-in
+equivalent. Types JSON cannot express (tuples, sets, dicts with non-string
+keys, arbitrary objects) are tagged with a one-key dict so they survive the
+round trip.
+
+``dumps`` encodes without the size caps: recorded snapshots are replayed
+element by element, so a container stored there must come back whole.
+"""
+
+import json
+
+# Limits applied while encoding for display; anything beyond them is elided
+MAX_ITEMS = 1000
+MAX_DEPTH = 8
+MAX_STR = 10_000
+
+_TAG_TUPLE = "__tuple__"
+_TAG_SET = "__set__"
+_TAG_FROZENSET = "__frozenset__"
+_TAG_DICT = "__dict__"
+_TAG_OBJECT = "__repr__"
+_TAGS = (_TAG_TUPLE, _TAG_SET, _TAG_FROZENSET, _TAG_DICT, _TAG_OBJECT)
+
+
+class OpaqueValue:
+    """Stand-in for a value that could not be encoded; shows its original repr"""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+    def __repr__(self):
+        return self.text
+
+    def __eq__(self, other):
+        return isinstance(other, OpaqueValue) and other.text == self.text
+
+    def __hash__(self):
+        return hash(self.text)
+
+
+def _safe_repr(value, capped=True):
+    try:
+        text = repr(value)
+    except Exception as exc:
+        text = f"<{type(value).__name__} (repr failed: {exc.__class__.__name__})>"
+    if capped and len(text) > MAX_STR:
+        text = text[:MAX_STR] + "..."
+    return text
+
+
+def encode_value(value, capped=True, _depth=0, _active=None):
+    """
+    Return a JSON-compatible encoding of ``value``, size-capped unless
+    ``capped`` is False (cycles are always cut).
+    """
+    if value is None or type(value) in (bool, int, float):
+        return value
+    if type(value) is str:
+        return value if not capped or len(value) <= MAX_STR else value[:MAX_STR] + "..."
+
+    if type(value) not in (list, tuple, set, frozenset, dict):
+        # Includes subclasses of built-ins (IntEnum, namedtuple, ...)
+        return {_TAG_OBJECT: _safe_repr(value, capped)}
+
+    if capped and _depth >= MAX_DEPTH:
+        return {_TAG_OBJECT: "..."}
+    if _active is None:
+        _active = set()
+    if id(value) in _active:
+        return {_TAG_OBJECT: "[...]" if type(value) is list else "{...}"}
+    _active.add(id(value))
+    limit = MAX_ITEMS if capped else None
+    try:
+        depth = _depth + 1
+        if type(value) is dict:
+            items = list(value.items())[:limit]
+            if all(type(key) is str and key not in _TAGS for key, _ in items):
+                return {key: encode_value(v, capped, depth, _active) for key, v in items}
+            return {
+                _TAG_DICT: [
+                    [encode_value(k, capped, depth, _active), encode_value(v, capped, depth, _active)]
+                    for k, v in items
+                ]
+            }
+        if type(value) in (set, frozenset):
+            items = list(value)[:limit]
+            tag = _TAG_SET if type(value) is set else _TAG_FROZENSET
+            return {tag: [encode_value(v, capped, depth, _active) for v in items]}
+        encoded = [encode_value(v, capped, depth, _active) for v in value[:limit]]
+        if capped and len(value) > MAX_ITEMS:
+            encoded.append({_TAG_OBJECT: f"... {len(value) - MAX_ITEMS} more"})
+        return encoded if type(value) is list else {_TAG_TUPLE: encoded}
+    finally:
+        _active.discard(id(value))
+
+
+def hashable(value):
+    """``value`` if it can go in a set or be a dict key, else an OpaqueValue of its repr"""
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return OpaqueValue(_safe_repr(value))
+
+
+def _decode_tagged(obj):
+    if len(obj) == 1:
+        tag, payload = next(iter(obj.items()))
+        if tag == _TAG_TUPLE:
+            return tuple(payload)
+        if tag == _TAG_SET:
+            return {hashable(v) for v in payload}
+        if tag == _TAG_FROZENSET:
+            return frozenset(hashable(v) for v in payload)
+        if tag == _TAG_DICT:
+            return {hashable(k): v for k, v in payload}
+        if tag == _TAG_OBJECT:
+            return OpaqueValue(payload)
+    return obj
+
+
+def dumps(value):
+    """Encode ``value`` to compact UTF-8 JSON bytes, without size caps"""
+    try:
+        encoded = encode_value(value, capped=False)
+        return json.dumps(encoded, separators=(",", ":")).encode("utf-8")
+    except RecursionError:
+        # Nested too deep to encode whole; keep what the display caps allow
+        return json.dumps(encode_value(value), separators=(",", ":")).encode("utf-8")
+
+
+def loads(data):
+    """Inverse of ``dumps`` (tagged values come back as their built-in types)"""
+    return json.loads(data, object_hook=_decode_tagged)
+
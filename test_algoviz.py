@@ -2,13 +2,55 @@
 AlgoViz Test Suite
 """
 
+import contextlib
+import io
+import json
+import math
+import os
+import sys
+import tempfile
+import threading
 import unittest
+from unittest import mock
 from algo_viz import visualize
+from algo_viz.cli import load_arguments, load_target, main
+from algo_viz.report import render_report
+from algo_viz.batch import run_batch
+from algo_viz.complexity import run_complexity, scale_arguments
+from algo_viz.analyzers.behavior import BehaviorAnalyzer
+from algo_viz.analyzers.complexity import fit_complexity
+from algo_viz.analyzers.dp import analyze_dp, compile_formula
+from algo_viz.analyzers.engine import analyze_trace
+from algo_viz.analyzers.recursion_tree import build_recursion_tree
 from algo_viz.detectors.dp import detect_dp
+from algo_viz.renderers.async_timeline import render_async_timeline
+from algo_viz.renderers import dp as dp_renderer
+from algo_viz.renderers import html as html_renderer
+from algo_viz.renderers.json import iter_events, iter_records, read_analysis, render_json
+from algo_viz.renderers.profile import render_profile
+from algo_viz.renderers.recursion_tree import render_recursion_tree
+from algo_viz.detectors.generic import GenericPatternDetector
+from algo_viz.detectors.operations import detect_list_operations, detect_sorting_pattern
 from algo_viz.detectors.pointers import detect_two_pointers
 from algo_viz.detectors.recursion import detect_recursion
 from algo_viz.detectors.sliding_window import detect_sliding_window
+from algo_viz.tracer.diff import diff_array, diff_dict, diff_list, diff_set, diff_table, diff_table_at
+from algo_viz.tracer.events import Event
+from algo_viz.tracer.store import EventStore
+from algo_viz.tracer.backends import MonitoringBackend, SettraceBackend, resolve_backend
+from algo_viz.tracer.scope import TraceScope
+from algo_viz.tracer.counter import OperationCounter
+from algo_viz.tracer.opcodes import opaque_lines, read_sites, swap_sites, write_sites
+from algo_viz.tracer.recording import RECORD, TraceFormatError, open_trace, write_trace
+from algo_viz.tracer.snapshots import SnapshotStore
+from algo_viz.tracer.source import line_table
 from algo_viz.tracer.tracer import ExecutionTracer
+from algo_viz.tracer.values import MAX_ITEMS
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class TestExecutionTracer(unittest.TestCase):
@@ -60,6 +102,1212 @@ class TestExecutionTracer(unittest.TestCase):
         list_changes = [e for e in events if "[" in (e.var_name or "")]
         self.assertGreater(len(list_changes), 0)
 
+    def test_recursion_diffs_per_frame(self):
+        """Test that frames are not diffed against each other and shared lists report once"""
+        def fib(n):
+            if n <= 1:
+                return n
+            return fib(n - 1) + fib(n - 2)
+
+        def memo_fib(n, memo):
+            if memo[n] < 0:
+                memo[n] = memo_fib(n - 1, memo) + memo_fib(n - 2, memo)
+            return memo[n]
+
+        _, events = ExecutionTracer().run(fib, 5)
+        self.assertEqual([e for e in events if e.event_type == "var_change"], [])
+
+        _, events = ExecutionTracer().run(memo_fib, 5, [0, 1, -1, -1, -1, -1])
+        writes = [(e.var_name, e.new_value) for e in events if e.event_type == "var_change"]
+        self.assertEqual(
+            writes, [("memo[2]", 1), ("memo[3]", 2), ("memo[4]", 3), ("memo[5]", 5)]
+        )
+
+    def test_aliased_list_reports_every_name(self):
+        """Test that a write through one alias is reported under every local bound to the list"""
+        def aliased(n):
+            values = [0] * n
+            grid = [[0] * n for _ in range(n)]
+            view, rows = values, grid
+            view[1] = 5
+            values[2] = 7
+            rows[1][0] = 3
+            return values
+
+        _, events = ExecutionTracer().run(aliased, 3)
+        writes = [(e.var_name, e.new_value) for e in events if e.event_type == "var_change" and "[" in e.var_name]
+        self.assertEqual(
+            writes,
+            [("values[1]", 5), ("view[1]", 5), ("values[2]", 7), ("view[2]", 7),
+             ("grid[1][0]", 3), ("rows[1][0]", 3)],
+        )
+
+
+def _event_rows(events):
+    return [
+        (e.event_type, e.line_no, e.func_name, e.var_name, repr(e.old_value), repr(e.new_value), e.depth)
+        for e in events
+    ]
+
+
+class TestTracerBackends(unittest.TestCase):
+    """Test tracer backend selection and parity"""
+
+    def test_auto_backend_matches_interpreter(self):
+        """Test that auto picks sys.monitoring only where it exists"""
+        expected = MonitoringBackend if hasattr(sys, "monitoring") else SettraceBackend
+        self.assertIs(resolve_backend("auto"), expected)
+        self.assertIs(resolve_backend("settrace"), SettraceBackend)
+
+    def test_unknown_backend_rejected(self):
+        """Test that unknown backend names raise"""
+        with self.assertRaises(ValueError):
+            ExecutionTracer(backend="ptrace")
+
+    @unittest.skipUnless(hasattr(sys, "monitoring"), "sys.monitoring requires Python 3.12+")
+    def test_monitoring_matches_settrace(self):
+        """Test that both backends produce the same event stream"""
+        def helper(x):
+            return x * 2
+
+        def dp_func(n):
+            dp = [0] * (n + 1)
+            dp[0], dp[1] = 1, 1
+            for i in range(2, n + 1):
+                dp[i] = dp[i - 1] + dp[i - 2]
+            return helper(dp[n])
+
+        _, settrace_events = ExecutionTracer(backend="settrace").run(dp_func, 6)
+        _, monitoring_events = ExecutionTracer(backend="monitoring").run(dp_func, 6)
+
+        self.assertEqual(_event_rows(settrace_events), _event_rows(monitoring_events))
+
+    @unittest.skipUnless(hasattr(sys, "monitoring"), "sys.monitoring requires Python 3.12+")
+    def test_monitoring_reports_same_line_loops(self):
+        """Test that backward jumps staying on one line are reported as settrace does"""
+        def same_line_loops(n):
+            grid = [[0] * n for _ in range(n)]
+            k = n
+            while k: k -= 1
+            return grid, k
+
+        _, settrace_events = ExecutionTracer(backend="settrace").run(same_line_loops, 4)
+        _, monitoring_events = ExecutionTracer(backend="monitoring").run(same_line_loops, 4)
+
+        self.assertEqual(_event_rows(settrace_events), _event_rows(monitoring_events))
+        self.assertEqual(
+            [e.new_value for e in monitoring_events if e.var_name == "k"], [3, 2, 1, 0]
+        )
+
+    @unittest.skipUnless(hasattr(sys, "monitoring"), "sys.monitoring requires Python 3.12+")
+    def test_settrace_opcodes_after_monitoring(self):
+        """Test that instructions the monitoring backend disabled still reach settrace later"""
+        def settrace_counts():
+            tracer = ExecutionTracer(backend="settrace", count_operations=True)
+            tracer.run(_insertion_sort, [3, 2, 1])
+            return tracer.operation_counts.total()
+
+        before = settrace_counts()
+        ExecutionTracer(backend="monitoring", count_operations=True).run(_insertion_sort, [3, 2, 1])
+        self.assertEqual(settrace_counts(), before)
+        self.assertEqual(before.swaps, 3)
+
+    @unittest.skipUnless(hasattr(sys, "monitoring"), "sys.monitoring requires Python 3.12+")
+    def test_monitoring_undoes_only_its_own_disables(self):
+        """Test that code skipped in one run is seen by the next, and other tools keep theirs"""
+        monitoring = sys.monitoring
+
+        def helper(x):
+            return x + 1
+
+        def caller(x):
+            return helper(x)
+
+        other_calls = []
+
+        def other_start(code, offset):
+            if code is helper.__code__:
+                other_calls.append(offset)
+                return monitoring.DISABLE
+
+        tool_id = 5
+        monitoring.use_tool_id(tool_id, "algo_viz test")
+        self.addCleanup(monitoring.free_tool_id, tool_id)
+        monitoring.register_callback(tool_id, monitoring.events.PY_START, other_start)
+        self.addCleanup(monitoring.register_callback, tool_id, monitoring.events.PY_START, None)
+        monitoring.set_events(tool_id, monitoring.events.PY_START)
+        self.addCleanup(monitoring.set_events, tool_id, monitoring.events.NO_EVENTS)
+
+        for codes in ([caller], [caller, helper]):
+            _, events = ExecutionTracer(backend="monitoring", scope=TraceScope(codes=codes)).run(caller, 1)
+        self.assertIn("helper", {e.func_name for e in events if e.event_type == "call"})
+        # The other tool's DISABLE survived both runs
+        self.assertEqual(len(other_calls), 1)
+
+    @unittest.skipUnless(hasattr(sys, "monitoring"), "sys.monitoring requires Python 3.12+")
+    def test_monitoring_reports_throw_into_generator(self):
+        """Test that throwing into a suspended generator resumes it on both backends"""
+        def gen():
+            try:
+                yield 1
+            except ValueError:
+                pass
+            yield 2
+
+        def driver():
+            g = gen()
+            next(g)
+            value = g.throw(ValueError)
+            next(g, None)
+            return value
+
+        _, settrace_events = ExecutionTracer(backend="settrace").run(driver)
+        _, monitoring_events = ExecutionTracer(backend="monitoring").run(driver)
+
+        self.assertEqual(_event_rows(settrace_events), _event_rows(monitoring_events))
+        lifecycle = [e.event_type for e in monitoring_events if e.func_name == "gen" and e.event_type != "line"]
+        self.assertEqual(lifecycle, ["call", "suspend", "resume", "suspend", "resume", "return"])
+
+    def test_worker_threads_traced(self):
+        """Test that events from worker threads carry their thread and stay ordered"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        def square_all(values):
+            out = [0] * len(values)
+            for i, v in enumerate(values):
+                out[i] = v * v
+            return out
+
+        def run_pool(chunks):
+            with ThreadPoolExecutor(max_workers=2, thread_name_prefix="algoviz-test") as pool:
+                return list(pool.map(square_all, chunks))
+
+        backends = ["settrace"] + (["monitoring"] if hasattr(sys, "monitoring") else [])
+        for backend in backends:
+            with self.subTest(backend=backend):
+                scope = TraceScope(codes=[run_pool, square_all])
+                result, events = ExecutionTracer(backend=backend, scope=scope).run(
+                    run_pool, [[1, 2], [3, 4, 5]]
+                )
+                self.assertEqual(result, [[1, 4], [9, 16, 25]])
+
+                self.assertEqual(events.threads[0][0], threading.get_ident())
+                self.assertGreater(len(events.threads), 1)
+                self.assertEqual([e.seq for e in events], sorted(e.seq for e in events))
+
+                worker_calls = [e for e in events if e.event_type == "call" and e.func_name == "square_all"]
+                self.assertEqual(len(worker_calls), 2)
+                for e in worker_calls:
+                    self.assertNotEqual(e.thread, 0)
+                    self.assertTrue(e.thread_name.startswith("algoviz-test"))
+                    self.assertEqual(e.depth, 1)
+
+                writes = {e.var_name: e.new_value for e in events if e.var_name and "[" in e.var_name}
+                self.assertEqual(writes["out[2]"], 25)
+
+    def test_threads_disabled(self):
+        """Test that threads=False only follows the calling thread"""
+        def work():
+            return 1
+
+        def spawn():
+            worker = threading.Thread(target=work)
+            worker.start()
+            worker.join()
+            return work()
+
+        _, events = ExecutionTracer(
+            backend="settrace", scope=TraceScope(codes=[spawn, work]), threads=False
+        ).run(spawn)
+        self.assertEqual({e.thread for e in events}, {0})
+        self.assertEqual(len(events.threads), 1)
+        self.assertEqual(len([e for e in events if e.event_type == "call"]), 2)
+
+
+class TestCoroutineTracing(unittest.TestCase):
+    """Test generator and coroutine suspend/resume tracking"""
+
+    def _backends(self):
+        return ["settrace"] + (["monitoring"] if hasattr(sys, "monitoring") else [])
+
+    def test_generator_suspend_resume(self):
+        """Test that yields are suspends, not returns, and frame state survives them"""
+        def running_sum(n):
+            total = 0
+            for i in range(n):
+                total += i
+                yield total
+
+        def consume(n):
+            return list(running_sum(n))
+
+        for backend in self._backends():
+            with self.subTest(backend=backend):
+                result, events = ExecutionTracer(backend=backend).run(consume, 3)
+                self.assertEqual(result, [0, 1, 3])
+
+                lifecycle = [
+                    (e.event_type, e.depth) for e in events if e.func_name == "running_sum"
+                    and e.event_type in ("call", "resume", "suspend", "return")
+                ]
+                self.assertEqual(
+                    lifecycle,
+                    [("call", 2)] + [("suspend", 2), ("resume", 2)] * 3 + [("return", 2)],
+                )
+                self.assertEqual(
+                    [e.new_value for e in events if e.event_type == "suspend"], [0, 1, 3]
+                )
+                # Diffed against the frame's own state from before the yield
+                changes = [(e.var_name, e.old_value, e.new_value) for e in events if e.event_type == "var_change"]
+                self.assertEqual(changes, [("i", 0, 1), ("total", 0, 1), ("i", 1, 2), ("total", 1, 3)])
+                self.assertTrue(analyze_trace(events).coroutines)
+
+    def test_yield_from_suspends(self):
+        """Test that delegating with yield from suspends, and a raise through it returns"""
+        def inner():
+            yield 1
+            yield 2
+            raise KeyError
+
+        def outer():
+            try:
+                yield from inner()
+            except KeyError:
+                pass
+
+        for backend in self._backends():
+            with self.subTest(backend=backend):
+                _, events = ExecutionTracer(backend=backend).run(lambda: list(outer()))
+                lifecycle = [
+                    e.event_type for e in events if e.func_name == "outer"
+                    and e.event_type in ("call", "resume", "suspend", "return")
+                ]
+                self.assertEqual(lifecycle, ["call"] + ["suspend", "resume"] * 2 + ["return"])
+                inner_events = [e.event_type for e in events if e.func_name == "inner"]
+                self.assertEqual(inner_events[-1], "return")
+
+    def test_coroutine_mode_off(self):
+        """Test that coroutines=False reports every resume as a call"""
+        def gen():
+            yield 1
+            yield 2
+
+        _, events = ExecutionTracer(backend="settrace", coroutines=False).run(lambda: list(gen()))
+        calls = [e for e in events if e.event_type == "call" and e.func_name == "gen"]
+        self.assertEqual(len(calls), 3)
+        self.assertFalse(any(e.event_type in ("resume", "suspend") for e in events))
+
+    def test_asyncio_tasks_interleave(self):
+        """Test that concurrent tasks carry their task names and interleave"""
+        import asyncio
+
+        async def worker(n):
+            for _ in range(n):
+                await asyncio.sleep(0)
+            return n
+
+        async def main():
+            return await asyncio.gather(worker(2), worker(2))
+
+        for backend in self._backends():
+            with self.subTest(backend=backend):
+                scope = TraceScope(codes=[worker, main])
+                result, events = ExecutionTracer(backend=backend, scope=scope).run(
+                    asyncio.run, main()
+                )
+                self.assertEqual(result, [2, 2])
+
+                workers = [e for e in events if e.func_name == "worker" and e.event_type != "var_change"]
+                self.assertEqual(len({e.frame_id for e in workers}), 2)
+                self.assertEqual(len({e.task for e in workers}), 2)
+                frame_order = [e.frame_id for e in workers if e.event_type == "resume"]
+                self.assertNotEqual(frame_order, sorted(frame_order))
+
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output):
+                    render_async_timeline(events)
+                self.assertIn("[>] resume", output.getvalue())
+
+
+class TestEventStore(unittest.TestCase):
+    """Test the columnar event store"""
+
+    def test_rows_round_trip(self):
+        """Test that views and plain rows expose the stored fields"""
+        store = EventStore()
+        store.add("call", 3, "f", None, None, {"n": 2}, 1)
+        store.add("var_change", 4, "f", "dp[1]", 0, 1, 1, extras={"source_line": "dp[1] = 1"})
+        store.append(Event("return", None, "f", None, None, 1, None))
+
+        self.assertEqual(len(store), 3)
+        self.assertEqual(store[1].var_name, "dp[1]")
+        self.assertEqual(store[1].source_line, "dp[1] = 1")
+        self.assertEqual(getattr(store[0], "source_line", ""), "")
+        self.assertIsNone(store[-1].line_no)
+        self.assertIsNone(store[-1].depth)
+        self.assertEqual(
+            list(store.iter_rows())[0], ("call", 3, "f", None, None, {"n": 2}, 1)
+        )
+
+    def test_tracer_returns_store(self):
+        """Test that the tracer records into an EventStore"""
+        def list_func():
+            arr = [0, 0]
+            arr[1] = 5
+            return arr
+
+        _, events = ExecutionTracer().run(list_func)
+
+        self.assertIsInstance(events, EventStore)
+        change = next(e for e in events if e.var_name == "arr[1]")
+        self.assertEqual((change.old_value, change.new_value), (0, 5))
+        self.assertIn("arr", change.locals_snapshot)
+
+
+class TestListDiff(unittest.TestCase):
+    """Test incremental list change detection"""
+
+    def test_changes_across_chunks(self):
+        """Test that changed indices are found and the snapshot catches up"""
+        current = list(range(200))
+        snapshot = list(current)
+        current[3] = -1
+        current[150] = -2
+
+        changes = diff_list(snapshot, current, chunk_size=16)
+
+        self.assertEqual(changes, [(3, 3, -1), (150, 150, -2)])
+        self.assertEqual(snapshot, current)
+        self.assertEqual(diff_list(snapshot, current), [])
+
+    def test_length_change_and_nan(self):
+        """Test growth is absorbed silently and NaN is not reported as a change"""
+        nan = float("nan")
+        current = [nan, 1]
+        snapshot = list(current)
+        current.append(2)
+        current[1] = 5
+
+        self.assertEqual(diff_list(snapshot, current), [(1, 1, 5)])
+        self.assertEqual(snapshot, current)
+
+    def test_dict_and_set_diffs(self):
+        """Test key-level dict and element-level set diffs, hashable or not"""
+        snapshot = {"a": 1, "b": [1], "c": 3}
+        current = dict(snapshot, a=2, d=4)
+        del current["c"]
+        self.assertEqual(
+            diff_dict(snapshot, current),
+            [("a", 1, 2, False), ("d", None, 4, False), ("c", 3, None, True)],
+        )
+        self.assertEqual(snapshot, current)
+        self.assertEqual(diff_dict(snapshot, current), [])
+
+        snapshot = {1, 2}
+        self.assertEqual(diff_set(snapshot, {2, 3}), ([3], [1]))
+        self.assertEqual(snapshot, {2, 3})
+
+    def test_tracer_dict_and_set_events(self):
+        """Test that dict keys and set elements are reported as name[key] events"""
+        def count_chars(s):
+            counts = {}
+            seen = set()
+            for ch in s:
+                counts[ch] = counts.get(ch, 0) + 1
+                seen.add(ch)
+            del counts["a"]
+            seen.discard("a")
+            return counts
+
+        _, events = ExecutionTracer().run(count_chars, "aba")
+        changes = [
+            (e.var_name, e.old_value, e.new_value, getattr(e, "op", None))
+            for e in events if e.event_type == "var_change" and e.var_name != "ch"
+        ]
+        self.assertEqual(changes, [
+            ("counts['a']", None, 1, None),
+            ("seen['a']", False, True, "add"),
+            ("counts['b']", None, 1, None),
+            ("seen['b']", False, True, "add"),
+            ("counts['a']", 1, 2, None),
+            ("counts['a']", 2, None, "del"),
+            ("seen['a']", True, False, "discard"),
+        ])
+        # Snapshots keep the dict as it was at that step
+        first = next(e for e in events if e.var_name == "counts['a']")
+        self.assertEqual(first.locals_snapshot["counts"], {"a": 1})
+
+    def test_dict_and_set_writes_diffed_at_their_keys(self):
+        """Test that dicts and sets are compared at the keys a line writes, in full after unknown calls"""
+        import operator
+
+        def tally(words):
+            counts = {}
+            seen = set()
+            for w in words:
+                counts[w] = counts.get(w, 0) + 1
+                seen.add(w)
+            counts.setdefault("z", 0)
+            counts.pop("a")
+            operator.setitem(counts, "b", 7)
+            seen ^= {"b", "q"}
+            return counts
+
+        with mock.patch("algo_viz.tracer.tracer.diff_dict", wraps=diff_dict) as full_diff:
+            _, events = ExecutionTracer().run(tally, ["a", "b", "a"])
+        changes = [
+            (e.var_name, e.old_value, e.new_value, getattr(e, "op", None))
+            for e in events if e.event_type == "var_change" and "[" in e.var_name
+        ]
+        self.assertEqual(changes, [
+            ("counts['a']", None, 1, None),
+            ("seen['a']", False, True, "add"),
+            ("counts['b']", None, 1, None),
+            ("seen['b']", False, True, "add"),
+            ("counts['a']", 1, 2, None),
+            ("counts['z']", None, 0, None),
+            ("counts['a']", 2, None, "del"),
+            ("counts['b']", 1, 7, None),
+            ("seen['q']", False, True, "add"),
+            ("seen['b']", True, False, "discard"),
+        ])
+        # Only the operator.setitem line needed a full comparison
+        self.assertEqual(full_diff.call_count, 1)
+        last = events[[e.event_type for e in events].index("return") - 1]
+        self.assertEqual(last.locals_snapshot["counts"], {"b": 7, "z": 0})
+        self.assertEqual(last.locals_snapshot["seen"], {"a", "q"})
+
+    def test_list_writes_diffed_at_their_indices(self):
+        """Test that flat lists are compared at the indices a line writes, in full after other methods"""
+        def stack_ops(n):
+            stack = [0] * 3
+            for i in range(n):
+                stack.append(i)
+                stack[-1] += 10
+            stack.pop()
+            stack.pop()
+            stack.append(99)
+            stack[0] = 5
+            stack.insert(0, 7)
+            return stack
+
+        with mock.patch("algo_viz.tracer.tracer.diff_list", wraps=diff_list) as full_diff:
+            _, events = ExecutionTracer().run(stack_ops, 3)
+        writes = [e for e in events if e.event_type == "var_change" and e.var_name.startswith("stack[")]
+        self.assertEqual([(e.var_name, e.old_value, e.new_value) for e in writes], [
+            ("stack[3]", 0, 10),
+            ("stack[4]", 1, 11),
+            ("stack[5]", 2, 12),
+            ("stack[0]", 0, 5),
+            ("stack[0]", 5, 7),
+            ("stack[1]", 0, 5),
+            ("stack[3]", 10, 0),
+            ("stack[4]", 99, 10),
+        ])
+        # Only the insert line needed a full comparison
+        self.assertEqual(full_diff.call_count, 1)
+        # Snapshots caught up with the pops and the append between two writes
+        self.assertEqual(writes[3].locals_snapshot["stack"], [5, 0, 0, 10, 99])
+        self.assertEqual(writes[-1].locals_snapshot["stack"], [7, 5, 0, 0, 10, 99])
+
+    def test_dict_of_lists_report(self):
+        """Test that unhashable dict values go through every detector and renderer"""
+        @visualize()
+        def group_anagrams(words):
+            groups = {}
+            for word in words:
+                groups.setdefault("".join(sorted(word)), []).append(word)
+            return groups
+
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            result = group_anagrams(["eat", "tea", "tan", "ate", "nat"])
+        self.assertEqual(result, {"aet": ["eat", "tea", "ate"], "ant": ["tan", "nat"]})
+        self.assertIn("groups['aet']", out.getvalue())
+
+    @unittest.skipUnless(numpy is not None, "numpy is not installed")
+    def test_array_diffs(self):
+        """Test vectorized ndarray diffs into a reused mask, NaN excluded"""
+        current = numpy.array([[0.0, numpy.nan], [2.0, 3.0]])
+        snapshot = current.copy()
+        mask = numpy.empty(current.shape, dtype=bool)
+        current[1, 0] = 5.0
+
+        self.assertEqual(diff_array(snapshot, current, mask), [((1, 0), 2.0, 5.0)])
+        self.assertEqual(diff_array(snapshot, current, mask), [])
+        self.assertEqual(diff_array(snapshot[0], current[0]), [])
+
+    @unittest.skipUnless(numpy is not None, "numpy is not installed")
+    def test_tracer_array_events(self):
+        """Test that ndarray locals produce name[idx] events and step-time snapshots"""
+        def fill(n):
+            dp = numpy.zeros(n, dtype=numpy.int64)
+            grid = numpy.zeros((2, 2))
+            for i in range(1, n):
+                dp[i] = dp[i - 1] + i
+            grid[1, :] = 7
+            return dp
+
+        _, events = ExecutionTracer().run(fill, 3)
+        writes = [e for e in events if e.event_type == "var_change" and "[" in e.var_name]
+
+        self.assertEqual(
+            [(e.var_name, e.old_value, e.new_value) for e in writes],
+            [("dp[1]", 0, 1), ("dp[2]", 0, 3), ("grid[1][0]", 0.0, 7.0), ("grid[1][1]", 0.0, 7.0)],
+        )
+        self.assertIs(type(writes[0].new_value), int)
+        self.assertEqual(writes[0].locals_snapshot["dp"].tolist(), [0, 1, 0])
+        self.assertEqual(analyze_dp(events)[1].inputs, {"i - 1": 1})
+
+
+def _multiline_dp(n):
+    dp = [1] * (n + 1)
+    for i in range(
+            2, n + 1):
+        dp[i] = (dp[i - 1] +
+                 dp[i - 2])
+    return dp
+
+
+def _fib(n):
+    if n <= 1:
+        return n
+    return _fib(n - 1) + _fib(n - 2)
+
+
+def _drop_last(values):
+    if len(values) <= 34:
+        return len(values)
+    return _drop_last(values[:-1])
+
+
+def _merge_sort(values):
+    if len(values) <= 1:
+        return values
+    mid = len(values) // 2
+    left, right = _merge_sort(values[:mid]), _merge_sort(values[mid:])
+    return sorted(left + right)
+
+
+def _range_sum(values, lo, hi):
+    if hi - lo <= 1:
+        return values[lo] if hi > lo else 0
+    mid = (lo + hi) // 2
+    return _range_sum(values, lo, mid) + _range_sum(values, mid, hi)
+
+
+@visualize()
+def _visualized_fib(n):
+    if n <= 1:
+        return n
+    return _visualized_fib(n - 1) + _visualized_fib(n - 2)
+
+
+def _insertion_sort(values):
+    values = list(values)
+    for i in range(1, len(values)):
+        j = i
+        while j > 0 and values[j - 1] > values[j]:
+            values[j - 1], values[j] = values[j], values[j - 1]
+            j -= 1
+    return values
+
+
+class TestSnapshotStore(unittest.TestCase):
+    """Test delta-encoded locals snapshots"""
+
+    def test_reconstructs_every_step(self):
+        """Test that snapshots rebuild the locals as they were at that step"""
+        store = SnapshotStore(keyframe_interval=4)
+        frame = object()
+        dp = [0] * 5
+        expected = {}
+        for i in range(5):
+            dp[i] = i * i
+            expected[store.take(frame, {"dp": dp, "i": i})] = {"dp": list(dp), "i": i}
+        expected[store.take(frame, {"dp": dp + [25]})] = {"dp": dp + [25]}
+
+        for snapshot_id in [5, 0, 3, 4, 1, 2]:
+            self.assertEqual(store.locals_at(snapshot_id), expected[snapshot_id])
+
+    def test_deltas_store_changes_only(self):
+        """Test that steps between keyframes record only what changed"""
+        store = SnapshotStore()
+        frame = object()
+        dp = [0] * 100
+        for i in range(10):
+            dp[i] = 1
+            store.take(frame, {"dp": dp, "i": i, "n": 100})
+
+        self.assertEqual(len(store._changes[0]), 3)
+        self.assertTrue(all(len(changes) == 2 for changes in store._changes[1:]))
+
+    def test_keyframes_sized_and_shared(self):
+        """Test that keyframe spacing follows container sizes and keyframes share their copies"""
+        store = SnapshotStore(keyframe_interval=4)
+        frame = object()
+        dp = [0] * 100
+        seen = {"a", "b"}
+        for i in range(30):
+            dp[i] = 1
+            store.take(frame, {"dp": dp, "seen": seen, "i": i})
+
+        # 103 elements: 25 deltas between keyframes rather than 4
+        self.assertEqual([i for i, base in enumerate(store._bases) if base is None], [0, 26])
+        state = store._frames[frame]
+        self.assertIs(state.values["seen"], store._changes[26]["seen"])
+        self.assertIsNot(state.values["dp"], store._changes[26]["dp"])
+        self.assertEqual(store.locals_at(26)["dp"], [1] * 27 + [0] * 73)
+        self.assertEqual(store.locals_at(29)["dp"], [1] * 30 + [0] * 70)
+
+    def test_tracer_events_share_snapshot(self):
+        """Test that writes on one line share one snapshot with step-time contents"""
+        def swap(items):
+            items[0], items[1] = items[1], items[0]
+            items[0] = 9
+            return items
+
+        _, events = ExecutionTracer().run(swap, [1, 2])
+        writes = [e for e in events if e.event_type == "var_change"]
+
+        self.assertEqual(writes[0].snapshot_id, writes[1].snapshot_id)
+        self.assertEqual(writes[0].locals_snapshot, {"items": [2, 1]})
+        self.assertEqual(writes[2].locals_snapshot, {"items": [9, 1]})
+
+    def test_dict_deltas_round_trip(self):
+        """Test that dict key writes and removals are delta-encoded and exported"""
+        store = SnapshotStore()
+        frame = object()
+        memo = {}
+        ids = []
+        for key in [(0, 0), (0, 1), (1, 1)]:
+            memo[key] = len(memo)
+            ids.append(store.take(frame, {"memo": memo}))
+        del memo[(0, 0)]
+        ids.append(store.take(frame, {"memo": memo}))
+
+        self.assertEqual(len(store._changes[1]), 1)
+        self.assertEqual(store.locals_at(ids[1]), {"memo": {(0, 0): 0, (0, 1): 1}})
+        self.assertEqual(store.locals_at(ids[3]), {"memo": {(0, 1): 1, (1, 1): 2}})
+
+        bases, changes = [], []
+        for snapshot_id in ids:
+            base, entries = store.export_changes(snapshot_id)
+            bases.append(base)
+            changes.append(SnapshotStore.changes_from_entries(entries))
+        replay = SnapshotStore.replay(bases, changes)
+        self.assertEqual(replay.locals_at(ids[3]), store.locals_at(ids[3]))
+
+
+class TestNestedTables(unittest.TestCase):
+    """Test cell-level diffs of 2D/3D list tables"""
+
+    @staticmethod
+    def _lcs(a, b):
+        dp = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+        for i in range(1, len(a) + 1):
+            for j in range(1, len(b) + 1):
+                if a[i - 1] == b[j - 1]:
+                    dp[i][j] = dp[i - 1][j - 1] + 1
+                else:
+                    dp[i][j] = max(dp[i - 1][j], dp[i][j - 1])
+        return dp[len(a)][len(b)]
+
+    def test_write_sites(self):
+        """Test that subscript stores and row method calls name the element they change"""
+        def writes(dp, g, i, j, u):
+            dp[i][j] = dp[i - 1][j] + 1
+            g[u].append(i)
+            dp[i][1:j] = [0]
+
+        code = writes.__code__
+        first = code.co_firstlineno
+        sites = {
+            line - first: [(site.table, len(site.index_exprs)) for site in line_sites]
+            for line, line_sites in write_sites(code).items()
+        }
+        self.assertEqual(sites, {1: [("dp", 2)], 2: [("g", 1)], 3: [("dp", 1)]})
+
+    def test_method_sites_and_opaque_lines(self):
+        """Test method calls as write sites, and lines whose writes no site describes"""
+        def writes(d, s, a, i):
+            d.setdefault(i, []).append(i)
+            s.add(i + 1)
+            a[i] = 0; i += 1
+            print(len(a))
+            helper(a)
+
+        code = writes.__code__
+        first = code.co_firstlineno
+        sites = write_sites(code)
+        self.assertEqual(
+            [(site.table, site.method, site.call, site.args) for site in sites[first + 2]],
+            [("s", "add", True, (("binop", "+", ("name", "i"), ("const", 1)),))],
+        )
+        self.assertIsNone(sites[first + 3][0].index_exprs)
+        self.assertEqual({line - first for line in opaque_lines(code)}, {1, 5})
+
+    def test_diff_table_shares_unchanged_rows(self):
+        """Test that a cell change copies only its row and the levels above it"""
+        live = [[0] * 3 for _ in range(3)]
+        _, image = diff_table([[0] * 3 for _ in range(3)], live)
+        live[1][2] = 5
+        live[2].append(1)
+
+        changes, updated = diff_table_at(image, live, (1, 2))
+        self.assertEqual(changes, [((1, 2), 0, 5)])
+        self.assertIsNot(updated, image)
+        self.assertIs(updated[0], image[0])
+        self.assertEqual(image[1], [0, 0, 0])
+
+        changes, updated = diff_table(updated, live)
+        self.assertEqual(changes, [((2,), [0, 0, 0], [0, 0, 0, 1])])
+        self.assertEqual(updated, live)
+
+    def test_tracer_cell_events(self):
+        """Test that grid writes come out as dp[i][j] events with step-time snapshots"""
+        _, events = ExecutionTracer().run(self._lcs, "ab", "b")
+        writes = [e for e in events if e.event_type == "var_change" and "[" in e.var_name]
+
+        self.assertEqual(
+            [(e.var_name, e.old_value, e.new_value) for e in writes],
+            [("dp[2][1]", 0, 1)],
+        )
+        self.assertEqual(writes[0].locals_snapshot["dp"], [[0, 0], [0, 0], [0, 1]])
+        self.assertEqual(writes[0].source_line.strip(), "dp[i][j] = dp[i - 1][j - 1] + 1")
+        self.assertEqual(analyze_dp(events)[0].inputs, {"i - 1][j - 1": 0})
+
+    def test_3d_table_and_adjacency_rows(self):
+        """Test 3D cells, row replacement and rows grown by append"""
+        def fill(n):
+            cube = [[[0] * n for _ in range(n)] for _ in range(n)]
+            graph = [[] for _ in range(n)]
+            for i in range(n):
+                cube[i][i][i] = i + 1
+                graph[i].append(n - 1 - i)
+            cube[0] = [[7] * n for _ in range(n)]
+            return cube
+
+        _, events = ExecutionTracer().run(fill, 2)
+        writes = [
+            (e.var_name, e.old_value, e.new_value)
+            for e in events if e.event_type == "var_change" and "[" in e.var_name
+        ]
+
+        self.assertEqual(writes[:4], [
+            ("cube[0][0][0]", 0, 1),
+            ("graph[0]", [], [1]),
+            ("cube[1][1][1]", 0, 2),
+            ("graph[1]", [], [0]),
+        ])
+        self.assertEqual(writes[4:], [
+            ("cube[0][0][0]", 1, 7),
+            ("cube[0][0][1]", 0, 7),
+            ("cube[0][1][0]", 0, 7),
+            ("cube[0][1][1]", 0, 7),
+        ])
+
+    def test_cell_deltas_round_trip(self):
+        """Test that table snapshots are cell deltas that rebuild and export"""
+        tracer = ExecutionTracer()
+        _, events = tracer.run(self._lcs, "abcb", "bcb")
+        writes = [e for e in events if e.event_type == "var_change" and "[" in e.var_name]
+        expected = [e.locals_snapshot["dp"] for e in writes]
+        self.assertEqual(expected[0], [[0] * 4, [0] * 4, [0, 1, 0, 0], [0] * 4, [0] * 4])
+
+        store = events.snapshots
+        bases, changes = [], []
+        for snapshot_id in range(len(store)):
+            base, entries = store.export_changes(snapshot_id)
+            bases.append(base)
+            changes.append(SnapshotStore.changes_from_entries(entries))
+        self.assertIn("cell", [entry[0] for entry in store.export_changes(writes[1].snapshot_id)[1]])
+        replay = SnapshotStore.replay(bases, changes)
+        for event, dp in reversed(list(zip(writes, expected))):
+            self.assertEqual(replay.locals_at(event.snapshot_id)["dp"], dp)
+
+
+class TestRecording(unittest.TestCase):
+    """Test binary trace recording and replay"""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".avt")
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+
+    def test_replay_matches_live_trace(self):
+        """Test that a recorded trace replays the same events and analysis"""
+        def dp_func(n):
+            dp = [0] * (n + 1)
+            dp[0], dp[1] = 1, 1
+            for i in range(2, n + 1):
+                dp[i] = dp[i - 1] + dp[i - 2]
+            return dp[n]
+
+        _, events = ExecutionTracer(record=self.path).run(dp_func, 8)
+
+        with open_trace(self.path) as replay:
+            self.assertEqual(list(replay.iter_rows()), list(events.iter_rows()))
+            self.assertEqual(_event_rows(replay), _event_rows(events))
+            self.assertEqual(analyze_dp(replay), analyze_dp(events))
+            self.assertEqual(replay[-2].locals_snapshot, events[-2].locals_snapshot)
+            with self.assertRaises(TypeError):
+                replay.add("line", 1, "f", None, None, None)
+
+    def test_line_extras_written_once(self):
+        """Test that the writes of one line reference a single heap entry for their extras"""
+        def swap(items):
+            items[0], items[1] = items[1], items[0]
+            return items
+
+        _, events = ExecutionTracer(record=self.path).run(swap, [1, 2])
+
+        with open_trace(self.path) as replay:
+            rows = [row for row, e in enumerate(replay) if e.event_type == "var_change"]
+            self.assertEqual(len(rows), 2)
+            offsets = {RECORD.unpack_from(replay._table, row * RECORD.size)[8] for row in rows}
+            self.assertEqual(len(offsets), 1)
+            self.assertEqual(replay[rows[1]].locals_snapshot, {"items": [2, 1]})
+
+    def test_large_containers_replay_whole(self):
+        """Test that snapshots of containers past the display caps replay element deltas"""
+        def fill(n):
+            a = list(range(n))
+            seen = set()
+            for i in range(n - 3, n):
+                a[i] = -a[i]
+                seen.add(frozenset({i, -i}))
+            return a
+
+        n = MAX_ITEMS + 500
+        _, events = ExecutionTracer(record=self.path).run(fill, n)
+
+        with open_trace(self.path) as replay:
+            self.assertEqual(len(replay), len(events))
+            writes = []
+            for live, recorded in zip(events, replay):
+                if live.event_type == "var_change" and "[" in live.var_name:
+                    self.assertEqual(recorded.locals_snapshot, live.locals_snapshot)
+                    writes.append(recorded)
+            self.assertEqual(writes[-1].var_name, f"seen[frozenset({{{n - 1}, {1 - n}}})]")
+            snapshot = writes[-1].locals_snapshot
+            self.assertEqual(snapshot["a"][-4:], [n - 4, 3 - n, 2 - n, 1 - n])
+            self.assertEqual(len(snapshot["seen"]), 3)
+
+    def test_values_encoded_safely(self):
+        """Test that unencodable and self-referencing values survive as reprs"""
+        cycle = [1]
+        cycle.append(cycle)
+        events = EventStore()
+        events.add("var_change", 1, "f", "x", (1, 2), {1, 2})
+        events.add("var_change", 2, "f", "y", object, cycle)
+        write_trace(events, self.path)
+
+        with open_trace(self.path) as replay:
+            self.assertEqual(replay[0].old_value, (1, 2))
+            self.assertEqual(replay[0].new_value, {1, 2})
+            self.assertEqual(repr(replay[1].old_value), repr(object))
+            self.assertEqual(repr(replay[1].new_value), "[1, [...]]")
+
+    def test_rejects_other_files(self):
+        """Test that non-trace files raise TraceFormatError"""
+        with open(self.path, "wb") as f:
+            f.write(b"not a trace" * 4)
+
+        with self.assertRaises(TraceFormatError):
+            open_trace(self.path)
+
+
+class TestJSONLines(unittest.TestCase):
+    """Test the streaming NDJSON renderer and its reader"""
+
+    def test_round_trip(self):
+        """Test that events, extras and tagged values read back as written"""
+        cycle = [1]
+        cycle.append(cycle)
+        events = EventStore()
+        events.add("var_change", 1, "f", "x", (1, 2), {1, 2}, depth=0)
+        events.add("var_change", 2, "f", "y", None, cycle, extras={"source_line": "y = z", "snapshot_id": 0})
+        out = io.StringIO()
+        render_json(events, out)
+
+        replay = list(iter_events(io.StringIO(out.getvalue())))
+        self.assertEqual(len(replay), 2)
+        self.assertEqual((replay[0].old_value, replay[0].new_value, replay[0].depth), ((1, 2), {1, 2}, 0))
+        self.assertEqual(repr(replay[1].new_value), "[1, [...]]")
+        self.assertEqual(replay[1].source_line, "y = z")
+        self.assertFalse(hasattr(replay[1], "snapshot_id"))
+
+    def test_analysis_follows_events(self):
+        """Test that the analysis records come last and are skipped by iter_events"""
+        _, events = ExecutionTracer().run(_multiline_dp, 6)
+        out = io.StringIO()
+        render_json(events, out, analyze_trace(events))
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(list(iter_events(lines))), len(events))
+        analysis = read_analysis(lines)
+        self.assertIn("Dynamic Programming", analysis["detected_patterns"])
+        self.assertEqual([update["table"] for update in analysis["dp_updates"]], ["dp"] * 5)
+        self.assertEqual(analysis["dp_updates"][-1]["result"], 13)
+
+
+class TestLineProfile(unittest.TestCase):
+    """Test per-line timings"""
+
+    def test_hits_and_times_per_line(self):
+        """Test that every traced line gets its hits and a share of the time"""
+        for backend in ("settrace", "auto"):
+            tracer = ExecutionTracer(backend=backend, profile=True)
+            tracer.run(_insertion_sort, [3, 2, 1])
+            profile = tracer.profile
+            self.assertGreater(profile.overhead_ns, 0)
+
+            first = _insertion_sort.__code__.co_firstlineno
+            hits = {line - first: count for _, line, count, _ in profile.hottest()}
+            # The for header runs once per value plus the final check; the
+            # swap line once per inversion
+            self.assertEqual(hits[2], 3)
+            self.assertEqual(hits[5], 3)
+            self.assertTrue(all(ns >= 0 for _, _, _, ns in profile.hottest()))
+            self.assertEqual(profile.total_ns, sum(ns for _, _, _, ns in profile.hottest()))
+
+    def test_render_annotates_source(self):
+        """Test that the profile is printed next to the function's source"""
+        tracer = ExecutionTracer(profile=True)
+        tracer.run(_insertion_sort, list(range(30, 0, -1)))
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            render_profile(tracer.profile)
+        text = out.getvalue()
+        self.assertIn("_insertion_sort (test_algoviz.py)", text)
+        self.assertIn("values[j - 1], values[j] = values[j], values[j - 1]", text)
+        self.assertEqual(text.count("<- hottest"), 1)
+
+        stream = io.StringIO()
+        render_json([], stream, profile=tracer.profile)
+        record = list(iter_records(io.StringIO(stream.getvalue())))[-1]
+        self.assertEqual(record["record"], "profile")
+        self.assertEqual(record["lines"][0]["function"], "_insertion_sort")
+
+
+def _temporary_swap(values, i, j):
+    t = values[i]
+    values[i] = values[j]
+    values[j] = t
+
+
+def _overwrite(values, i, j):
+    values[i] = values[j]
+    values[j] = values[i]
+
+
+class TestOperationCounts(unittest.TestCase):
+    """Test exact operation counts per function and per line"""
+
+    def test_counts_per_line(self):
+        """Test comparisons, reads, writes and swaps of every line"""
+        first = _insertion_sort.__code__.co_firstlineno
+        for backend in ("settrace", "auto"):
+            tracer = ExecutionTracer(backend=backend, count_operations=True)
+            _, events = tracer.run(_insertion_sort, [3, 2, 1])
+            counts = tracer.operation_counts
+            lines = {line - first: tally for line, tally in counts.lines(_insertion_sort).items()}
+            # j > 0 five times, values[j - 1] > values[j] three times
+            self.assertEqual((lines[4].comparisons, lines[4].reads), (8, 6))
+            self.assertEqual((lines[5].reads, lines[5].writes, lines[5].swaps), (6, 6, 3))
+            self.assertEqual(counts.function(_insertion_sort), counts.total())
+            self.assertEqual(counts.total().accesses, 18)
+
+            # Counting leaves the traced events untouched
+            plain = ExecutionTracer(backend=backend)
+            _, plain_events = plain.run(_insertion_sort, [3, 2, 1])
+            self.assertEqual(_event_rows(events), _event_rows(plain_events))
+
+    def test_counts_outlast_read_limit(self):
+        """Test that counting goes on after the read log hits max_reads"""
+        values = list(range(40, 0, -1))
+        expected = ExecutionTracer(count_operations=True)
+        expected.run(_insertion_sort, values)
+        for backend in ("settrace", "auto"):
+            tracer = ExecutionTracer(
+                backend=backend, track_reads=True, max_reads=5, count_operations=True
+            )
+            tracer.run(_insertion_sort, values)
+            self.assertTrue(tracer.reads_truncated)
+            self.assertEqual(tracer.operation_counts.total(), expected.operation_counts.total())
+            self.assertEqual(tracer.operation_counts.total().swaps, 780)
+
+    def test_swap_sites(self):
+        """Test that only real exchanges of two elements count as swaps"""
+        for func, swaps in ((_insertion_sort, 1), (_temporary_swap, 1), (_overwrite, 0)):
+            self.assertEqual(len(swap_sites(func.__code__)), swaps, func.__name__)
+
+        counter = OperationCounter()
+        values = [1, 2]
+        counter.run(_temporary_swap, values, 0, 1)
+        self.assertEqual(values, [2, 1])
+        self.assertEqual(counter.counts["swaps"], 1)
+        self.assertEqual(counter.counts["list_writes"], 2)
+
+    def test_detectors_and_report(self):
+        """Test that the detectors and the report read the exact counts"""
+        tracer = ExecutionTracer(count_operations=True, track_reads=True)
+        _, events = tracer.run(_insertion_sort, list(range(6, 0, -1)))
+        counts = tracer.operation_counts
+
+        # From the events alone swaps are the element pairs exchanging values
+        self.assertEqual(detect_sorting_pattern(events)["swap_count"], 15)
+        sorting = detect_sorting_pattern(events, counts)
+        self.assertEqual(sorting["swap_count"], 15)
+        self.assertEqual(sorting["comparison_count"], counts.total().comparisons)
+        # Every read here resolves, so the read events agree with the counts
+        self.assertEqual(detect_list_operations(events)["read_count"], 60)
+        self.assertEqual(detect_list_operations(events, counts)["read_count"], 60)
+
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            render_report(events, "ascii", show_generic=False, operation_counts=counts)
+        self.assertIn("[*] Operation Counts", out.getvalue())
+        self.assertIn("Total: 35 comparisons, 60 reads, 30 writes, 15 swaps", out.getvalue())
+
+        stream = io.StringIO()
+        render_report(events, "json", output=stream, operation_counts=counts)
+        analysis = read_analysis(io.StringIO(stream.getvalue()))
+        self.assertEqual(
+            analysis["operation_counts"]["total"],
+            {"comparisons": 35, "reads": 60, "writes": 30, "swaps": 15},
+        )
+        self.assertEqual(analysis["operations"]["list_operations"]["read_count"], 60)
+
+
+class TestHTMLTimeline(unittest.TestCase):
+    """Test the chunked, compressed HTML timeline"""
+
+    def test_rows_chunked_and_compressed(self):
+        """Test that every timeline row lands in a decodable chunk, in order"""
+        import base64
+        import re
+        import zlib
+
+        events = EventStore()
+        events.add("call", 1, "f", None, None, {"n": 3}, depth=0)
+        for i in range(10):
+            events.add("line", 2, "f", None, None, None, depth=0)
+            events.add("var_change", 2, "f", "x", i, "<b>" * 200, depth=1)
+        events.add("return", 3, "f", None, None, 9, depth=0)
+        handle, path = tempfile.mkstemp(suffix=".html")
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+
+        old_chunk = html_renderer.CHUNK_ROWS
+        html_renderer.CHUNK_ROWS = 4
+        self.addCleanup(setattr, html_renderer, "CHUNK_ROWS", old_chunk)
+        with contextlib.redirect_stdout(io.StringIO()):
+            html_renderer.render_html(events, path)
+
+        with open(path, encoding="utf-8") as f:
+            page = f.read()
+        chunks = re.findall(r'class="algoviz-chunk">([^<]*)</script>', page)
+        rows = [row for chunk in chunks for row in json.loads(zlib.decompress(base64.b64decode(chunk)))]
+        self.assertEqual(len(chunks), 3)
+        self.assertIn("const TOTAL = 12, CHUNK = 4,", page)
+        self.assertEqual(rows[0], ["call", 0, "[+] f(n=3)", 1])
+        self.assertEqual(rows[-1], ["return", 0, "[-] return 9", 3])
+        self.assertEqual(rows[1][:2], ["var", 1])
+        self.assertEqual(len(rows[1][2]), html_renderer.MAX_TEXT + 3)
+        self.assertNotIn("<b>", page)
+
+    def test_html_row_bounds_large_values(self):
+        """Test that timeline rows format large values only as far as they show"""
+        values = list(range(1_000_000))
+        row = html_renderer._timeline_row("call", 1, "f", None, None, {"values": values, "n": 5}, 0)
+        self.assertTrue(row[2].startswith("[+] f(values=[0, 1, 2, "))
+        self.assertIn("...], n=5)", row[2])
+        row = html_renderer._timeline_row("var_change", 2, "f", "grid", None, [values] * 1000, 0)
+        self.assertEqual(len(row[2]), html_renderer.MAX_TEXT + 3)
+
+
+class TestLineTable(unittest.TestCase):
+    """Test AST-based source line tables"""
+
+    def test_loop_header_targets_body(self):
+        """Test that a multi-line loop header points at its full body statement"""
+        code = _multiline_dp.__code__
+        table = line_table(code)
+        header = table[code.co_firstlineno + 2]
+
+        self.assertEqual(header.kind, "for")
+        self.assertEqual(table[code.co_firstlineno + 3], header)
+        self.assertEqual(header.body_line, code.co_firstlineno + 4)
+        self.assertEqual(header.source_line, "dp[i] = (dp[i - 1] +\n                 dp[i - 2])")
+
+    def test_continuation_line_maps_to_statement(self):
+        """Test that every line of a multi-line statement maps to that statement"""
+        code = _multiline_dp.__code__
+        table = line_table(code)
+        first = table[code.co_firstlineno + 4]
+
+        self.assertEqual(first.kind, "assign")
+        self.assertIs(table[code.co_firstlineno + 5], first)
+
+    def test_tracer_attributes_writes_to_statement(self):
+        """Test that list writes carry the full assignment as their source"""
+        _, events = ExecutionTracer().run(_multiline_dp, 4)
+        writes = [e for e in events if (e.var_name or "").startswith("dp[")]
+
+        self.assertTrue(writes)
+        self.assertTrue(all(e.source_line.startswith("dp[i] = (dp[i - 1] +") for e in writes))
+
+
+class TestTraceScope(unittest.TestCase):
+    """Test scoped tracing"""
+
+    def test_stdlib_frames_skipped(self):
+        """Test that the default scope does not trace stdlib helpers"""
+        import heapq
+
+        def heap_func(items):
+            heap = []
+            for item in items:
+                heapq.heappush(heap, item)
+            return heapq.heappop(heap)
+
+        tracer = ExecutionTracer(scope=TraceScope())
+        result, events = tracer.run(heap_func, [3, 1, 2])
+
+        self.assertEqual(result, 1)
+        self.assertEqual({e.func_name for e in events}, {"heap_func"})
+
+    def test_code_allow_list(self):
+        """Test that only the target code objects are traced"""
+        def helper(x):
+            return x + 1
+
+        def target(x):
+            y = helper(x)
+            return y
+
+        tracer = ExecutionTracer(scope=TraceScope(codes=[target]))
+        result, events = tracer.run(target, 1)
+
+        self.assertEqual(result, 2)
+        self.assertNotIn("helper", {e.func_name for e in events})
+
+    def test_max_depth(self):
+        """Test that calls deeper than max_depth are not traced"""
+        def countdown(n):
+            if n == 0:
+                return 0
+            return countdown(n - 1)
+
+        tracer = ExecutionTracer(scope=TraceScope(codes=[countdown], max_depth=2))
+        tracer.run(countdown, 5)
+
+        calls = [e for e in tracer.events if e.event_type == "call"]
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(max(e.depth for e in tracer.events), 2)
+
 
 class TestPatternDetection(unittest.TestCase):
     """Test algorithm pattern detection"""
@@ -76,6 +1324,59 @@ class TestPatternDetection(unittest.TestCase):
         
         self.assertTrue(detect_recursion(events))
 
+    def test_recursion_tree_shares_repeated_subtrees(self):
+        """Test that repeated subcalls are interned and counted, not repeated"""
+        _, events = ExecutionTracer().run(_fib, 6)
+        tree = build_recursion_tree(events)
+
+        self.assertEqual((tree.calls, tree.distinct_subproblems, len(tree.subtrees)), (25, 7, 7))
+        # A memoized fib(6) makes 2 * 6 - 1 calls
+        self.assertEqual(tree.removable_calls, 25 - 11)
+        self.assertEqual({t.label: t.count for t in tree.subtrees}["_fib(n=2)"], 5)
+
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            render_recursion_tree(events, tree)
+        lines = out.getvalue().splitlines()
+        self.assertIn("[+] #1 _fib(n=6) -> 8", lines)
+        self.assertIn("    [=] _fib(n=3) -> 2 ×3, see #4", lines)
+        # One line per distinct subtree plus one reference per repeated one
+        self.assertEqual(sum(line.lstrip()[:3] in ("[+]", "[=]") for line in lines), 7 + 4)
+
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            render_recursion_tree(events, tree, max_depth=1, max_width=1)
+        self.assertIn("  ... 1 more subcalls (9 calls)", out.getvalue())
+        self.assertIn("    ... 14 calls below", out.getvalue())
+
+    def test_recursion_tree_bounds_large_list_arguments(self):
+        """Test that list arguments are keyed and labelled from bounded reprs"""
+        values = list(range(100_000))
+        _, events = ExecutionTracer().run(_range_sum, values, 0, 64)
+        tree = build_recursion_tree(events)
+
+        self.assertEqual((tree.calls, tree.distinct_subproblems), (127, 127))
+        self.assertTrue(all(len(t.label) <= 140 for t in tree.subtrees))
+        self.assertTrue(all(len(repr(key)) < 1000 for key in tree.key_counts))
+        self.assertTrue(tree.subtrees[tree.roots[0]].label.startswith("_range_sum(values=[0, 1, 2,"))
+
+    def test_recursion_tree_keys_whole_list_arguments(self):
+        """Test that list arguments sharing a long prefix are still distinct subproblems"""
+        _, events = ExecutionTracer().run(_drop_last, list(range(43)))
+        tree = build_recursion_tree(events)
+        self.assertEqual((tree.calls, tree.distinct_subproblems, tree.removable_calls), (10, 10, 0))
+        self.assertEqual(len(tree.subtrees), 10)
+
+    def test_recursion_tree_bounds_printed_results(self):
+        """Test that printed results are as bounded as the call labels"""
+        _, events = ExecutionTracer().run(_merge_sort, list(range(300, 0, -1)))
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            render_recursion_tree(events)
+        lines = out.getvalue().splitlines()
+        self.assertIn("[+] #1 _merge_sort(values=[300, 299, 298,", out.getvalue())
+        self.assertLess(max(len(line) for line in lines), 400)
+
     def test_detect_two_pointers(self):
         """Test two pointers detection"""
         def two_pointers_func(nums, target):
@@ -128,6 +1429,414 @@ class TestPatternDetection(unittest.TestCase):
         self.assertGreater(len(events), 0)
         # Just verify events were captured
         self.assertTrue(any(e.event_type in ["call", "return"] for e in events))
+class TestDPFormula(unittest.TestCase):
+    """Test compiled DP formula extraction"""
+
+    def test_multi_dimensional_and_cross_table_reads(self):
+        """Test that 2D reads and reads from other tables are resolved"""
+        formula = compile_formula("dp[i][j] = dp[i-1][j] + cost[j] + dp[i][j - 1]")
+        snapshot = {"dp": [[1, 2], [3, 0]], "cost": [10, 20], "i": 1, "j": 1}
+
+        inputs, reads = formula.evaluate("dp", snapshot)
+
+        self.assertEqual(inputs, {"i-1][j": 2, "i][j - 1": 3})
+        self.assertEqual(
+            reads,
+            [("dp", (0, 1), "i-1][j", 2), ("cost", (1,), "j", 20), ("dp", (1, 0), "i][j - 1", 3)],
+        )
+
+    def test_unsafe_index_not_evaluated(self):
+        """Test that index expressions calling arbitrary functions are skipped"""
+        formula = compile_formula("dp[i] = dp[f(i)] + dp[len(dp) - 2]")
+        inputs, _ = formula.evaluate("dp", {"dp": [1, 2, 3], "i": 2, "f": lambda x: 0})
+
+        self.assertEqual(inputs, {"len(dp) - 2": 2})
+        self.assertIsNone(compile_formula("for i in range(3):"))
+
+    def test_analyze_dp_uses_formula(self):
+        """Test that DP updates carry the values they were computed from"""
+        def dp_func(n):
+            dp = [0] * (n + 1)
+            dp[0], dp[1] = 1, 1
+            for i in range(2, n + 1):
+                dp[i] = dp[i - 1] + dp[i - 2]
+            return dp[n]
+
+        _, events = ExecutionTracer().run(dp_func, 5)
+        last = analyze_dp(events)[-1]
+
+        self.assertEqual(last.result, 8)
+        self.assertEqual(last.inputs, {"i - 1": 5, "i - 2": 3})
+
+
+class TestDPGrid(unittest.TestCase):
+    """Test the DP table grid renderers"""
+
+    def setUp(self):
+        _, self.events = ExecutionTracer().run(TestNestedTables._lcs, "abcb", "bcb")
+        self.updates = analyze_dp(self.events)
+
+    def test_static_grid(self):
+        """Test that the final table is rebuilt, with the last write and its reads marked"""
+        out = io.StringIO()
+        dp_renderer.render_dp_grid(self.updates, self.events, stream=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[1], "[*] DP Table: dp (5×4)")
+        self.assertEqual(lines[3:5], ["   0  1  2  3", "0  0  0  0  0"])
+        self.assertEqual(lines[-2:], ["3  0  1 (2) 2", "4  0  1  2 [3]"])
+
+    def test_animation_redraws_changed_cells(self):
+        """Test that animation frames move the cursor to changed cells instead of repainting"""
+        self.addCleanup(setattr, dp_renderer, "ANIMATION_SECONDS", dp_renderer.ANIMATION_SECONDS)
+        dp_renderer.ANIMATION_SECONDS = 0
+        out = io.StringIO()
+        dp_renderer.render_dp_grid(self.updates, self.events, stream=out, animate=True)
+        text = out.getvalue()
+        # Header plus five rows, drawn once
+        self.assertEqual(text.count("\x1b[2K"), 6)
+        self.assertLess(text.count("\x1b[1;7m"), 2 * len(self.updates) + 1)
+        self.assertTrue(text.endswith("\x1b[0m"))
+
+    def test_report_animates_only_on_request(self):
+        """Test that the report prints the static grid on a terminal unless asked to animate"""
+        class Terminal(io.StringIO):
+            def isatty(self):
+                return True
+
+        out = Terminal()
+        with contextlib.redirect_stdout(out), mock.patch.object(
+            dp_renderer.time, "sleep", side_effect=AssertionError("animated")
+        ):
+            render_report(self.events, "ascii", show_generic=False)
+        self.assertIn("4  0  1  2 [3]", out.getvalue())
+        self.assertNotIn("\x1b[2K", out.getvalue())
+
+        out = Terminal()
+        with contextlib.redirect_stdout(out), mock.patch.object(dp_renderer.time, "sleep") as sleep:
+            render_report(self.events, "ascii", show_generic=False, animate=True)
+        self.assertTrue(sleep.called)
+        self.assertIn("\x1b[2K", out.getvalue())
+
+    def test_html_diff_frames(self):
+        """Test that the HTML page holds the initial grid and one diff frame per update"""
+        handle, path = tempfile.mkstemp(suffix=".html")
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            dp_renderer.render_dp_html(self.updates, path, self.events)
+        with open(path, encoding="utf-8") as f:
+            page = f.read()
+        data = json.loads(page.split('id="dp-data">', 1)[1].split("</script>", 1)[0])
+        self.assertEqual(data["shape"], [5, 4])
+        self.assertEqual(set(data["initial"]), {"0"})
+        self.assertEqual(len(data["frames"]), len(self.updates))
+        self.assertEqual(data["frames"][-1], [4, 3, "0", "3", [[3, 2]]])
+        self.assertTrue(data["nested"])
+
+    def test_html_one_dimensional_table(self):
+        """Test that a 1D table's HTML page is marked flat so cells are shown as dp[i]"""
+        handle, path = tempfile.mkstemp(suffix=".html")
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        _, events = ExecutionTracer().run(_multiline_dp, 5)
+        with contextlib.redirect_stdout(io.StringIO()):
+            dp_renderer.render_dp_html(analyze_dp(events), path, events)
+        with open(path, encoding="utf-8") as f:
+            page = f.read()
+        data = json.loads(page.split('id="dp-data">', 1)[1].split("</script>", 1)[0])
+        self.assertEqual(data["shape"], [1, 6])
+        self.assertFalse(data["nested"])
+        self.assertEqual(data["frames"][-1][:4], [0, 5, "1", "8"])
+
+
+class TestReadTracking(unittest.TestCase):
+    """Test opcode-level subscript read tracking"""
+
+    @staticmethod
+    def _grid(n):
+        dp = [[1] * n for _ in range(n)]
+        cost = list(range(n))
+        for i in range(1, n):
+            for j in range(1, n):
+                dp[i][j] = dp[i - 1][j] + cost[j] + dp[i][j - 1]
+        return dp[n - 1][n - 1]
+
+    def test_read_sites(self):
+        """Test that nested reads collapse into one site and write targets are skipped"""
+        sites = read_sites(self._grid.__code__)
+        labels = sorted((site.table, site.label) for site in sites.values())
+
+        self.assertEqual(
+            labels,
+            [("cost", "j"), ("dp", "i - 1][j"), ("dp", "i][j - 1"), ("dp", "n - 1][n - 1")],
+        )
+
+    def test_reads_recorded(self):
+        """Test that every element read becomes a read event"""
+        tracer = ExecutionTracer(track_reads=True)
+        result, events = tracer.run(self._grid, 3)
+
+        reads = [(e.var_name, e.new_value) for e in events if e.event_type == "read"]
+        self.assertEqual(result, 13)
+        self.assertEqual(reads[:3], [("dp[0][1]", 1), ("cost[1]", 1), ("dp[1][0]", 1)])
+        self.assertEqual(reads[-1], ("dp[2][2]", 13))
+        self.assertEqual(len(reads), 13)
+
+    @unittest.skipUnless(hasattr(sys, "monitoring"), "sys.monitoring requires Python 3.12+")
+    def test_monitoring_matches_settrace(self):
+        """Test that both backends record the same reads"""
+        def reads(backend):
+            _, events = ExecutionTracer(backend=backend, track_reads=True).run(self._grid, 4)
+            return [(e.var_name, e.new_value) for e in events if e.event_type == "read"]
+
+        self.assertEqual(reads("settrace"), reads("monitoring"))
+
+    def test_dp_inputs_from_reads(self):
+        """Test that DP updates use the exact reads behind each write"""
+        def dp_func(n):
+            dp = [0] * (n + 1)
+            dp[1] = 1
+            for i in range(2, n + 1):
+                dp[i] = max(dp[i - 1], dp[i - 2]) + dp[i - 2]
+            return dp[n]
+
+        _, events = ExecutionTracer(track_reads=True).run(dp_func, 4)
+        last = analyze_dp(events)[-1]
+
+        self.assertEqual(last.result, 3)
+        self.assertEqual(last.inputs, {"i - 1": 2, "i - 2": 1})
+        self.assertEqual(last.reads[0], ("dp", (3,), "i - 1", 2))
+
+    def test_read_budget(self):
+        """Test that read tracking stops once max_reads is reached"""
+        tracer = ExecutionTracer(track_reads=True, max_reads=5)
+        result, events = tracer.run(self._grid, 4)
+
+        self.assertEqual(result, 51)
+        self.assertTrue(tracer.reads_truncated)
+        self.assertEqual(sum(1 for e in events if e.event_type == "read"), 5)
+
+
+class TestAnalysisPipeline(unittest.TestCase):
+    """Test the fused single-pass analysis"""
+
+    def _trace(self):
+        def two_pointers_func(nums, target):
+            l, r = 0, len(nums) - 1
+            while l < r:
+                s = nums[l] + nums[r]
+                if s == target:
+                    return l, r
+                elif s < target:
+                    l += 1
+                else:
+                    r -= 1
+            return None
+
+        return ExecutionTracer().run(two_pointers_func, [1, 2, 3, 4, 5], 8)[1]
+
+    def test_matches_standalone_detectors(self):
+        """Test that one pass gives the same answers as separate passes"""
+        events = self._trace()
+        analysis = analyze_trace(events)
+
+        self.assertEqual(analysis.two_pointers, detect_two_pointers(events))
+        self.assertEqual(analysis.recursion, detect_recursion(events))
+        self.assertEqual(analysis.dp, detect_dp(events))
+        self.assertEqual(analysis.sliding_window, detect_sliding_window(events))
+        self.assertEqual(
+            analysis.generic_patterns, GenericPatternDetector(events).get_summary()
+        )
+        self.assertIn("Two Pointers", analysis.detected_patterns)
+
+    def test_memoized_per_trace(self):
+        """Test that repeated analysis of a trace is shared"""
+        events = self._trace()
+        self.assertIs(analyze_trace(events), analyze_trace(events))
+        self.assertIsNot(analyze_trace(list(events)), analyze_trace(list(events)))
+
+
+class TestCLI(unittest.TestCase):
+    """Test the algoviz command line"""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".avt")
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+
+    def test_load_target_unwraps_visualize(self):
+        """Test that decorated targets are traced by the CLI, not the decorator"""
+        @visualize()
+        def decorated(x):
+            return x
+
+        sys.modules[__name__].decorated = decorated
+        self.addCleanup(delattr, sys.modules[__name__], "decorated")
+
+        self.assertIs(load_target(f"{__name__}:decorated"), decorated.__wrapped__)
+        self.assertEqual(load_arguments("[1, [2]]"), ([1, [2]], {}))
+        self.assertEqual(load_arguments('{"n": 3}'), ([], {"n": 3}))
+        self.assertEqual(load_arguments("7"), ([7], {}))
+
+    def test_file_target_keeps_module_names(self):
+        """Test that a file target named like a stdlib module does not replace it"""
+        import heapq
+
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "heapq.py")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("def f(x):\n    return x + 1\n")
+        self.addCleanup(os.rmdir, directory)
+        self.addCleanup(os.remove, path)
+        self.addCleanup(sys.path.remove, directory)
+
+        target = load_target(f"{path}:f")
+        self.addCleanup(sys.modules.pop, target.__module__)
+        self.assertEqual(target(1), 2)
+        self.assertIs(sys.modules["heapq"], heapq)
+        self.assertTrue(target.__module__.startswith("_algoviz_target_"))
+        self.assertIs(load_target(f"{path}:f"), target)
+
+    def test_record_then_render(self):
+        """Test that a recorded trace renders without re-running the function"""
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.assertEqual(main(["record", f"{__name__}:_multiline_dp", "--args", "[4]", "-o", self.path]), 0)
+            self.assertEqual(main(["render", self.path, "--mode", "json"]), 0)
+
+        lines = out.getvalue().splitlines()
+        self.assertIn("written to", lines[0])
+        records = [json.loads(line) for line in lines[1:]]
+        self.assertEqual((records[0]["event_type"], records[0]["func_name"]), ("call", "_multiline_dp"))
+        events = [record for record in records if "record" not in record]
+        self.assertEqual(events[-1]["new_value"], [1, 1, 2, 3, 5])
+        self.assertEqual(records[-1]["record"], "analysis")
+
+    def test_decorated_recursive_target(self):
+        """Test that a decorated recursive target is traced whole, without nested reports"""
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.assertEqual(main(["record", f"{__name__}:_visualized_fib", "--args", "[5]", "-o", self.path]), 0)
+
+        self.assertEqual(len(out.getvalue().splitlines()), 1)
+        with open_trace(self.path) as replay:
+            self.assertEqual(sum(e.event_type == "call" for e in replay), 15)
+            self.assertEqual(replay[-1].new_value, 5)
+
+    def test_bad_target_is_usage_error(self):
+        """Test that unknown targets exit with a usage error"""
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit) as ctx:
+            main(["run", "no_such_module_xyz:f"])
+        self.assertEqual(ctx.exception.code, 2)
+
+
+class TestBatch(unittest.TestCase):
+    """Test batch runs over many inputs"""
+
+    def test_results_merged_in_input_order(self):
+        """Test that worker results come back per input and are aggregated"""
+        report = run_batch(f"{__name__}:_multiline_dp", [4, [5], {"n": 6}, "x"], max_workers=2)
+
+        self.assertEqual(report.workers, 2)
+        self.assertEqual([r.result for r in report.results[:3]], [
+            "[1, 1, 2, 3, 5]", "[1, 1, 2, 3, 5, 8]", "[1, 1, 2, 3, 5, 8, 13]",
+        ])
+        self.assertEqual(len(report.failed), 1)
+        self.assertIn("TypeError", report.failed[0].error)
+        self.assertEqual(report.pattern_counts["Dynamic Programming"], 3)
+        self.assertEqual(report.to_dict()["inputs"], 4)
+
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            report.render()
+        # Averaged over the three inputs that ran, not the failed one
+        self.assertIn(f"{'list_writes':<24} {12:>8}  {4:>10.1f}", out.getvalue())
+        # Loops are a share of inputs, not summed like operation counts
+        self.assertEqual(report.loop_counts, {"for": 3})
+        self.assertIn(f"{'for loops':<24} {3:>5} / 3 (100%)", out.getvalue())
+        self.assertNotIn("for_loops", out.getvalue())
+
+
+    def test_decorated_recursive_target(self):
+        """Test that jobs on a decorated recursive target trace it whole, printing nothing"""
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            report = run_batch(f"{__name__}:_visualized_fib", [5, 6], max_workers=1)
+        plain = run_batch(f"{__name__}:_fib", [5, 6], max_workers=1)
+
+        self.assertEqual(out.getvalue(), "")
+        self.assertEqual([r.result for r in report.results], ["5", "8"])
+        self.assertEqual(
+            [r.event_count for r in report.results], [r.event_count for r in plain.results]
+        )
+
+
+class TestComplexity(unittest.TestCase):
+    """Test empirical complexity estimates"""
+
+    def test_fit_picks_growth_model(self):
+        """Test that exact counts are matched to their model with high confidence"""
+        sizes = [4, 8, 16, 32, 64, 128]
+        cases = {
+            "O(1)": lambda n: 7,
+            "O(log n)": lambda n: 3 * math.log2(n) + 2,
+            "O(n)": lambda n: 5 * n + 3,
+            "O(n log n)": lambda n: 2 * n * math.log2(n) + n,
+            "O(n²)": lambda n: n * n / 2 + 3 * n,
+        }
+        for model, count in cases.items():
+            fit = fit_complexity(sizes, [count(n) for n in sizes])
+            self.assertEqual(fit.model, model)
+            self.assertGreater(fit.confidence, 0.8)
+
+        fit = fit_complexity([4, 8, 12, 16, 20], [1.6 ** n for n in [4, 8, 12, 16, 20]])
+        self.assertEqual(fit.model, "O(2^n)")
+        self.assertEqual(fit_complexity([4, 8], [1, 2]).model, "unknown")
+
+    def test_scale_arguments(self):
+        """Test that the first sequence (else int) argument is resized"""
+        args, kwargs = scale_arguments([[1, 2, 3], 9], {}, 5)
+        self.assertEqual((sorted(args[0]) == args[0], len(args[0]), args[1]), (True, 5, 9))
+        self.assertEqual(scale_arguments(["ab"], {"k": 2}, 5), (["ababa"], {"k": 2}))
+        self.assertEqual(scale_arguments([3], {}, 6), ([6], {}))
+        with self.assertRaises(ValueError):
+            scale_arguments([None], {}, 4)
+
+    def test_sweep_in_workers(self):
+        """Test that worker counts fit insertion sort as quadratic"""
+        report = run_complexity(
+            f"{__name__}:_insertion_sort",
+            sizes=(8, 16, 32, 48, 64),
+            make_input=lambda n: list(range(n, 0, -1)),
+            max_workers=2,
+        )
+        self.assertEqual(report.workers, 2)
+        self.assertEqual(report.failed, [])
+        # Reversed input: every pair is compared and swapped once
+        self.assertEqual(report.results[0].list_writes, 2 * 8 * 7 // 2)
+        self.assertEqual(report.complexity.model, "O(n²)")
+        self.assertEqual(report.fits["list_accesses"].model, "O(n²)")
+
+    def test_step_limit_skips_larger_sizes(self):
+        """Test that an exponential run stops early and still fits"""
+        report = run_complexity(_fib, sizes=(2, 4, 6, 8, 10, 30, 40), max_workers=1, max_steps=5000)
+        self.assertEqual([r.truncated for r in report.results][-2:], [True, False])
+        self.assertTrue(report.results[-1].skipped)
+        self.assertEqual(report.complexity.model, "O(2^n)")
+        self.assertEqual(len(report.measured), 5)
+
+    def test_behavior_indicators(self):
+        """Test loop nesting, branching factor and data size of traced runs"""
+        _, events = ExecutionTracer().run(_insertion_sort, [5, 4, 3, 2, 1])
+        indicators = BehaviorAnalyzer(events).get_complexity_indicators()
+        self.assertEqual(indicators["loop_depth"], 2)
+        self.assertEqual(indicators["data_size"], 5)
+
+        _, events = ExecutionTracer().run(_fib, 6)
+        indicators = BehaviorAnalyzer(events).get_complexity_indicators()
+        self.assertEqual((indicators["loop_depth"], indicators["branching_factor"]), (0, 2))
+
+
 class TestDecorator(unittest.TestCase):
     """Test @visualize decorator"""
 
@@ -149,6 +1858,14 @@ class TestDecorator(unittest.TestCase):
         result = add(3, 4)
         self.assertEqual(result, 7)
 
+    def test_decorator_recursion_traced_once(self):
+        """Test that a recursive decorated function returns the right result"""
+        @visualize(show_generic=False)
+        def fact(n):
+            return 1 if n <= 1 else n * fact(n - 1)
+
+        self.assertEqual(fact(5), 120)
+
 
 if __name__ == "__main__":
     unittest.main()